@@ -1,25 +1,142 @@
-from django.contrib import admin
-from .models import Room, RoomTenant, Payment, Receipt
+from django.contrib import admin, messages
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .autocomplete import prefix_q
+from .models import Job, Property, Room, RoomTenant, Payment, Receipt, Statement
+from .tasks import render_receipt
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for the large tables: an unfiltered changelist takes its
+    row count from the highest primary key (one index seek) instead of a
+    COUNT(*) over the table. Filtered and searched lists count exactly.
+    """
+
+    @cached_property
+    def count(self):
+        if self.object_list.query.where:
+            return super().count
+        return self.object_list.model._default_manager.aggregate(last=Max('pk'))['last'] or 0
+
+
+class IndexedSearchAdmin(admin.ModelAdmin):
+    """
+    Changelist search that stays on indexed columns. ``^field`` is a prefix
+    range and ``=field`` an exact match, both case-sensitive and tried as
+    typed, lower-cased, upper-cased and title-cased (see core.autocomplete).
+    Django's own ``^``/``=`` are istartswith/iexact, which compile to LIKE
+    and cannot use an ordinary index on SQLite.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        match = Q()
+        for spec in self.get_search_fields(request):
+            lookup, field = spec[0], spec[1:]
+            if lookup == '^':
+                match |= prefix_q(field, term)
+            else:
+                for variant in {term, term.lower(), term.upper(), term.title()}:
+                    match |= Q(**{field: variant})
+        return queryset.filter(match), False
+
+
+class LargeTableAdmin(IndexedSearchAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+def regenerate_receipts(receipts):
+    """
+    Drop the stored PDFs of ``receipts`` with one UPDATE and queue them for
+    re-rendering with one INSERT. Returns how many were queued.
+    """
+    rows = list(receipts.values_list('id', 'pdf_path'))
+    receipts.update(pdf_path='', updated_at=timezone.now())
+    for _, pdf_path in rows:
+        if pdf_path:
+            default_storage.delete(pdf_path)
+    render_receipt.enqueue_many(({'receipt_id': pk}, f'receipt:{pk}') for pk, _ in rows)
+    return len(rows)
+
+
+@admin.register(Property)
+class PropertyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'address', 'created_at')
+    search_fields = ('name', 'address')
+    filter_horizontal = ('landlords',)
 
 @admin.register(Room)
-class RoomAdmin(admin.ModelAdmin):
-    list_display = ('room_number', 'capacity', 'current_occupants', 'status', 'created_at')
-    list_filter = ('status',)
-    search_fields = ('room_number',)
+class RoomAdmin(IndexedSearchAdmin):
+    list_display = ('room_number', 'property', 'capacity', 'current_occupants', 'status', 'created_at')
+    list_filter = ('property', 'status')
+    list_select_related = ('property',)
+    search_fields = ('^room_number',)
 
 @admin.register(RoomTenant)
-class RoomTenantAdmin(admin.ModelAdmin):
+class RoomTenantAdmin(LargeTableAdmin):
     list_display = ('tenant', 'room', 'move_in_date', 'status', 'created_at')
-    list_filter = ('status', 'room')
-    search_fields = ('tenant__username', 'tenant__email', 'room__room_number')
+    list_filter = ('status', 'room__property')
+    list_select_related = ('tenant', 'room')
+    search_fields = ('^tenant__username', '^room__room_number')
+    autocomplete_fields = ('tenant', 'room')
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdmin):
     list_display = ('receipt_number', 'tenant', 'room', 'amount', 'payment_month', 'payment_date', 'status')
-    list_filter = ('status', 'payment_month')
-    search_fields = ('receipt_number', 'tenant__username', 'tenant__email')
+    list_filter = ('status', 'room__property')
+    list_select_related = ('tenant', 'room')
+    search_fields = ('=receipt_number', '^tenant__username', '^room__room_number')
+    autocomplete_fields = ('tenant', 'room')
+    date_hierarchy = 'payment_month'
+    actions = ['mark_paid', 'mark_unpaid', 'regenerate_payment_receipts']
+
+    @admin.action(description='Mark selected payments as paid')
+    def mark_paid(self, request, queryset):
+        updated = queryset.exclude(status='paid').update(status='paid', updated_at=timezone.now())
+        self.message_user(request, f'{updated} payment(s) marked as paid.', messages.SUCCESS)
+
+    @admin.action(description='Mark selected payments as unpaid')
+    def mark_unpaid(self, request, queryset):
+        updated = queryset.exclude(status='unpaid').update(status='unpaid', updated_at=timezone.now())
+        self.message_user(request, f'{updated} payment(s) marked as unpaid.', messages.SUCCESS)
+
+    @admin.action(description='Regenerate receipt PDFs')
+    def regenerate_payment_receipts(self, request, queryset):
+        queued = regenerate_receipts(Receipt.objects.filter(payment__in=queryset))
+        self.message_user(request, f'{queued} receipt(s) queued for rendering.', messages.SUCCESS)
 
 @admin.register(Receipt)
-class ReceiptAdmin(admin.ModelAdmin):
+class ReceiptAdmin(LargeTableAdmin):
     list_display = ('receipt_number', 'tenant_name', 'room_number', 'amount', 'payment_date', 'generated_date')
-    search_fields = ('receipt_number', 'tenant_name', 'room_number')
+    search_fields = ('=receipt_number', '^payment__tenant__username', '^payment__room__room_number')
+    raw_id_fields = ('payment',)
+    actions = ['regenerate']
+
+    @admin.action(description='Regenerate receipt PDFs')
+    def regenerate(self, request, queryset):
+        queued = regenerate_receipts(queryset)
+        self.message_user(request, f'{queued} receipt(s) queued for rendering.', messages.SUCCESS)
+
+@admin.register(Statement)
+class StatementAdmin(IndexedSearchAdmin):
+    list_display = ('tenant', 'year', 'pdf_path', 'generated_at')
+    list_filter = ('year',)
+    list_select_related = ('tenant',)
+    search_fields = ('^tenant__username',)
+    raw_id_fields = ('tenant',)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'priority', 'attempts', 'run_after', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'dedupe_key')
+    readonly_fields = ('created_at', 'locked_by', 'locked_at', 'finished_at', 'last_error')
@@ -0,0 +1,201 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.dateparse import parse_date
+from django.views.decorators.gzip import gzip_page
+from rest_framework import status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .models import AddOn, OccupancySnapshot, Payment, Receipt, Room, RoomTenant
+from .occupancy import INTERVALS, occupancy_series
+from .serializers import (
+    AddOnSerializer,
+    PaymentSerializer,
+    ReceiptSerializer,
+    RoomSerializer,
+    RoomTenantSerializer,
+)
+from .sync import InvalidWatermark, changes_since, parse_cursor, parse_watermark
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key: every page is an indexed range
+    scan, however deep the client pages.
+    """
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class RentrixViewSet(viewsets.ModelViewSet):
+    """
+    Staff-only CRUD plus ``/bulk/`` endpoints. Subclasses declare the joins
+    their serializer needs, the exact-match filters they accept and the path
+    to the owning property, which limits rows to the landlord's properties.
+    """
+    permission_classes = [IsAdminUser]
+    pagination_class = IdCursorPagination
+    select_related = ()
+    filter_fields = ()
+    property_path = 'room__property'
+
+    def get_queryset(self):
+        queryset = self.queryset.filter(**{f'{self.property_path}__landlords': self.request.user})
+        queryset = queryset.select_related(*self.select_related)
+        return queryset.filter(**self.get_filters())
+
+    def get_filters(self):
+        """
+        The ``filter_fields`` in the query string, each cleaned by its model
+        field (the target's primary key for a foreign key). Raises a 400 with
+        the errors of every value that does not fit its field.
+        """
+        filters, errors = {}, {}
+        for name in self.filter_fields:
+            if name not in self.request.query_params:
+                continue
+            field = self.queryset.model._meta.get_field(name)
+            field = field.target_field if field.is_relation else field
+            try:
+                filters[name] = field.clean(self.request.query_params[name], None)
+            except DjangoValidationError as exc:
+                errors[name] = exc.messages
+        if errors:
+            raise ValidationError(errors)
+        return filters
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        POST a list of objects to create them, or PATCH a list of partial
+        objects (each with its ``id``) to update them, in one statement per
+        batch.
+        """
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of objects.']})
+        if len(rows) > settings.RENTRIX_API_BULK_LIMIT:
+            raise ValidationError({'non_field_errors': [f'At most {settings.RENTRIX_API_BULK_LIMIT} objects per call.']})
+
+        if request.method == 'POST':
+            serializer = self.get_serializer(data=rows, many=True)
+            serializer.is_valid(raise_exception=True)
+            created = serializer.save()
+            return Response({'ids': [obj.pk for obj in created]}, status=status.HTTP_201_CREATED)
+
+        try:
+            ids = [int(row['id']) for row in rows]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError({'non_field_errors': ['Every object needs an integer "id".']})
+        if len(set(ids)) != len(ids):
+            raise ValidationError({'non_field_errors': ['Duplicate ids in request.']})
+        instances = self.get_queryset().in_bulk(ids)
+        missing = [pk for pk in ids if pk not in instances]
+        if missing:
+            raise ValidationError({'non_field_errors': [f'Unknown ids: {missing[:20]}']})
+        serializer = self.get_serializer([instances[pk] for pk in ids], data=rows, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response({'ids': ids})
+
+
+class RoomViewSet(RentrixViewSet):
+    queryset = Room.objects.all()
+    serializer_class = RoomSerializer
+    filter_fields = ('status', 'room_number', 'property')
+    property_path = 'property'
+
+
+class RoomTenantViewSet(RentrixViewSet):
+    queryset = RoomTenant.objects.all()
+    serializer_class = RoomTenantSerializer
+    select_related = ('room', 'tenant')
+    filter_fields = ('status', 'room', 'tenant')
+
+
+class PaymentViewSet(RentrixViewSet):
+    queryset = Payment.objects.all()
+    serializer_class = PaymentSerializer
+    select_related = ('room', 'tenant', 'receipt')
+    filter_fields = ('status', 'year', 'room', 'tenant')
+
+
+class AddOnViewSet(RentrixViewSet):
+    queryset = AddOn.objects.all()
+    serializer_class = AddOnSerializer
+    filter_fields = ('room_tenant',)
+    property_path = 'room_tenant__room__property'
+
+
+class ReceiptViewSet(RentrixViewSet):
+    queryset = Receipt.objects.all()
+    serializer_class = ReceiptSerializer
+    filter_fields = ('payment', 'receipt_number')
+    property_path = 'payment__room__property'
+
+
+@gzip_page
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def changes(request):
+    """
+    Rows of the landlord's properties changed, and ids deleted, since
+    ``?since=<watermark>``. Omit ``since`` (or send one older than the
+    tombstone retention) for a full snapshot, flagged with ``"reset": true``. While ``has_more`` is set, fetch
+    ``?cursor=<cursor>`` for the next page; ``page_size`` asks for smaller
+    pages. Send ``Accept-Encoding: gzip`` for a compressed payload.
+    """
+    params = request.query_params
+    try:
+        since = parse_watermark(params.get('since'))
+    except InvalidWatermark as exc:
+        raise ValidationError({'since': [str(exc)]})
+    try:
+        cursor = parse_cursor(params['cursor']) if params.get('cursor') else None
+    except InvalidWatermark as exc:
+        raise ValidationError({'cursor': [str(exc)]})
+    page_size = params.get('page_size')
+    if page_size is not None and not (page_size.isdigit() and int(page_size) > 0):
+        raise ValidationError({'page_size': ['Expected a positive integer.']})
+    return Response(changes_since(
+        since, {'request': request}, page_size and int(page_size), cursor, landlord=request.user,
+    ))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def occupancy(request):
+    """
+    Occupancy of the landlord's properties over time, from the daily
+    snapshots. ``?interval=day|week|month`` (default month), optional
+    ``start``/``end`` ISO dates, and ``property`` or ``room`` ids to narrow it.
+    """
+    params = request.query_params
+    interval = params.get('interval', 'month')
+    if interval not in INTERVALS:
+        raise ValidationError({'interval': [f'Expected one of {", ".join(INTERVALS)}.']})
+    dates = {}
+    for name in ('start', 'end'):
+        value = params.get(name)
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:
+            dates[name] = None
+        if value and dates[name] is None:
+            raise ValidationError({name: ['Expected an ISO date (YYYY-MM-DD).']})
+
+    snapshots = OccupancySnapshot.objects.filter(room__property__landlords=request.user)
+    for name, lookup in (('property', 'room__property'), ('room', 'room')):
+        if params.get(name):
+            if not params[name].isdigit():
+                raise ValidationError({name: ['Expected an integer id.']})
+            snapshots = snapshots.filter(**{lookup: params[name]})
+    return Response({
+        'interval': interval,
+        'series': occupancy_series(snapshots, interval, dates['start'], dates['end']),
+    })
@@ -0,0 +1,16 @@
+from django.urls import path
+from rest_framework.routers import DefaultRouter
+
+from . import api
+
+router = DefaultRouter()
+router.register('rooms', api.RoomViewSet)
+router.register('assignments', api.RoomTenantViewSet)
+router.register('payments', api.PaymentViewSet)
+router.register('addons', api.AddOnViewSet)
+router.register('receipts', api.ReceiptViewSet)
+
+urlpatterns = [
+    path('changes/', api.changes, name='api_changes'),
+    path('occupancy/', api.occupancy, name='api_occupancy'),
+] + router.urls
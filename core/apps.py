@@ -7,4 +7,8 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         # Import signal handlers
-        from . import signals  # noqa: F401
\ No newline at end of file
+        from . import signals  # noqa: F401
+        from django.db.backends.signals import connection_created
+        from .instrumentation import install_query_timer
+
+        connection_created.connect(install_query_timer, dispatch_uid='rentrix_query_timer')
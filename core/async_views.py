@@ -0,0 +1,229 @@
+"""
+Async views for the light, high-traffic JSON endpoints and the landlord
+dashboard. Under an ASGI server these run on the event loop, so typeahead
+searches keep flowing while a receipt renders; the PDF render itself is
+pushed to a small bounded thread pool.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.db.models import Count, Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+
+from .autocomplete import room_choices, tenant_choices
+from .live import event_stream
+from .models import Payment, Property, Receipt, Room, RoomTenant
+from .properties import current_property, signature_profile, tenant_properties
+from .pdf import read_stored_receipt_pdf, render_receipt_pdf, store_receipt_pdf
+from .pwa import receipt_etag
+from .ratelimit import ratelimit
+
+_pdf_executor = None
+_pdf_executor_lock = threading.Lock()
+
+
+def pdf_executor():
+    """
+    Thread pool for WeasyPrint renders, sized by RENTRIX_PDF_RENDER_THREADS
+    so a burst of downloads cannot occupy every worker thread.
+    """
+    global _pdf_executor
+    if _pdf_executor is None:
+        # Views run on several threads; only one of them may create the pool.
+        with _pdf_executor_lock:
+            if _pdf_executor is None:
+                _pdf_executor = ThreadPoolExecutor(
+                    max_workers=settings.RENTRIX_PDF_RENDER_THREADS,
+                    thread_name_prefix='rentrix-pdf',
+                )
+    return _pdf_executor
+
+
+def async_login_required(view_func=None, staff=False):
+    """
+    Async counterpart of ``login_required`` (plus ``user_passes_test(is_landlord)``
+    with ``staff=True``), which Django 5.0 only provides for sync views.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # Reuse the user a sync middleware already loaded (WSGI, or a
+            # sync-only middleware in the ASGI chain) rather than query again.
+            user = getattr(request, '_cached_user', None) or await request.auser()
+            if not user.is_authenticated or (staff and not user.is_staff):
+                return redirect_to_login(request.get_full_path())
+            request.user = user
+            return await view(request, *args, **kwargs)
+        return wrapper
+
+    if view_func is not None:
+        return decorator(view_func)
+    return decorator
+
+
+async def dashboard_counts(property_id):
+    rooms = await Room.objects.filter(property=property_id).aaggregate(
+        total_rooms=Count('id'),
+        vacant_rooms=Count('id', filter=Q(status='vacant')),
+    )
+    return {
+        **rooms,
+        'total_tenants': await RoomTenant.objects.filter(room__property=property_id, status='active').acount(),
+        'total_payments': await Payment.objects.filter(room__property=property_id, status='paid').acount(),
+    }
+
+
+@async_login_required(staff=True)
+async def landlord_dashboard(request):
+    property = await sync_to_async(current_property)(request)
+    context = await dashboard_counts(property.id)
+    context['recent_payments'] = [
+        payment async for payment in
+        Payment.objects.filter(room__property=property, status='paid')
+        .select_related('tenant', 'room').order_by('-payment_date')[:5]
+    ]
+    # Template rendering touches the session and other sync-only APIs.
+    return await sync_to_async(render)(request, 'core/landlord_dashboard.html', context)
+
+
+@async_login_required(staff=True)
+async def dashboard_counters(request):
+    """
+    The landlord dashboard's headline numbers as JSON, for polling widgets.
+    """
+    property = await sync_to_async(current_property)(request)
+    return JsonResponse(await dashboard_counts(property.id))
+
+
+@async_login_required(staff=True)
+async def live_events(request):
+    """
+    Server-sent events for room occupancy and payment changes in the
+    landlord's current property. Pages pass
+    ``?since=<unix time of render>``; reconnecting browsers send
+    ``Last-Event-ID``. Needs the ASGI server to stream without pinning a
+    worker.
+    """
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+    since = request.GET.get('since')
+    try:
+        last_id = int(last_id) if last_id else None
+        since = datetime.fromtimestamp(int(since), tz=timezone.utc) if since else None
+    except (ValueError, OverflowError, OSError):
+        return JsonResponse({'detail': 'Invalid last_id or since.'}, status=400)
+
+    property = await sync_to_async(current_property)(request)
+    response = StreamingHttpResponse(event_stream(property.id, last_id, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@ratelimit('search')
+@async_login_required
+async def search_api(request):
+    query = request.GET.get('q', '').strip()
+    results = []
+    if len(query) >= 2:
+        if request.user.is_staff:
+            rooms = Room.objects.filter(property=await sync_to_async(current_property)(request))
+        else:
+            rooms = Room.objects.filter(property__in=tenant_properties(request.user))
+        async for room in rooms.filter(room_number__icontains=query)[:5]:
+            results.append({
+                'type': 'Room',
+                'title': f"Room {room.room_number}",
+                'icon': 'fa-door-open',
+                'url': reverse('room_detail', args=[room.id]),
+            })
+
+        matched_assignments = RoomTenant.objects.select_related('tenant', 'room').filter(
+            Q(tenant__first_name__icontains=query) |
+            Q(tenant__last_name__icontains=query) |
+            Q(tenant__username__icontains=query) |
+            Q(tenant__email__icontains=query),
+            room__in=rooms,
+        )[:5]
+        async for a in matched_assignments:
+            results.append({
+                'type': 'Tenant',
+                'title': a.tenant.get_full_name() or a.tenant.username,
+                'icon': 'fa-user',
+                'url': f"{reverse('tenant_list')}?q={quote(query)}",
+            })
+
+    return JsonResponse(results, safe=False)
+
+
+@ratelimit('autocomplete')
+@async_login_required(staff=True)
+async def tenant_autocomplete(request):
+    """
+    Unassigned tenants for the RoomTenantForm picker, by name prefix.
+    """
+    query = request.GET.get('q', '').strip()
+    return JsonResponse({'results': await sync_to_async(tenant_choices)(query)})
+
+
+@ratelimit('autocomplete')
+@async_login_required(staff=True)
+async def room_autocomplete(request):
+    """
+    Vacant rooms of the current property, by room number prefix.
+    """
+    query = request.GET.get('q', '').strip()
+    property = await sync_to_async(current_property)(request)
+    return JsonResponse({'results': await sync_to_async(room_choices)(property.id, query)})
+
+
+@async_login_required
+async def download_receipt(request, receipt_id):
+    receipt = await aget_object_or_404(Receipt.objects.select_related('payment__room'), id=receipt_id)
+    property_id = receipt.payment.room.property_id
+
+    # Check if user is authorized to view this receipt
+    if request.user.is_staff:
+        authorized = await Property.objects.filter(id=property_id, landlords=request.user).aexists()
+    else:
+        authorized = receipt.payment.tenant_id == request.user.id
+    if not authorized:
+        messages.error(request, 'You are not authorized to view this receipt.')
+        return redirect('home')
+
+    # A stored PDF never changes under its name, so a client holding it
+    # (e.g. the tenant's service worker) gets a 304 before it is read.
+    headers = {'Cache-Control': f'private, max-age={settings.RENTRIX_MEDIA_MAX_AGE}'}
+    etag = receipt_etag(receipt.pdf_path)
+    if etag:
+        headers['ETag'] = etag
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            for header, value in headers.items():
+                not_modified[header] = value
+            return not_modified
+
+    # Receipts pre-rendered by the render_receipt job are served as stored.
+    pdf = await sync_to_async(read_stored_receipt_pdf)(receipt)
+    if pdf is None:
+        # Signature of one of the property's landlords
+        landlord_profile = await signature_profile(property_id).afirst()
+        receipt.landlord_signature = landlord_profile.signature if landlord_profile else None
+
+        render_pdf = sync_to_async(render_receipt_pdf, thread_sensitive=False, executor=pdf_executor())
+        pdf = await render_pdf(receipt, base_url=request.build_absolute_uri())
+        await sync_to_async(store_receipt_pdf)(receipt, pdf)
+        headers['ETag'] = receipt_etag(receipt.pdf_path)
+
+    response = HttpResponse(pdf, content_type='application/pdf', headers=headers)
+    response['Content-Disposition'] = f'attachment; filename="receipt_{receipt.receipt_number}.pdf"'
+    return response
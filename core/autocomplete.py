@@ -0,0 +1,49 @@
+"""
+Prefix lookups behind the tenant and room pickers of RoomTenantForm.
+
+A prefix is matched as the range ``prefix <= column < prefix + U+10FFFF``
+rather than with ``LIKE 'prefix%'``: SQLite only uses an index for LIKE on
+NOCASE columns, while a range is an ordinary b-tree seek on every backend.
+Ranges are case-sensitive, so the query is also tried lower-cased and
+title-cased, which covers how names and usernames are typed in practice.
+"""
+from django.db.models import Q
+
+from .forms import available_tenants, tenant_label
+from .models import Room
+
+LIMIT = 20
+TENANT_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+def prefix_q(field, query):
+    q = Q()
+    for variant in {query, query.lower(), query.title()}:
+        q |= Q(**{f'{field}__gte': variant, f'{field}__lt': variant + '\U0010ffff'})
+    return q
+
+
+def tenant_choices(query):
+    """
+    Unassigned tenants whose username, first or last name or email starts
+    with ``query``, as ``{'id', 'text'}`` dicts.
+    """
+    tenants = available_tenants()
+    if query:
+        match = Q()
+        for field in TENANT_FIELDS:
+            match |= prefix_q(field, query)
+        tenants = tenants.filter(match)
+    tenants = tenants.only(*TENANT_FIELDS).order_by('username')[:LIMIT]
+    return [{'id': user.pk, 'text': tenant_label(user)} for user in tenants]
+
+
+def room_choices(property_id, query):
+    """
+    Vacant rooms of the property whose number starts with ``query``.
+    """
+    rooms = Room.objects.filter(property_id=property_id, status='vacant')
+    if query:
+        rooms = rooms.filter(prefix_q('room_number', query))
+    rooms = rooms.values_list('id', 'room_number').order_by('room_number')[:LIMIT]
+    return [{'id': pk, 'text': f'Room {room_number}'} for pk, room_number in rooms]
@@ -1,9 +1,19 @@
 from allauth.account.forms import SignupForm
 from django import forms
+from django.core.exceptions import ValidationError
 from django.db.models import Q
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import PasswordChangeForm
+from django.urls import reverse
 from .models import Room, RoomTenant, Payment, AddOn
+from .rooms import MAX_BATCH, parse_room_numbers
+
+
+def available_tenants():
+    """
+    Non-staff users without an active room assignment.
+    """
+    return User.objects.filter(is_staff=False).exclude(room_assignments__status='active')
 
 
 class TenantSignupForm(SignupForm):
@@ -26,44 +36,150 @@ class RoomForm(forms.ModelForm):
             'capacity': forms.NumberInput(attrs={'class': 'form-control'}),
         }
 
+    def clean_room_number(self):
+        # The (property, room_number) constraint is not validated by the
+        # form because ``property`` is not one of its fields.
+        room_number = self.cleaned_data['room_number']
+        rooms = Room.objects.filter(property_id=self.instance.property_id, room_number=room_number)
+        if rooms.exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError('A room with this number already exists in this property.')
+        return room_number
+
+
+class RoomBatchForm(forms.Form):
+    """
+    Rooms to create in ``property`` from a numbering pattern.
+    """
+    pattern = forms.CharField(
+        label='Room numbers',
+        help_text=f'Numbers and ranges separated by commas, e.g. 101-140, 201-240 (up to {MAX_BATCH} rooms).',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': '101-140'}),
+    )
+    capacity = forms.IntegerField(
+        min_value=1, initial=4, widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+
+    def __init__(self, *args, property=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.property = property
+
+    def clean_pattern(self):
+        try:
+            numbers = parse_room_numbers(self.cleaned_data['pattern'])
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+        taken = list(
+            Room.objects.filter(property=self.property, room_number__in=numbers)
+            .order_by('room_number').values_list('room_number', flat=True)[:11]
+        )
+        if taken:
+            listed = ', '.join(taken[:10]) + (', ...' if len(taken) > 10 else '')
+            raise forms.ValidationError(f'These rooms already exist in this property: {listed}')
+        return numbers
+
+
+class RoomCapacityForm(forms.Form):
+    """
+    A capacity for a selection of the property's rooms.
+    """
+    rooms = forms.ModelMultipleChoiceField(queryset=Room.objects.none())
+    capacity = forms.IntegerField(min_value=1)
+
+    def __init__(self, *args, property=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['rooms'].queryset = Room.objects.filter(property=property)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        rooms, capacity = cleaned_data.get('rooms'), cleaned_data.get('capacity')
+        if rooms and capacity:
+            crowded = [room.room_number for room in rooms if room.current_occupants > capacity]
+            if crowded:
+                raise forms.ValidationError(
+                    f'These rooms have more occupants than {capacity}: {", ".join(crowded)}'
+                )
+        return cleaned_data
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    A ``<select>`` that embeds only the selected option; static/js/autocomplete.js
+    fetches the others from the JSON endpoint ``url`` as the landlord types.
+    """
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse(self.url)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if v not in ('', None)]
+        options = [self.create_option(name, '', self.choices.field.empty_label or '', not selected, 0)]
+        if selected:
+            # One primary-key lookup instead of iterating the whole queryset.
+            try:
+                chosen = list(self.choices.queryset.filter(pk__in=selected))
+            except (TypeError, ValueError, ValidationError):
+                chosen = []
+            for index, obj in enumerate(chosen, start=1):
+                option_value = self.choices.choice(obj)[0]
+                label = self.choices.field.label_from_instance(obj)
+                options.append(self.create_option(name, option_value, label, True, index))
+        return [(None, options, 0)]
+
+
+def tenant_label(user):
+    name = user.get_full_name()
+    return f'{name} ({user.username})' if name else user.username
+
+
+class TenantChoiceField(forms.ModelChoiceField):
+    def label_from_instance(self, obj):
+        return tenant_label(obj)
+
 
 class RoomTenantForm(forms.ModelForm):
-    tenant = forms.ModelChoiceField(
-        queryset=User.objects.filter(is_staff=False).order_by('first_name', 'last_name', 'username'),
+    tenant = TenantChoiceField(
+        queryset=User.objects.none(),
         required=True,
         label='Tenant',
-        widget=forms.Select(attrs={'class': 'form-select'})
+        widget=AutocompleteSelect('tenant_autocomplete', attrs={'class': 'form-select'})
     )
     room = forms.ModelChoiceField(
-        queryset=Room.objects.all().order_by('room_number'),
+        queryset=Room.objects.none(),
         required=True,
         label='Room',
         help_text='Select a room for this tenant. You can move the tenant to a different room.',
-        widget=forms.Select(attrs={'class': 'form-select'})
+        widget=AutocompleteSelect('room_autocomplete', attrs={'class': 'form-select'})
     )
 
     class Meta:
         model = RoomTenant
         fields = ['tenant', 'room', 'move_in_date']
         widgets = {
-            'tenant': forms.Select(attrs={'class': 'form-select'}),
-            'room': forms.Select(attrs={'class': 'form-select'}),
             'move_in_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
         }
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, property=None, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filter rooms to show only available ones (not full) or the current room
+        # The querysets only validate the submitted ids and label the selected
+        # option; the choices themselves come from the autocomplete endpoints.
+        tenants = available_tenants()
+        available_rooms = Room.objects.filter(status='vacant')
         if self.instance and self.instance.pk:
-            # When editing, include the current room even if it's full
-            current_room = self.instance.room
-            available_rooms = Room.objects.filter(
-                Q(status='vacant') | Q(id=current_room.id)
-            ).order_by('room_number')
-        else:
-            # When adding, only show available rooms
-            available_rooms = Room.objects.filter(status='vacant').order_by('room_number')
-        
+            # When editing, keep the current tenant and room even though the
+            # tenant is assigned and the room may be full
+            tenants = User.objects.filter(Q(pk__in=tenants.values('pk')) | Q(pk=self.instance.tenant_id))
+            available_rooms = Room.objects.filter(Q(status='vacant') | Q(id=self.instance.room_id))
+        if property is not None:
+            # Tenants can only be placed in rooms of the landlord's property
+            available_rooms = available_rooms.filter(property=property)
+
+        self.fields['tenant'].queryset = tenants
         self.fields['room'].queryset = available_rooms
 
 
@@ -0,0 +1,107 @@
+"""
+Landlord signature images.
+
+Uploads are normalized once: rotated upright, downscaled, stripped of
+metadata and re-encoded as an optimized PNG named after its content hash.
+Receipts embed a small derivative per target width, rendered on first use,
+kept in media storage and cached as a ``data:`` URI.
+"""
+import base64
+import hashlib
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+SIGNATURE_MAX_SIZE = (1200, 600)
+DERIVED_DIR = 'signatures/derived'
+
+
+def _clean(image):
+    """
+    Upright copy in a PNG-friendly mode with no EXIF, ICC or text chunks.
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode == 'P' or 'transparency' in image.info:
+        image = image.convert('RGBA')
+    elif image.mode not in ('1', 'L', 'LA', 'RGB', 'RGBA'):
+        image = image.convert('RGB')
+    image.info = {}
+    return image
+
+
+def _encode_png(image):
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def normalize_signature(upload):
+    """
+    Re-encode an uploaded signature as a PNG no larger than
+    SIGNATURE_MAX_SIZE. Raises ValidationError for anything Pillow cannot
+    decode.
+    """
+    try:
+        with Image.open(upload) as image:
+            image = _clean(image)
+            image.thumbnail(SIGNATURE_MAX_SIZE, Image.LANCZOS)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ValidationError('Upload a valid image file (PNG, JPEG, WebP or GIF).')
+    data = _encode_png(image)
+    return ContentFile(data, name=f'signature-{hashlib.sha256(data).hexdigest()[:12]}.png')
+
+
+def derivative_name(name, width):
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return f'{DERIVED_DIR}/{stem}-w{width}.png'
+
+
+def signature_derivative(name, width):
+    """
+    Storage name of signature ``name`` scaled down to ``width`` pixels,
+    rendering it on first use. Smaller images are never upscaled.
+    """
+    derived = derivative_name(name, width)
+    if not default_storage.exists(derived):
+        with default_storage.open(name, 'rb') as fh, Image.open(fh) as image:
+            image = _clean(image)
+            image.thumbnail((width, image.height), Image.LANCZOS)
+        default_storage.save(derived, ContentFile(_encode_png(image)))
+    return derived
+
+
+def signature_data_uri(name, width=None):
+    """
+    The signature as a ``data:`` URI at ``width`` (default
+    RENTRIX_SIGNATURE_RECEIPT_WIDTH) for embedding in receipts, or None if
+    the file is missing or unreadable.
+    """
+    width = width or settings.RENTRIX_SIGNATURE_RECEIPT_WIDTH
+    key = f'signature:{name}:{width}'
+    uri = cache.get(key)
+    if uri is None:
+        try:
+            with default_storage.open(signature_derivative(name, width), 'rb') as fh:
+                uri = 'data:image/png;base64,' + base64.b64encode(fh.read()).decode()
+        except (FileNotFoundError, UnidentifiedImageError, OSError):
+            return None
+        cache.set(key, uri, None)
+    return uri
+
+
+def delete_signature(name):
+    """
+    Remove a replaced signature and every derivative rendered from it.
+    """
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    if default_storage.exists(DERIVED_DIR):
+        for filename in default_storage.listdir(DERIVED_DIR)[1]:
+            if filename.startswith(f'{stem}-w'):
+                default_storage.delete(f'{DERIVED_DIR}/{filename}')
+    default_storage.delete(name)
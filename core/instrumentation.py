@@ -0,0 +1,89 @@
+"""
+Lightweight per-request instrumentation.
+
+The active request's counters live in a context variable so the DB wrapper,
+the template backend and the middleware can all reach them without passing
+the request around (and without leaking between threads or async tasks).
+
+Query timing is a single ``execute_wrapper`` installed on every connection
+when it is opened. Per-request wrappers would not work under ASGI: each
+thread has its own connection objects, so a wrapper added in the event loop
+never sees the queries a sync view runs in its worker thread, while the
+context variable is carried across ``sync_to_async`` hops.
+"""
+from contextvars import ContextVar
+from time import perf_counter
+
+_current_metrics = ContextVar('rentrix_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Counters collected for a single request. Query SQL strings are kept by
+    reference only; they are sorted and formatted just for slow requests.
+    """
+    __slots__ = ('started', 'db_time', 'query_count', 'template_time', 'queries', 'sql_log')
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.db_time = 0.0
+        self.query_count = 0
+        self.template_time = 0.0
+        self.queries = []
+        self.sql_log = None  # set to a list to keep every query with its parameters
+
+    def elapsed(self):
+        return perf_counter() - self.started
+
+    def record_query(self, sql, duration, params=None, many=False, alias=None):
+        self.query_count += 1
+        self.db_time += duration
+        self.queries.append((duration, sql))
+        if self.sql_log is not None:
+            self.sql_log.append({
+                'db': alias,
+                'ms': round(duration * 1000, 3),
+                'sql': sql,
+                'params': None if many else [str(param) for param in params or ()],
+                'many': many,
+            })
+
+    def top_queries(self, limit=5):
+        slowest = sorted(self.queries, key=lambda item: item[0], reverse=True)[:limit]
+        return [{'ms': round(duration * 1000, 2), 'sql': sql} for duration, sql in slowest]
+
+
+def current_metrics():
+    return _current_metrics.get()
+
+
+def activate(metrics):
+    return _current_metrics.set(metrics)
+
+
+def deactivate(token):
+    _current_metrics.reset(token)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` hook that adds each query's duration to the active
+    request's metrics. Outside a request it only costs the context lookup.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, perf_counter() - start, params, many, context['connection'].alias)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver that puts ``time_query`` on every new
+    connection, outermost so it includes any other wrapper's overhead.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
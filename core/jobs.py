@@ -0,0 +1,287 @@
+"""
+Background jobs stored in the application database: no broker, and jobs
+enqueued inside a transaction only become visible when it commits.
+
+Declare work with ``@task`` and queue it with ``some_task.enqueue(...)``;
+``manage.py run_workers`` claims and runs due jobs, retrying failures with
+exponential backoff.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('core.jobs')
+
+_registry = {}
+
+
+class Task:
+    """
+    A registered job function. Keyword arguments must be JSON-serializable.
+    """
+
+    def __init__(self, func, name, priority, max_attempts, retry_backoff):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, priority=None, dedupe_key=None, delay=None, **kwargs):
+        """
+        Queue a run of this task. With ``dedupe_key``, nothing is added when a
+        job with that key is already queued (the queued one will see the
+        latest data when it runs) and ``None`` is returned.
+        """
+        job = Job(
+            task=self.name,
+            kwargs=kwargs,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            dedupe_key=dedupe_key,
+            run_after=timezone.now() + timedelta(seconds=delay or 0),
+        )
+        if settings.RENTRIX_JOBS_EAGER:
+            transaction.on_commit(lambda: self.func(**kwargs))
+            return None
+        if dedupe_key is None:
+            job.save()
+            return job
+        Job.objects.bulk_create([job], ignore_conflicts=True)
+        return None
+
+    def enqueue_many(self, calls, priority=None):
+        """
+        Queue one run per ``(kwargs, dedupe_key)`` pair in a single INSERT;
+        keys already queued are skipped as with ``enqueue``.
+        """
+        calls = list(calls)
+        if settings.RENTRIX_JOBS_EAGER:
+            for kwargs, _ in calls:
+                transaction.on_commit(lambda kwargs=kwargs: self.func(**kwargs))
+            return
+        now = timezone.now()
+        Job.objects.bulk_create([
+            Job(
+                task=self.name, kwargs=kwargs, priority=self.priority if priority is None else priority,
+                max_attempts=self.max_attempts, dedupe_key=dedupe_key, run_after=now,
+            )
+            for kwargs, dedupe_key in calls
+        ], ignore_conflicts=True)
+
+
+def task(name=None, priority=0, max_attempts=3, retry_backoff=30):
+    """
+    Register a function as a background task. ``retry_backoff`` is the delay
+    in seconds before the first retry; it doubles with every attempt.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        _registry[task_name] = Task(func, task_name, priority, max_attempts, retry_backoff)
+        return _registry[task_name]
+    return decorator
+
+
+def get_task(name):
+    if name not in _registry:
+        # Importing the defining module registers its tasks.
+        import_module(name.rsplit('.', 1)[0])
+    return _registry[name]
+
+
+def recover_stale_jobs():
+    """
+    Requeue jobs whose worker died mid-run (locked for longer than
+    RENTRIX_JOB_LOCK_TIMEOUT seconds).
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.RENTRIX_JOB_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    queued_keys = Job.objects.filter(status=Job.QUEUED, dedupe_key__isnull=False).values('dedupe_key')
+    superseded = stale.filter(dedupe_key__in=queued_keys).update(
+        status=Job.FAILED, last_error='Lock expired; superseded by a queued duplicate.', finished_at=timezone.now(),
+    )
+    return superseded + stale.update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def claim(worker_id):
+    """
+    Take the most urgent due job, or return None. Claiming is a conditional
+    UPDATE, so concurrent workers never run the same job, on any backend.
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by('-priority', 'run_after', 'id')
+        .values_list('id', flat=True)[:5]
+    )
+    for job_id in candidates:
+        claimed = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def execute(job):
+    """
+    Run a claimed job and record the outcome. Returns True on success.
+    """
+    try:
+        get_task(job.task)(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Job %s (%s) failed on attempt %s', job.pk, job.task, job.attempts, exc_info=True)
+        _record_failure(job, error)
+        return False
+    _finish(job.id, status=Job.DONE, finished_at=timezone.now(), last_error='')
+    return True
+
+
+def _finish(job_id, attempts=5, **fields):
+    """
+    Record a job's outcome, retrying briefly while SQLite reports the table
+    locked: losing it would run a job that already succeeded a second time.
+    IntegrityError is left to the caller.
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return Job.objects.filter(id=job_id).update(**fields)
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+
+def _record_failure(job, error):
+    failed = {'status': Job.FAILED, 'last_error': error, 'finished_at': timezone.now()}
+    if job.attempts >= job.max_attempts:
+        _finish(job.id, **failed)
+        return
+    backoff = _registry[job.task].retry_backoff * 2 ** (job.attempts - 1) if job.task in _registry else 60
+    try:
+        _finish(
+            job.id, status=Job.QUEUED, last_error=error, locked_by='', locked_at=None,
+            run_after=timezone.now() + timedelta(seconds=backoff),
+        )
+    except IntegrityError:
+        # An identical job was queued meanwhile; it will do the work.
+        _finish(job.id, **failed)
+
+
+def run_pending(worker_id=None):
+    """
+    Run due jobs in the calling thread until none are left; returns how many
+    ran. Used by ``run_workers --burst`` and the tests.
+    """
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+    count = 0
+    while (job := claim(worker_id)) is not None:
+        execute(job)
+        count += 1
+    return count
+
+
+def prune_jobs(older_than_days=None):
+    """
+    Delete finished jobs older than RENTRIX_JOB_RETENTION_DAYS.
+    """
+    days = settings.RENTRIX_JOB_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    return Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=cutoff).delete()[0]
+
+
+class Worker:
+    """
+    Pool of threads in one process, each claiming and running jobs until
+    ``stop`` is set. ``burst`` workers exit once the queue is empty. Stale
+    jobs are requeued on start and then every ``recovery_interval`` seconds
+    (a quarter of RENTRIX_JOB_LOCK_TIMEOUT by default).
+    """
+
+    def __init__(self, threads=4, poll_interval=1.0, burst=False, recovery_interval=None):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.recovery_interval = (
+            settings.RENTRIX_JOB_LOCK_TIMEOUT / 4 if recovery_interval is None else recovery_interval
+        )
+        self.stop = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._next_recovery = 0.0
+
+    def recover_if_due(self):
+        """
+        Run ``recover_stale_jobs`` when the recovery interval has passed; one
+        thread does it while the others carry on. Returns how many jobs it
+        changed, or None when it was not due.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_recovery:
+                return None
+            self._next_recovery = now + self.recovery_interval
+        return recover_stale_jobs()
+
+    def run(self):
+        pool = [
+            threading.Thread(target=self._loop, name=f'rentrix-worker-{n}', daemon=True)
+            for n in range(self.threads)
+        ]
+        for thread in pool:
+            thread.start()
+        try:
+            for thread in pool:
+                thread.join()
+        except KeyboardInterrupt:
+            # Let every thread finish the job it holds before exiting.
+            self.stop.set()
+            for thread in pool:
+                thread.join()
+        return self.processed
+
+    def _loop(self):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    self.recover_if_due()
+                    job = claim(worker_id)
+                except OperationalError:
+                    # Another writer holds the lock; try again shortly.
+                    logger.warning('Could not recover or claim a job', exc_info=True)
+                    self.stop.wait(self.poll_interval)
+                    continue
+                if job is None:
+                    if self.burst:
+                        return
+                    self.stop.wait(self.poll_interval)
+                    continue
+                try:
+                    execute(job)
+                except OperationalError:
+                    # The outcome could not be recorded; recover_if_due
+                    # requeues the job once its lock expires.
+                    logger.error('Could not record the outcome of job %s', job.pk, exc_info=True)
+                with self._lock:
+                    self.processed += 1
+        finally:
+            close_old_connections()
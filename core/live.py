@@ -0,0 +1,117 @@
+"""
+Live updates for open landlord pages.
+
+Model signals append small ``LiveEvent`` rows after each commit; the
+``live_events`` stream polls the table and forwards new rows as server-sent
+events, so pages patch the changed badges instead of reloading the grid.
+"""
+import asyncio
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LiveEvent, Room
+
+
+def room_payload(room):
+    return {
+        'id': room.id,
+        'room_number': room.room_number,
+        'capacity': room.capacity,
+        'current_occupants': room.current_occupants,
+        'status': room.status,
+    }
+
+
+def payment_payload(payment, deleted=False):
+    return {
+        'id': payment.id,
+        'tenant': payment.tenant_id,
+        'room': payment.room_id,
+        'year': payment.payment_month.year,
+        'month': payment.payment_month.month,
+        'status': 'deleted' if deleted else payment.status,
+    }
+
+
+def publish(kind, events):
+    """
+    Queue ``(object_id, property_id, payload)`` triples of one kind, written
+    in one insert once the surrounding transaction commits (rolled back
+    changes are never announced).
+    """
+    rows = [
+        LiveEvent(kind=kind, object_id=object_id, property_id=property_id, payload=payload)
+        for object_id, property_id, payload in events
+    ]
+    if rows:
+        transaction.on_commit(lambda: LiveEvent.objects.bulk_create(rows))
+
+
+def publish_rooms(rooms):
+    publish('room', [(room.id, room.property_id, room_payload(room)) for room in rooms])
+
+
+def publish_payments(payments, deleted=False):
+    payments = list(payments)
+    if not payments:
+        return
+    properties = dict(
+        Room.objects.filter(id__in={payment.room_id for payment in payments}).values_list('id', 'property_id')
+    )
+    publish('payment', [
+        (payment.id, properties.get(payment.room_id), payment_payload(payment, deleted)) for payment in payments
+    ])
+
+
+def prune_live_events():
+    """
+    Delete events older than RENTRIX_LIVE_EVENT_RETENTION_MINUTES; streams
+    only ever resume a few seconds back.
+    """
+    cutoff = timezone.now() - timedelta(minutes=settings.RENTRIX_LIVE_EVENT_RETENTION_MINUTES)
+    return LiveEvent.objects.filter(created_at__lt=cutoff).delete()[0]
+
+
+def format_event(event):
+    data = json.dumps(event.payload, separators=(',', ':'))
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {data}\n\n"
+
+
+async def event_stream(property_id, last_id=None, since=None):
+    """
+    Yield server-sent events for property ``property_id`` after event id
+    ``last_id`` (or created at or after ``since``), polling every
+    RENTRIX_LIVE_POLL_SECONDS. The stream
+    ends after RENTRIX_LIVE_STREAM_SECONDS; browsers reconnect on their own
+    and resume from the ``Last-Event-ID`` they saw.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.RENTRIX_LIVE_STREAM_SECONDS
+    next_keepalive = loop.time() + 15
+    yield f"retry: {settings.RENTRIX_LIVE_RETRY_MS}\n\n"
+
+    if last_id is None:
+        earlier = LiveEvent.objects.all() if since is None else LiveEvent.objects.filter(created_at__lt=since)
+        last_id = await earlier.order_by('-id').values_list('id', flat=True).afirst() or 0
+
+    while True:
+        events = [
+            event async for event in
+            LiveEvent.objects.filter(id__gt=last_id, property=property_id).order_by('id')[:200]
+        ]
+        for event in events:
+            last_id = event.id
+            yield format_event(event)
+        now = loop.time()
+        if now >= deadline:
+            return
+        if events:
+            next_keepalive = now + 15
+        elif now >= next_keepalive:
+            next_keepalive = now + 15
+            yield ": keepalive\n\n"
+        await asyncio.sleep(settings.RENTRIX_LIVE_POLL_SECONDS)
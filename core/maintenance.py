@@ -0,0 +1,175 @@
+"""
+Periodic housekeeping run by ``manage.py run_scheduler``.
+
+Each job returns the number of rows it touched; the scheduler times it and
+logs both to the ``core.maintenance`` logger.
+"""
+import json
+import logging
+import time
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .jobs import prune_jobs
+from .live import prune_live_events, publish_rooms
+from .models import Property, Room, RoomTenant, Tombstone
+from .occupancy import snapshot_occupancy
+from .tracking import payment_grid
+
+logger = logging.getLogger('core.maintenance')
+
+# name -> (function, default interval in seconds)
+JOBS = {}
+
+
+def periodic(seconds):
+    def decorator(func):
+        JOBS[func.__name__] = (func, seconds)
+        return func
+    return decorator
+
+
+@periodic(seconds=3600)
+def clear_expired_sessions():
+    engine = import_module(settings.SESSION_ENGINE)
+    store = engine.SessionStore
+    if hasattr(store, 'get_model_class'):
+        # Database-backed engines: delete directly to report the row count.
+        model = store.get_model_class()
+        return model.objects.filter(expire_date__lt=timezone.now()).delete()[0]
+    store.clear_expired()
+    return 0
+
+
+@periodic(seconds=3600)
+def optimize_database():
+    """
+    Refresh planner statistics: ``PRAGMA optimize`` on SQLite (cheap; only
+    re-analyzes tables whose statistics are stale), ``ANALYZE`` elsewhere.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA optimize' if connection.vendor == 'sqlite' else 'ANALYZE')
+    return 0
+
+
+@periodic(seconds=7 * 24 * 3600)
+def vacuum_database():
+    """
+    Return free pages to the OS after large deletes (pruned events, jobs).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+    return 0
+
+
+@periodic(seconds=900)
+def reconcile_occupancy():
+    """
+    Repair rooms whose stored occupancy or status disagrees with their
+    active assignments. Only drifted rooms are written.
+    """
+    active = (
+        RoomTenant.objects.filter(room=OuterRef('pk'), status='active')
+        .order_by().values('room').annotate(n=Count('id')).values('n')
+    )
+    drifted = Room.objects.annotate(actual=Coalesce(Subquery(active), 0)).filter(
+        ~Q(current_occupants=F('actual'))
+        | Q(status='full', current_occupants__lt=F('capacity'))
+        | Q(status='vacant', current_occupants__gte=F('capacity'))
+    )
+    ids = list(drifted.values_list('id', flat=True))
+    if ids:
+        rooms = Room.objects.filter(id__in=ids)
+        rooms.refresh_occupancy()
+        publish_rooms(rooms)
+    return len(ids)
+
+
+@periodic(seconds=3600)
+def record_occupancy():
+    """
+    Refresh today's occupancy snapshot; the last run of the day stands as
+    that day's record.
+    """
+    return snapshot_occupancy()
+
+
+@periodic(seconds=300)
+def warm_payment_tracking():
+    """
+    Build every property's payment tracking grid for the current year (and
+    the page's default year) so the first landlord to open it does not pay
+    for it.
+    """
+    rows = 0
+    for property_id in Property.objects.values_list('id', flat=True):
+        for year in sorted({timezone.now().year, 2025}):
+            rows += len(payment_grid(year, property_id))
+    return rows
+
+
+@periodic(seconds=600)
+def prune_expired_rows():
+    """
+    Drop live events, finished jobs and tombstones past their retention.
+    """
+    tombstone_cutoff = timezone.now() - timedelta(days=settings.RENTRIX_TOMBSTONE_RETENTION_DAYS)
+    tombstones = Tombstone.objects.filter(deleted_at__lt=tombstone_cutoff).delete()[0]
+    return prune_live_events() + prune_jobs() + tombstones
+
+
+def run_job(name):
+    """
+    Run one job and return ``(rows, seconds)``; failures are logged and
+    reported as ``(None, seconds)`` so one broken job does not stop the rest.
+    """
+    func, _ = JOBS[name]
+    start = time.perf_counter()
+    try:
+        rows = func()
+    except Exception:
+        logger.exception('Maintenance job %s failed', name)
+        rows = None
+    elapsed = time.perf_counter() - start
+    logger.info(json.dumps({'event': 'maintenance', 'job': name, 'ms': round(elapsed * 1000, 1), 'rows': rows}))
+    return rows, elapsed
+
+
+class Scheduler:
+    """
+    Runs each job every ``interval`` seconds (RENTRIX_MAINTENANCE_INTERVALS
+    overrides the defaults; 0 disables a job). Jobs run once at start-up,
+    except daily-or-rarer ones such as VACUUM, which wait a full interval so
+    restarts do not repeat them.
+    """
+
+    def __init__(self, names=None, clock=time.monotonic):
+        overrides = getattr(settings, 'RENTRIX_MAINTENANCE_INTERVALS', {})
+        self.intervals = {
+            name: overrides.get(name, seconds)
+            for name, (_, seconds) in JOBS.items()
+            if (names is None or name in names) and overrides.get(name, seconds)
+        }
+        self.clock = clock
+        self.next_run = {
+            name: clock() + (interval if interval >= 24 * 3600 else 0) for name, interval in self.intervals.items()
+        }
+
+    def run_due(self, force=False):
+        results = {}
+        for name, interval in self.intervals.items():
+            if force or self.clock() >= self.next_run[name]:
+                results[name] = run_job(name)
+                self.next_run[name] = self.clock() + interval
+        return results
+
+    def seconds_until_next(self):
+        if not self.next_run:
+            return None
+        return max(0.0, min(self.next_run.values()) - self.clock())
@@ -0,0 +1,117 @@
+import calendar
+import json
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from core.models import Payment, RoomTenant
+from core.properties import current_property
+from core.seeding import seed_rentrix
+from core.tracking import build_payment_grid
+
+from .benchmark_views import percentile
+
+ENGINES = ('django', 'jinja2')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the payment tracking, tenant list and payment list pages with their rows in the '
+        'Django template language and in Jinja2, and print per-render latency and speed-up as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--rooms', type=int, default=0,
+            help='Seed this many rooms (and their tenants and a year of payments) for the run, '
+                 'rolled back afterwards. Defaults to the data already in the database.',
+        )
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['rooms']:
+                    User.objects.create_user(username='benchmark_landlord', is_staff=True)
+                    seed_rentrix(rooms=options['rooms'], months=12, addons_per_tenant=1, prefix='BENCH')
+                report = self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def run(self, options):
+        landlord = User.objects.filter(is_staff=True, properties__isnull=False).order_by('-id').first()
+        if landlord is None:
+            raise CommandError('Need a landlord with a property; run seed_rentrix or pass --rooms.')
+        request = RequestFactory().get('/')
+        request.user = landlord
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+        property = current_property(request)
+
+        year = 2025
+        pages = {
+            'payment_tracking': ('core/payment_tracking.html', {
+                'rows': build_payment_grid(year, property.id),
+                'months': list(calendar.month_name)[1:],
+                'selected_year': year,
+                'available_years': [year],
+            }),
+            'tenant_list': ('core/tenant_list.html', {
+                'tenants': list(
+                    RoomTenant.objects.filter(room__property=property)
+                    .select_related('tenant', 'room').order_by('room__room_number', 'tenant__first_name')
+                ),
+            }),
+            'payment_list': ('core/payment_list.html', {
+                'payments': list(
+                    Payment.objects.filter(room__property=property)
+                    .select_related('tenant', 'room').order_by('-payment_date')
+                ),
+            }),
+        }
+
+        report = {'iterations': options['iterations'], 'property': property.name, 'pages': {}}
+        for name, (template_name, context) in pages.items():
+            results = {
+                engine: self.measure(template_name, context, request, engine, options['iterations'], options['warmup'])
+                for engine in ENGINES
+            }
+            results['rows'] = len(next(value for value in context.values() if isinstance(value, list)))
+            results['speedup'] = round(results['django']['p50_ms'] / max(results['jinja2']['p50_ms'], 0.001), 2)
+            report['pages'][name] = results
+        return report
+
+    def measure(self, template_name, context, request, engine, iterations, warmup):
+        with override_settings(RENTRIX_ROWS_ENGINE=engine):
+            for _ in range(warmup):
+                render_to_string(template_name, context, request)
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                html = render_to_string(template_name, context, request)
+                timings.append((time.perf_counter() - start) * 1000)
+        return {
+            'p50_ms': round(percentile(timings, 0.50), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'renders_per_s': round(1000 / percentile(timings, 0.50), 1),
+            'bytes': len(html),
+        }
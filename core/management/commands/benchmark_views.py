@@ -0,0 +1,117 @@
+import json
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.models import Receipt, RoomTenant
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Exercise the hot endpoints with the Django test client against the current '
+        'database and print p50/p95 latency and query counts as JSON. Writes are rolled '
+        'back and files go to a temporary media root, so the database and media are left as they were.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help='Only benchmark this endpoint (repeatable). Defaults to all of them.',
+        )
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                'DEBUG is on: the debug toolbar and query logging will dominate the timings.'
+            ))
+        with tempfile.TemporaryDirectory(prefix='rentrix-benchmark-') as media_root, \
+                override_settings(MEDIA_ROOT=media_root, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), \
+                transaction.atomic():
+            report = self.run_benchmarks(options)
+            transaction.set_rollback(True)
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def run_benchmarks(self, options):
+        landlord = User.objects.filter(is_staff=True).order_by('id').first()
+        receipt = Receipt.objects.select_related('payment__tenant').order_by('-id').first()
+        if landlord is None or receipt is None:
+            raise CommandError('Need at least one staff user and one receipt; run seed_rentrix first.')
+        assignment = RoomTenant.objects.filter(status='active').select_related('tenant').order_by('id').first()
+        query = assignment.tenant.last_name[:3] if assignment else receipt.room_number[:3]
+        year = receipt.payment_month.year
+
+        # The receipt's stored PDF is dropped before every request, so each
+        # one is timed rendering rather than reading the file back.
+        unstore_receipt = Receipt.objects.filter(id=receipt.id).update
+        endpoints = {
+            'payment_tracking': (landlord, reverse('payment_tracking'), {'year': year}, None),
+            'search_api': (landlord, reverse('search_api'), {'q': query}, None),
+            'tenant_list': (landlord, reverse('tenant_list'), {}, None),
+            'payment_list': (landlord, reverse('payment_list'), {}, None),
+            'download_receipt': (
+                receipt.payment.tenant, reverse('download_receipt', args=[receipt.id]), {},
+                lambda: unstore_receipt(pdf_path=''),
+            ),
+            'landlord_dashboard': (landlord, reverse('landlord_dashboard'), {}, None),
+        }
+
+        report = {'iterations': options['iterations'], 'endpoints': {}}
+        for name, (user, url, params, reset) in endpoints.items():
+            if options['endpoints'] and name not in options['endpoints']:
+                continue
+            report['endpoints'][name] = self.measure(
+                user, url, params, options['iterations'], options['warmup'], reset,
+            )
+        return report
+
+    def measure(self, user, url, params, iterations, warmup, reset=None):
+        """
+        Time ``iterations`` GETs of ``url`` after ``warmup`` untimed ones.
+        ``reset`` runs before each request, outside the timing and query count.
+        """
+        client = Client()
+        client.force_login(user)
+        timings, queries = [], 0
+        try:
+            with transaction.atomic():  # a failing endpoint rolls back alone
+                for n in range(warmup + iterations):
+                    if reset:
+                        reset()
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        response = client.get(url, params)
+                        elapsed = (time.perf_counter() - start) * 1000
+                    if n >= warmup:
+                        timings.append(elapsed)
+                        queries += len(ctx.captured_queries)
+        except Exception as exc:
+            return {'error': f'{type(exc).__name__}: {exc}'}
+        return {
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 0.50), 1),
+            'p95_ms': round(percentile(timings, 0.95), 1),
+            'queries': queries // iterations,
+            'bytes': len(response.content),
+        }
@@ -0,0 +1,51 @@
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.statements import generate_statements, statement_tenants
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every tenant's annual statement PDF into media storage, "
+        'spreading the renders over a pool of worker processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Statement year. Defaults to last year.')
+        parser.add_argument(
+            '--tenant', action='append', dest='tenants',
+            help='Only this tenant username (repeatable). Defaults to everyone who paid that year.',
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            help='Worker processes (default RENTRIX_STATEMENT_WORKERS, else one per CPU); 0 renders in this process.',
+        )
+
+    def handle(self, *args, **options):
+        year = options['year'] or date.today().year - 1
+        if options['tenants']:
+            tenants = dict(User.objects.filter(username__in=options['tenants']).values_list('username', 'id'))
+            missing = sorted(set(options['tenants']) - set(tenants))
+            if missing:
+                raise CommandError(f"Unknown tenant(s): {', '.join(missing)}")
+            tenant_ids = sorted(tenants.values())
+        else:
+            tenant_ids = statement_tenants(year)
+
+        def report(tenant_id, name, error):
+            if error:
+                self.stderr.write(f'tenant {tenant_id}: {error}')
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'tenant {tenant_id}: {name}')
+
+        start = time.perf_counter()
+        names, failed = generate_statements(year, tenant_ids, workers=options['workers'], on_done=report)
+        self.stdout.write(
+            f'{year}: {len(names)} statement(s) written, {len(failed)} failed '
+            f'in {time.perf_counter() - start:.1f}s.'
+        )
+        if failed:
+            raise CommandError(f'{len(failed)} statement(s) failed to render.')
@@ -0,0 +1,43 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.maintenance import JOBS, Scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the periodic maintenance jobs (expired sessions, database statistics, occupancy '
+        'reconciliation, cache warming, pruning) in-process on their schedules.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job', action='append', dest='jobs', choices=sorted(JOBS),
+            help='Only run this job (repeatable). Defaults to all of them.',
+        )
+        parser.add_argument('--once', action='store_true', help='Run the selected jobs once and exit.')
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler(names=options['jobs'])
+        if not scheduler.intervals:
+            raise CommandError('No jobs enabled.')
+
+        if options['once']:
+            for name, (rows, elapsed) in scheduler.run_due(force=True).items():
+                status = 'failed' if rows is None else f'{rows} rows'
+                self.stdout.write(f'{name:<24} {elapsed * 1000:9.1f} ms  {status}')
+            return
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        self.stdout.write(f"Scheduling: {', '.join(sorted(scheduler.intervals))}")
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                scheduler.run_due()
+                stop.wait(scheduler.seconds_until_next())
+        except KeyboardInterrupt:
+            pass
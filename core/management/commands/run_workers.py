@@ -0,0 +1,62 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.jobs import Worker
+
+
+def _run_worker_process(threads, poll_interval, burst):
+    worker = Worker(threads=threads, poll_interval=poll_interval, burst=burst)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stop.set())
+    signal.signal(signal.SIGINT, lambda *args: worker.stop.set())
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue with a pool of worker processes and threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.RENTRIX_WORKER_PROCESSES)
+        parser.add_argument('--threads', type=int, default=settings.RENTRIX_WORKER_THREADS,
+                            help='Threads per process.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds an idle thread waits before checking the queue again.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty instead of waiting for new jobs.')
+
+    def handle(self, *args, **options):
+        processes, threads = options['processes'], options['threads']
+        if processes < 1 or threads < 1:
+            raise CommandError('--processes and --threads must be at least 1.')
+        self.stdout.write(f'Starting {processes} worker process(es) with {threads} thread(s) each.')
+
+        if processes == 1:
+            worker = Worker(threads=threads, poll_interval=options['poll_interval'], burst=options['burst'])
+            signal.signal(signal.SIGTERM, lambda *args: worker.stop.set())
+            processed = worker.run()
+            self.stdout.write(f'Processed {processed} job(s).')
+            return
+
+        # Forked children must not share the parent's database connections.
+        connections.close_all()
+        children = [
+            multiprocessing.Process(
+                target=_run_worker_process,
+                args=(threads, options['poll_interval'], options['burst']),
+                name=f'rentrix-worker-{n}',
+            )
+            for n in range(processes)
+        ]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+            for child in children:
+                child.join()
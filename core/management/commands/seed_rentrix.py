@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Property
+from core.seeding import seed_rentrix
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic RENTRIX dataset (rooms, tenants, payments) with bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=1000)
+        parser.add_argument('--tenants', type=int, default=5000, help='Active tenants, spread evenly over the rooms.')
+        parser.add_argument('--archived-per-room', type=int, default=0)
+        parser.add_argument('--years', type=int, default=10, help='Years of monthly payments per tenant.')
+        parser.add_argument('--addons-per-tenant', type=int, default=1)
+        parser.add_argument('--start-year', type=int, default=2016)
+        parser.add_argument('--prefix', default='S', help='Room number prefix, to keep seeded rooms apart.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--property', help='Name of the property to seed (created if missing; default "Main Property").')
+
+    def handle(self, *args, **options):
+        rooms = options['rooms']
+        tenants_per_room = max(options['tenants'] // max(rooms, 1), 1)
+        started = time.perf_counter()
+        with transaction.atomic():
+            property = None
+            if options['property']:
+                property, _ = Property.objects.get_or_create(name=options['property'])
+            counts = seed_rentrix(
+                rooms=rooms,
+                tenants_per_room=tenants_per_room,
+                archived_per_room=options['archived_per_room'],
+                months=options['years'] * 12,
+                addons_per_tenant=options['addons_per_tenant'],
+                start_year=options['start_year'],
+                prefix=options['prefix'],
+                batch_size=options['batch_size'],
+                property=property,
+            )
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary} in {elapsed:.1f}s.'))
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.reminders import current_period, due_reminders, send_reminders
+
+
+class Command(BaseCommand):
+    help = 'Email a rent reminder to every active tenant with no payment recorded for the period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Rent period as YYYY-MM. Defaults to the current month.')
+        parser.add_argument('--batch-size', type=int, help='Messages per batch (RENTRIX_REMINDER_BATCH_SIZE).')
+        parser.add_argument('--delay', type=float, help='Seconds between batches (RENTRIX_REMINDER_BATCH_DELAY).')
+        parser.add_argument('--dry-run', action='store_true', help='List the recipients without sending.')
+
+    def handle(self, *args, **options):
+        if options['period']:
+            try:
+                period = datetime.strptime(options['period'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--period must look like 2025-03.')
+        else:
+            period = current_period()
+
+        if options['dry_run']:
+            for assignment in due_reminders(period):
+                self.stdout.write(f'{assignment.tenant.email}\tRoom {assignment.room.room_number}')
+
+        summary = send_reminders(
+            period, batch_size=options['batch_size'], delay=options['delay'], dry_run=options['dry_run'],
+        )
+        self.stdout.write(
+            f"{summary['period']}: {summary['due']} due, {summary['sent']} sent in {summary['batches']} batch(es)."
+        )
@@ -0,0 +1,154 @@
+"""
+Serving uploaded media (signatures, stored receipt PDFs) in production.
+
+Files are permission-checked, answered with ETag/Last-Modified validators
+and single byte ranges, and either streamed with ``FileResponse`` (which
+lets the WSGI server use ``sendfile``) or handed to the front-end server
+with ``X-Accel-Redirect`` (nginx) / ``X-Sendfile`` (Apache, lighttpd) when
+RENTRIX_MEDIA_OFFLOAD is set.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import LandlordProfile, Receipt, Statement
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def can_access(user, name):
+    """
+    Landlords may read the stored PDFs of their properties' receipts and of
+    statements for tenants assigned there, and the signatures of landlords
+    they share a property with. Tenants only the PDFs of their own receipts
+    and statements.
+    """
+    if name.startswith('receipts/'):
+        owner = Q(payment__room__property__landlords=user) if user.is_staff else Q(payment__tenant=user)
+        return Receipt.objects.filter(owner, pdf_path=name).exists()
+    if name.startswith('statements/'):
+        owner = Q(tenant__room_assignments__room__property__landlords=user) if user.is_staff else Q(tenant=user)
+        return Statement.objects.filter(owner, pdf_path=name).exists()
+    if name.startswith('signatures/') and user.is_staff:
+        colleagues = Q(user=user) | Q(user__properties__landlords=user)
+        return (
+            LandlordProfile.objects.filter(colleagues, signature=name).exists()
+            or Receipt.objects.filter(landlord_signature=name, payment__room__property__landlords=user).exists()
+        )
+    return False
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` inclusive for a single ``bytes=`` range, None to serve
+    the whole file (absent, malformed or multi-range headers), or ``False``
+    when the range lies beyond the end of the file.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return False
+    if end < start:
+        return None
+    return start, end
+
+
+def read_range(fh, start, length):
+    fh.seek(start)
+    try:
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def offload(response, name, full_path):
+    mode = settings.RENTRIX_MEDIA_OFFLOAD
+    if mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.RENTRIX_MEDIA_ACCEL_PREFIX + quote(name)
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = full_path
+    return response
+
+
+def media_response(request, name):
+    """
+    Response for media file ``name`` (relative to MEDIA_ROOT) after the
+    caller has checked access.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    size = stat.st_size
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{size:x}')
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': f'private, max-age={settings.RENTRIX_MEDIA_MAX_AGE}',
+        'Accept-Ranges': 'bytes',
+    }
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            not_modified[header] = headers[header]
+        return not_modified
+
+    if settings.RENTRIX_MEDIA_OFFLOAD:
+        # The front-end server handles ranges and the body itself.
+        return offload(HttpResponse(content_type=content_type, headers=headers), name, full_path)
+
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range.strip() != etag:
+        byte_range = None
+    if byte_range is False:
+        headers['Content-Range'] = f'bytes */{size}'
+        return HttpResponse(status=416, headers=headers)
+
+    if request.method == 'HEAD':
+        headers['Content-Length'] = str(size)
+        return HttpResponse(content_type=content_type, headers=headers)
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_range(open(full_path, 'rb'), start, length), status=206, content_type=content_type,
+        )
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        headers['Content-Length'] = str(length)
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,243 @@
+"""
+Prometheus-style metrics shared across worker processes.
+
+Each process appends its samples to its own memory-mapped file in
+``RENTRIX_METRICS_DIR``; the ``/metrics`` endpoint sums every file, so any
+gunicorn worker can answer a scrape with totals for the whole server.
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+
+_INITIAL_SIZE = 1024 * 64
+_HEADER = struct.Struct('i')
+_KEY_LENGTH = struct.Struct('i')
+_VALUE = struct.Struct('d')
+
+
+class MmapedDict:
+    """
+    Append-only ``str -> float`` map stored in a memory-mapped file.
+
+    Layout: a 4-byte "used bytes" header padded to 8, followed by entries of
+    ``<int key length><utf-8 key padded to 8><double value>``. Values are
+    updated in place, so a reader only ever sees complete entries.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._positions = {}
+        self._used = _HEADER.unpack_from(self._map, 0)[0]
+        if self._used == 0:
+            self._used = 8
+            _HEADER.pack_into(self._map, 0, self._used)
+        else:
+            for key, _, position in _read_entries(self._map, self._used):
+                self._positions[key] = position
+
+    def increment(self, key, amount):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._append(key)
+        value = _VALUE.unpack_from(self._map, position)[0]
+        _VALUE.pack_into(self._map, position, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode('utf-8')
+        padded_length = len(encoded) + (-(len(encoded) + 4) % 8)
+        entry_size = 4 + padded_length + 8
+        while self._used + entry_size > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        offset = self._used
+        _KEY_LENGTH.pack_into(self._map, offset, len(encoded))
+        self._map[offset + 4:offset + 4 + len(encoded)] = encoded
+        position = offset + 4 + padded_length
+        _VALUE.pack_into(self._map, position, 0.0)
+        self._used += entry_size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+
+def _read_entries(data, used):
+    offset = 8
+    while offset < used:
+        key_length = _KEY_LENGTH.unpack_from(data, offset)[0]
+        key = bytes(data[offset + 4:offset + 4 + key_length]).decode('utf-8')
+        position = offset + 4 + key_length + (-(key_length + 4) % 8)
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        offset = position + 8
+
+
+def read_file(filename):
+    with open(filename, 'rb') as fh:
+        data = fh.read()
+    if len(data) < 8:
+        return []
+    used = _HEADER.unpack_from(data, 0)[0]
+    return [(key, value) for key, value, _ in _read_entries(data, used)]
+
+
+def metrics_dir():
+    path = settings.RENTRIX_METRICS_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class _ProcessStore:
+    """
+    Lazily opens this process's file; reopens after a fork so preloaded
+    gunicorn workers never share the master's mapping.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._dict = None
+
+    def increment(self, key, amount):
+        with self._lock:
+            pid = os.getpid()
+            if self._pid != pid:
+                filename = os.path.join(metrics_dir(), f'metrics_{pid}.db')
+                self._dict = MmapedDict(filename)
+                self._pid = pid
+            self._dict.increment(key, amount)
+
+
+_store = _ProcessStore()
+_registry = []
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + parts + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _key(self, suffix, labels, extra=()):
+        label_items = [(name, labels[name]) for name in self.labelnames] + list(extra)
+        return json.dumps([self.name, self.name + suffix, label_items])
+
+    def _enabled(self):
+        return getattr(settings, 'RENTRIX_METRICS_ENABLED', True)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if self._enabled():
+            _store.increment(self._key('_total', labels), amount)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        if not self._enabled():
+            return
+        # Buckets are stored cumulatively so exposition is a plain sum; empty
+        # buckets are still written so every series exposes all bounds.
+        for bound in self.buckets:
+            _store.increment(self._key('_bucket', labels, [('le', _format_value(bound))]), int(value <= bound))
+        _store.increment(self._key('_sum', labels), value)
+        _store.increment(self._key('_count', labels), 1)
+
+
+def collect():
+    """
+    Sum every process file and return the Prometheus text exposition.
+    """
+    totals = {}
+    for filename in glob.glob(os.path.join(metrics_dir(), 'metrics_*.db')):
+        for key, value in read_file(filename):
+            totals[key] = totals.get(key, 0.0) + value
+
+    samples = {}
+    for key, value in totals.items():
+        family, sample_name, label_items = json.loads(key)
+        samples.setdefault(family, []).append((sample_name, label_items, value))
+
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for sample_name, label_items, value in sorted(samples.get(metric.name, []), key=_sample_order):
+            lines.append(f'{sample_name}{_format_labels(label_items)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _sample_order(sample):
+    # Group samples per label set: buckets by bound, then _sum, then _count.
+    sample_name, label_items, _ = sample
+    if sample_name.endswith('_bucket'):
+        return (label_items[:-1], 0, float(label_items[-1][1].replace('+Inf', 'inf')))
+    return (label_items, 1 if sample_name.endswith('_sum') else 2, 0.0)
+
+
+REQUEST_LATENCY = Histogram(
+    'rentrix_request_duration_seconds',
+    'Request latency by URL name.',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    labelnames=('view',),
+)
+REQUEST_QUERIES = Histogram(
+    'rentrix_request_db_queries',
+    'Database queries issued per request by URL name.',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250),
+    labelnames=('view',),
+)
+REQUEST_ERRORS = Counter(
+    'rentrix_request_errors',
+    'Requests answered with a 5xx status by URL name.',
+    labelnames=('view',),
+)
+RECEIPT_RENDER_SECONDS = Histogram(
+    'rentrix_receipt_render_seconds',
+    'WeasyPrint render time for download_receipt.',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+RECEIPT_PDF_BYTES = Histogram(
+    'rentrix_receipt_pdf_bytes',
+    'Size of PDFs produced by download_receipt.',
+    buckets=(10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000),
+)
@@ -1,37 +1,252 @@
+import json
+import logging
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import redirect
 from django.urls import resolve, Resolver404
 
+from .instrumentation import RequestMetrics, activate, current_metrics, deactivate
+from .metrics import REQUEST_ERRORS, REQUEST_LATENCY, REQUEST_QUERIES
+from .models import TenantSecurityProfile
+from .profiling import StackSampler, save_profile
+from .ratelimit import check_limits
+
+request_logger = logging.getLogger("core.requests")
+
 
-class ForcePasswordChangeMiddleware:
+class AsyncCapableMiddleware:
     """
-    Redirect authenticated tenants who still need to change their password
-    to the password change page, unless they are already on an allowed path.
+    Base for middleware that runs natively in both WSGI and ASGI stacks, so
+    async views are not pushed through a thread just to pass through us.
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        """
+        Sync path. Subclasses override this and ``__acall__``; the defaults
+        pass the request straight through.
+        """
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class ForcePasswordChangeMiddleware(AsyncCapableMiddleware):
+    """
+    Redirect authenticated tenants who still need to change their password
+    to the password change page, unless they are already on an allowed path.
+    """
+
+    allowed = {
+        "force_password_change",
+        "account_logout",
+        "account_reset_password",
+        "account_reset_password_done",
+        "account_reset_password_from_key",
+        "account_reset_password_from_key_done",
+    }
+
+    def handle(self, request):
         user = getattr(request, "user", None)
         if user and user.is_authenticated and not user.is_staff:
             profile = getattr(user, "security_profile", None)
             if profile and profile.force_password_change:
-                try:
-                    match = resolve(request.path_info)
-                    allowed = {
-                        "force_password_change",
-                        "account_logout",
-                        "account_reset_password",
-                        "account_reset_password_done",
-                        "account_reset_password_from_key",
-                        "account_reset_password_from_key_done",
-                    }
-                    if match.url_name not in allowed:
-                        return redirect("force_password_change")
-                except Resolver404:
-                    # If resolver fails, continue; auth check will apply on next requests.
-                    pass
+                response = self.redirect_if_not_allowed(request)
+                if response is not None:
+                    return response
 
         return self.get_response(request)
 
+    async def __acall__(self, request):
+        user = await request.auser()
+        if user.is_authenticated and not user.is_staff:
+            must_change = await TenantSecurityProfile.objects.filter(
+                user=user, force_password_change=True
+            ).aexists()
+            if must_change:
+                response = self.redirect_if_not_allowed(request)
+                if response is not None:
+                    return response
+
+        return await self.get_response(request)
+
+    def redirect_if_not_allowed(self, request):
+        try:
+            match = resolve(request.path_info)
+            if match.url_name not in self.allowed:
+                return redirect("force_password_change")
+        except Resolver404:
+            # If resolver fails, continue; auth check will apply on next requests.
+            pass
+        return None
+
+
+class RateLimitMiddleware(AsyncCapableMiddleware):
+    """
+    Enforce the ``@ratelimit`` limits of the resolved view. Sits ahead of
+    the session and auth middleware so rejected requests never reach the
+    database.
+    """
+
+    def handle(self, request):
+        return self.check(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.check(request) or await self.get_response(request)
+
+    def check(self, request):
+        try:
+            view = resolve(request.path_info).func
+        except Resolver404:
+            return None
+        return check_limits(request, getattr(view, "ratelimits", ()))
+
+
+class RequestTimingMiddleware(AsyncCapableMiddleware):
+    """
+    Record wall time, DB query count/time and template render time for each
+    request, expose them in a ``Server-Timing`` header and log slow requests
+    together with their slowest queries.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.slow_request_ms = getattr(settings, "RENTRIX_SLOW_REQUEST_MS", 500)
+        self.top_queries = getattr(settings, "RENTRIX_SLOW_REQUEST_TOP_QUERIES", 5)
+
+    def handle(self, request):
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            deactivate(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = activate(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            deactivate(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total_ms = metrics.elapsed() * 1000
+        self.observe(request, response, metrics)
+        response["Server-Timing"] = (
+            f"app;dur={total_ms:.1f}, "
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.query_count} queries", '
+            f"tpl;dur={metrics.template_time * 1000:.1f}"
+        )
+        if total_ms >= self.slow_request_ms:
+            self.log_slow_request(request, response, metrics, total_ms)
+        return response
+
+    def observe(self, request, response, metrics):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unresolved"
+        REQUEST_LATENCY.observe(metrics.elapsed(), view=view)
+        REQUEST_QUERIES.observe(metrics.query_count, view=view)
+        if response.status_code >= 500:
+            REQUEST_ERRORS.inc(view=view)
+
+    def log_slow_request(self, request, response, metrics, total_ms):
+        match = getattr(request, "resolver_match", None)
+        payload = {
+            "event": "slow_request",
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "db_ms": round(metrics.db_time * 1000, 1),
+            "queries": metrics.query_count,
+            "template_ms": round(metrics.template_time * 1000, 1),
+            "top_queries": metrics.top_queries(self.top_queries),
+        }
+        request_logger.warning(json.dumps(payload, default=str))
+
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """
+    Profile a single request for staff users who add ``?_profile=1`` or an
+    ``X-Rentrix-Profile: 1`` header. The collapsed stacks and SQL log are
+    saved to RENTRIX_PROFILE_DIR; ``?_profile=collapsed`` or ``?_profile=sql``
+    returns them instead of the page. Untriggered requests only pay for the
+    two dictionary lookups.
+
+    Under ASGI the view may run on any thread, so every busy thread is
+    sampled; concurrent requests can show up in the stacks.
+    """
+
+    def handle(self, request):
+        mode = self.requested_mode(request)
+        if not mode or not request.user.is_staff:
+            return self.get_response(request)
+
+        metrics, token = self.start_sql_log()
+        try:
+            with StackSampler(threading.get_ident(), settings.RENTRIX_PROFILE_INTERVAL) as sampler:
+                response = self.get_response(request)
+        finally:
+            if token is not None:
+                deactivate(token)
+        return self.finish(request, response, mode, sampler, metrics.sql_log)
+
+    async def __acall__(self, request):
+        mode = self.requested_mode(request)
+        if not mode or not (await request.auser()).is_staff:
+            return await self.get_response(request)
+
+        metrics, token = self.start_sql_log()
+        try:
+            with StackSampler(None, settings.RENTRIX_PROFILE_INTERVAL) as sampler:
+                response = await self.get_response(request)
+        finally:
+            if token is not None:
+                deactivate(token)
+        return self.finish(request, response, mode, sampler, metrics.sql_log)
+
+    @staticmethod
+    def requested_mode(request):
+        return request.GET.get("_profile") or request.META.get("HTTP_X_RENTRIX_PROFILE")
+
+    @staticmethod
+    def start_sql_log():
+        # Reuse the timing middleware's metrics when it is installed.
+        metrics = current_metrics()
+        token = None
+        if metrics is None:
+            metrics = RequestMetrics()
+            token = activate(metrics)
+        metrics.sql_log = []
+        return metrics, token
+
+    def finish(self, request, response, mode, sampler, sql_log):
+        match = getattr(request, "resolver_match", None)
+        name = match.url_name if match and match.url_name else "unresolved"
+        base = save_profile(name, sampler, sql_log)
 
+        if mode == "collapsed":
+            response = HttpResponse(sampler.collapsed(), content_type="text/plain; charset=utf-8")
+        elif mode == "sql":
+            response = JsonResponse(sql_log, safe=False)
+        response["X-Rentrix-Profile"] = base
+        return response
@@ -0,0 +1,70 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def assign_existing_rooms(apps, schema_editor):
+    """
+    Put existing rooms in one property run by every existing landlord.
+    """
+    Property = apps.get_model('core', 'Property')
+    Room = apps.get_model('core', 'Room')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    staff = list(User.objects.filter(is_staff=True).values_list('id', flat=True))
+    if not staff and not Room.objects.exists():
+        return
+    main = Property.objects.create(name='Main Property')
+    main.landlords.add(*staff)
+    Room.objects.update(property=main)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_rent_reminders'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Property',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('address', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('landlords', models.ManyToManyField(blank=True, related_name='properties', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'properties',
+            },
+        ),
+        migrations.AddField(
+            model_name='liveevent',
+            name='property',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.property'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='property',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rooms', to='core.property'),
+        ),
+        migrations.RunPython(assign_existing_rooms, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='room',
+            name='property',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rooms', to='core.property'),
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='room_number',
+            field=models.CharField(max_length=10),
+        ),
+        migrations.AddConstraint(
+            model_name='room',
+            constraint=models.UniqueConstraint(fields=('property', 'room_number'), name='core_room_unique_number'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_properties'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='payment_month',
+            field=models.DateField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+# auth.User belongs to django.contrib.auth, so its extra indexes for the
+# tenant autocomplete (core.autocomplete) are created here with plain SQL.
+INDEXES = {
+    'core_user_first_name': 'first_name',
+    'core_user_last_name': 'last_name',
+    'core_user_email': 'email',
+}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0011_payment_month_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=f'CREATE INDEX {name} ON auth_user ({column})',
+            reverse_sql=f'DROP INDEX {name}',
+        )
+        for name, column in INDEXES.items()
+    ]
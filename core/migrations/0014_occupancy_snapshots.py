@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-19 02:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_statements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('occupants', models.PositiveSmallIntegerField()),
+                ('capacity', models.PositiveSmallIntegerField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_snapshots', to='core.room')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='occupancysnapshot',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='core_occupancy_one_per_day'),
+        ),
+    ]
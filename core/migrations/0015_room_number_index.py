@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_occupancy_snapshots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='room_number',
+            field=models.CharField(db_index=True, max_length=10),
+        ),
+    ]
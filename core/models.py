@@ -1,16 +1,76 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+# Monthly rent before add-ons
+BASE_RENT = Decimal('1350.00')
+
+class RoomQuerySet(models.QuerySet):
+    def refresh_occupancy(self):
+        """
+        Recompute current_occupants and status for every room in the queryset
+        with two UPDATE statements instead of a save() per room.
+        """
+        active_count = (
+            RoomTenant.objects.filter(room=models.OuterRef('pk'), status='active')
+            .order_by()
+            .values('room')
+            .annotate(count=models.Count('pk'))
+            .values('count')
+        )
+        self.update(current_occupants=Coalesce(models.Subquery(active_count), 0), updated_at=timezone.now())
+        return self.refresh_status()
+
+    def refresh_status(self):
+        """
+        Set status from current_occupants and capacity for every room in the
+        queryset in one UPDATE ... CASE.
+        """
+        return self.update(status=models.Case(
+            models.When(current_occupants__gte=models.F('capacity'), then=models.Value('full')),
+            default=models.Value('vacant'),
+        ))
+
+
+class Property(models.Model):
+    """
+    A boarding house. Every room belongs to one property, and landlords
+    only see the properties they are members of.
+    """
+    name = models.CharField(max_length=100)
+    address = models.CharField(max_length=255, blank=True)
+    landlords = models.ManyToManyField(User, related_name='properties', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'properties'
+
+    def __str__(self):
+        return self.name
+
+
 class Room(models.Model):
-    room_number = models.CharField(max_length=10, unique=True)
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='rooms')
+    room_number = models.CharField(max_length=10, db_index=True)  # admin search across properties
     capacity = models.IntegerField(default=4)
     current_occupants = models.IntegerField(default=0)
     status = models.CharField(max_length=10, choices=[('vacant', 'Vacant'), ('full', 'Full')], default='vacant')
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = RoomQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also the index behind each property's room list, in room order.
+            models.UniqueConstraint(fields=['property', 'room_number'], name='core_room_unique_number'),
+        ]
 
     def __str__(self):
         return f"Room {self.room_number}"
@@ -28,7 +88,7 @@ class RoomTenant(models.Model):
     move_in_date = models.DateField(default=timezone.now)
     status = models.CharField(max_length=10, choices=[('active', 'Active'), ('inactive', 'Inactive')], default='active')
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ['room', 'tenant']
@@ -40,12 +100,12 @@ class Payment(models.Model):
     tenant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payments')
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='payments')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
-    payment_month = models.DateField()
+    payment_month = models.DateField(db_index=True)
     payment_date = models.DateField(default=timezone.now)
     status = models.CharField(max_length=10, choices=[('paid', 'Paid'), ('unpaid', 'Unpaid')], default='unpaid')
     receipt_number = models.CharField(max_length=20, unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     year = models.IntegerField(default=2025)  # Default year is 2025
 
     def __str__(self):
@@ -69,6 +129,7 @@ class Receipt(models.Model):
     landlord_signature = models.ImageField(upload_to='signatures/', null=True, blank=True)
     generated_date = models.DateTimeField(auto_now_add=True)
     pdf_path = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Receipt {self.receipt_number}"
@@ -87,7 +148,7 @@ class AddOn(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.description} - {self.amount} for {self.room_tenant.tenant.get_full_name()}"
@@ -96,6 +157,126 @@ class AddOn(models.Model):
         ordering = ['-created_at']
 
 
+class Tombstone(models.Model):
+    """
+    Record of a deleted row, so delta-sync clients can drop it locally.
+    """
+    model = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class LiveEvent(models.Model):
+    """
+    Change notification for open pages, written by model signals and read by
+    the live event stream. Stored in the database so every worker process
+    sees every change.
+    """
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} at {self.created_at:%Y-%m-%d %H:%M:%S}"
+
+
+class Job(models.Model):
+    """
+    Background task queued in the database and run by ``manage.py run_workers``.
+    Higher ``priority`` runs first. At most one queued job may hold a given
+    ``dedupe_key``, so repeated requests for the same work collapse.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    task = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    dedupe_key = models.CharField(max_length=200, null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', '-priority', 'run_after'], name='core_job_claim_idx')]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'], condition=models.Q(status='queued'), name='core_job_unique_queued_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class RentReminder(models.Model):
+    """
+    One row per tenant and rent period reminded, so reminder runs can be
+    repeated without sending twice.
+    """
+    tenant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rent_reminders')
+    period = models.DateField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    sent_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['tenant', 'period'], name='core_rentreminder_once_per_period')]
+
+    def __str__(self):
+        return f"Reminder to {self.tenant} for {self.period:%B %Y}"
+
+
+class OccupancySnapshot(models.Model):
+    """
+    A room's occupancy on one day, written by the ``snapshot_occupancy``
+    maintenance job so past occupancy can be charted.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='occupancy_snapshots')
+    date = models.DateField()
+    occupants = models.PositiveSmallIntegerField()
+    capacity = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # Also the index behind each room's date-range scans.
+            models.UniqueConstraint(fields=['room', 'date'], name='core_occupancy_one_per_day'),
+        ]
+
+    def __str__(self):
+        return f"Room {self.room_id} on {self.date}: {self.occupants}/{self.capacity}"
+
+
+class Statement(models.Model):
+    """
+    A tenant's stored annual statement PDF, written by ``manage.py
+    generate_statements`` and served from media storage.
+    """
+    tenant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statements')
+    year = models.IntegerField()
+    pdf_path = models.CharField(max_length=255)
+    generated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['tenant', 'year'], name='core_statement_unique_year')]
+
+    def __str__(self):
+        return f"{self.year} statement for {self.tenant}"
+
+
 class TenantSecurityProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='security_profile')
     force_password_change = models.BooleanField(default=True)
@@ -0,0 +1,85 @@
+"""
+Occupancy history: one OccupancySnapshot row per room per day, and daily,
+weekly or monthly series aggregated from them in the database.
+
+Bucketing happens in the GROUP BY. On SQLite it uses the built-in ``date()``
+function, because Django's ``Trunc`` calls back into Python for every row.
+That keeps a chart of several years of snapshots to one indexed query.
+"""
+from datetime import date
+
+from django.db.models import Count, DateField, F, Func, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import OccupancySnapshot, Room
+
+INTERVALS = ('day', 'week', 'month')
+SQLITE_MODIFIERS = {'week': "'weekday 0', '-6 days'", 'month': "'start of month'"}
+
+
+class PeriodStart(Func):
+    """
+    The Monday of the week, or the first of the month, containing a date.
+    """
+    output_field = DateField()
+
+    def __init__(self, expression, interval):
+        super().__init__(expression)
+        self.interval = interval
+
+    def as_sql(self, compiler, connection, **extra_context):
+        trunc = Trunc(self.source_expressions[0], self.interval, output_field=DateField())
+        return compiler.compile(trunc)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f'date({sql}, {SQLITE_MODIFIERS[self.interval]})', params
+
+
+def snapshot_occupancy(day=None):
+    """
+    Record every room's current occupancy for ``day`` (default today) in one
+    upsert; running it again the same day refreshes that day's rows.
+    """
+    day = day or timezone.localdate()
+    snapshots = [
+        OccupancySnapshot(room_id=room_id, date=day, occupants=occupants, capacity=capacity)
+        for room_id, occupants, capacity in Room.objects.values_list('id', 'current_occupants', 'capacity')
+    ]
+    OccupancySnapshot.objects.bulk_create(
+        snapshots, batch_size=1000, update_conflicts=True,
+        unique_fields=['room', 'date'], update_fields=['occupants', 'capacity'],
+    )
+    return len(snapshots)
+
+
+def occupancy_series(snapshots, interval='month', start=None, end=None):
+    """
+    ``snapshots`` summed per day, then averaged over each ``interval``
+    starting on or after ``start`` and up to ``end``. Returns
+    ``{'period', 'days', 'occupants', 'capacity', 'rate'}`` dicts, where
+    occupants and capacity are daily averages.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f'interval must be one of {", ".join(INTERVALS)}.')
+    if start:
+        snapshots = snapshots.filter(date__gte=start)
+    if end:
+        snapshots = snapshots.filter(date__lte=end)
+    period = F('date') if interval == 'day' else PeriodStart('date', interval)
+    rows = (
+        snapshots.annotate(period=period).values('period')
+        .annotate(days=Count('date', distinct=True), occupants=Sum('occupants'), capacity=Sum('capacity'))
+        .order_by('period')
+    )
+    return [
+        {
+            'period': row['period'].isoformat() if isinstance(row['period'], date) else row['period'],
+            'days': row['days'],
+            'occupants': round(row['occupants'] / row['days'], 2),
+            'capacity': round(row['capacity'] / row['days'], 2),
+            'rate': round(row['occupants'] / row['capacity'], 4) if row['capacity'] else 0.0,
+        }
+        for row in rows
+    ]
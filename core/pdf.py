@@ -0,0 +1,56 @@
+import secrets
+from time import perf_counter
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .images import signature_data_uri
+from .metrics import RECEIPT_PDF_BYTES, RECEIPT_RENDER_SECONDS
+from .models import Receipt
+
+
+def render_receipt_pdf(receipt, base_url):
+    """
+    Render a receipt to PDF bytes and record render time and output size.
+    """
+    # WeasyPrint loads Pango/Cairo on import; only pay for it when rendering.
+    from weasyprint import HTML
+
+    signature = getattr(receipt, 'landlord_signature', None)
+    html_string = render_to_string('core/receipt_template.html', {
+        'receipt': receipt,
+        'signature_src': signature_data_uri(signature.name) if signature else None,
+    })
+    start = perf_counter()
+    pdf = HTML(string=html_string, base_url=base_url).write_pdf()
+    RECEIPT_RENDER_SECONDS.observe(perf_counter() - start)
+    RECEIPT_PDF_BYTES.observe(len(pdf))
+    return pdf
+
+
+def store_receipt_pdf(receipt, pdf):
+    """
+    Save rendered PDF bytes to media storage and record the path on the
+    receipt. The random suffix keeps stored receipts from being guessable.
+    """
+    if receipt.pdf_path:
+        default_storage.delete(receipt.pdf_path)
+    name = default_storage.save(f'receipts/{receipt.receipt_number}-{secrets.token_hex(8)}.pdf', ContentFile(pdf))
+    Receipt.objects.filter(id=receipt.id).update(pdf_path=name, updated_at=timezone.now())
+    receipt.pdf_path = name
+    return name
+
+
+def read_stored_receipt_pdf(receipt):
+    """
+    Bytes of the receipt's stored PDF, or None if it has none (or it is gone).
+    """
+    if not receipt.pdf_path:
+        return None
+    try:
+        with default_storage.open(receipt.pdf_path, 'rb') as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,89 @@
+"""
+On-demand profiling of a single request: a sampling profiler that produces
+flamegraph-compatible collapsed stacks, plus the request's SQL log.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+
+class StackSampler:
+    """
+    Sample one thread's Python stack at a fixed interval from a background
+    thread. Counts are keyed by the collapsed stack (root first, frames
+    joined with ``;``), which is what flamegraph.pl and speedscope read.
+
+    With ``thread_id=None`` every busy thread is sampled instead, each stack
+    rooted at its thread name. That is how async requests are profiled: the
+    view and its ``sync_to_async`` work may run on any thread.
+    """
+
+    IDLE_MODULES = ('threading', 'selectors', 'queue', 'concurrent.futures.thread', 'asyncio.base_events')
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rentrix-profiler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self.counts[self._collapse(frame)] += 1
+            else:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in frames.items():
+                    if ident == self._thread.ident or self._idle(frame):
+                        continue
+                    self.counts[f"{names.get(ident, ident)};{self._collapse(frame)}"] += 1
+            time.sleep(self.interval)
+
+    @classmethod
+    def _idle(cls, frame):
+        return frame.f_globals.get('__name__', '').startswith(cls.IDLE_MODULES)
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            module = frame.f_globals.get('__name__', '?')
+            names.append(f'{module}:{code.co_qualname}'.replace(';', ':'))
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+def save_profile(name, sampler, sql_log):
+    """
+    Write ``<name>.folded`` and ``<name>.sql.json`` to RENTRIX_PROFILE_DIR
+    and return the base name.
+    """
+    directory = settings.RENTRIX_PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    base = f"{timezone.now():%Y%m%dT%H%M%S}-{name}-{os.getpid()}"
+    with open(os.path.join(directory, f'{base}.folded'), 'w') as fh:
+        fh.write(sampler.collapsed())
+    with open(os.path.join(directory, f'{base}.sql.json'), 'w') as fh:
+        json.dump(sql_log, fh, indent=2)
+    return base
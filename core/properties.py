@@ -0,0 +1,72 @@
+"""
+Which property a request works in.
+
+Landlords pick one of the properties they are members of (kept in the
+session, defaulting to the first by name); every landlord query then
+filters on the indexed ``room.property_id``. A landlord who belongs to none
+(a fresh install, or one added after the first migration) is given an
+empty property of their own. Tenants see the property of their active
+assignment.
+"""
+from django.db import transaction
+from django.http import Http404
+
+from .models import LandlordProfile, Property
+
+SESSION_KEY = 'property_id'
+
+
+def current_property(request):
+    """
+    The landlord's selected property, also stored on ``request.property``
+    (with all their properties on ``request.properties`` for the switcher).
+    One query per request, plus creating the landlord's own property the
+    first time they have none.
+    """
+    if getattr(request, 'property', None) is None:
+        properties = list(Property.objects.filter(landlords=request.user).order_by('name', 'id'))
+        if not properties:
+            properties = [create_own_property(request.user)]
+        selected = request.session.get(SESSION_KEY)
+        request.properties = properties
+        request.property = next((p for p in properties if p.id == selected), properties[0])
+    return request.property
+
+
+def create_own_property(user):
+    """
+    An empty property with ``user`` as its only landlord, renamed or shared
+    with other landlords in the admin.
+    """
+    with transaction.atomic():
+        property = Property.objects.create(name=f"{user.get_full_name() or user.get_username()}'s property")
+        property.landlords.add(user)
+    return property
+
+
+def tenant_properties(user):
+    """
+    Subquery of the properties where ``user`` has an active assignment.
+    """
+    return Property.objects.filter(rooms__tenants__tenant=user, rooms__tenants__status='active').values('id')
+
+
+def select_property(request, property_id):
+    """
+    Switch the landlord to ``property_id`` if they are a member of it.
+    """
+    if not Property.objects.filter(id=property_id, landlords=request.user).exists():
+        raise Http404
+    request.session[SESSION_KEY] = int(property_id)
+    request.property = None
+
+
+def signature_profile(property_id):
+    """
+    Queryset for the signature to print on a property's receipts: the first
+    of its landlords who has uploaded one.
+    """
+    return (
+        LandlordProfile.objects.filter(user__properties=property_id)
+        .exclude(signature='').order_by('id')
+    )
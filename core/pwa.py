@@ -0,0 +1,130 @@
+"""
+Offline support for tenants on poor connections: the web app manifest, the
+service worker, a compact JSON copy of the tenant's payments, and the
+validators that let the service worker revalidate all of it cheaply.
+
+The tenant pages and the JSON use ``tenant_version`` (see core.summary) as
+their ETag, which answers a revalidation with a 304 before the page is
+built. Receipts are validated by their stored PDF, whose name changes on
+every render.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from .summary import tenant_version
+
+# Cached by the service worker on install and revalidated in the background.
+SHELL = (
+    'css/bootstrap.min.css',
+    'css/style.css',
+    'css/forms.css',
+    'js/bootstrap.bundle.min.js',
+    'img/icon-192.png',
+    'img/icon-512.png',
+)
+# Cached network-first, so they still open offline.
+PAGES = ('tenant_dashboard', 'tenant_payment_tracker', 'payment_history')
+
+
+def digest(*parts):
+    return hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:20]
+
+
+def tenant_etag(request, *args, **kwargs):
+    """
+    ETag of a tenant page. None (no conditional handling) for staff, and
+    while flash messages are waiting to be shown.
+    """
+    user = request.user
+    if not user.is_authenticated or user.is_staff or len(get_messages(request)):
+        return None
+    request.tenant_version = tenant_version(user)
+    return request.tenant_version
+
+
+def tenant_revalidated(view):
+    """
+    Answer a tenant page with a 304 when the tenant's data is unchanged, and
+    let browsers keep it only if they revalidate it on every use.
+    """
+    conditional = condition(etag_func=tenant_etag)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = conditional(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapper
+
+
+def receipt_etag(pdf_path):
+    """
+    Validator for a receipt download, or None until its PDF is stored.
+    """
+    return quote_etag(digest(pdf_path)) if pdf_path else None
+
+
+def tenant_payments(user, summary):
+    """
+    The compact JSON the service worker keeps: the tenant's room and one
+    row per payment, newest month first, from their summary.
+    """
+    return {
+        'tenant': user.pk,
+        'room': summary['room'].room_number if summary['room'] else None,
+        'fields': ['month', 'status', 'amount', 'receipt_number', 'receipt', 'receipt_etag'],
+        'payments': [
+            [
+                p['payment_month'].strftime('%Y-%m'), p['status'], str(p['amount']), p['receipt_number'],
+                p['receipt_id'], receipt_etag(p['receipt_pdf_path']),
+            ]
+            for p in summary['payments']
+        ],
+    }
+
+
+def revalidated_response(request, content, content_type):
+    """
+    ``content`` with an ETag of its own, and a 304 when the client has it.
+    """
+    etag = quote_etag(digest(content))
+    response = HttpResponse(content, content_type=content_type, headers={'ETag': etag})
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def manifest():
+    return {
+        'name': 'RENTRIX',
+        'short_name': 'RENTRIX',
+        'start_url': reverse('tenant_dashboard'),
+        'scope': '/',
+        'display': 'standalone',
+        'background_color': '#ffffff',
+        'theme_color': '#ff8800',
+        'icons': [
+            {'src': static(f'img/icon-{size}.png'), 'sizes': f'{size}x{size}', 'type': 'image/png'}
+            for size in (192, 512)
+        ],
+    }
+
+
+def service_worker_context():
+    return {
+        'version': settings.RENTRIX_PWA_VERSION,
+        'shell': [static(name) for name in SHELL] + [reverse('web_manifest')],
+        'pages': [reverse(name) for name in PAGES],
+        'data_url': reverse('tenant_payments_data'),
+        'receipt_url': reverse('download_receipt', args=[0]),
+        'logout_url': reverse('account_logout'),
+    }
@@ -0,0 +1,136 @@
+"""
+Token-bucket rate limiting kept in the shared cache.
+
+Each scope has a rate in RENTRIX_RATELIMITS such as ``'30/10s'``: a bucket
+of 30 tokens refilled at 30 per 10 seconds, so short bursts pass and a
+sustained flood is held to the rate. Views declare limits with
+``@ratelimit``; RateLimitMiddleware answers 429 before any database query
+or password hash, since the check must stay cheaper than the work it
+protects.
+"""
+import hashlib
+import math
+import re
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    ``'30/10s'`` -> ``(30, 10.0)``: bucket capacity and seconds to refill it.
+    """
+    match = RATE_RE.match(rate.replace(' ', ''))
+    if match is None:
+        raise ValueError(f'Invalid rate {rate!r}; expected e.g. "30/10s" or "5/m".')
+    count, multiplier, unit = match.groups()
+    return int(count), float(int(multiplier or 1) * UNITS[unit])
+
+
+def client_ip(request):
+    """
+    The client's address. Behind proxies listed in RENTRIX_TRUSTED_PROXIES
+    it is the right-most X-Forwarded-For entry that is not one of them, so
+    addresses a client prepends itself are never used.
+    """
+    remote = request.META.get('REMOTE_ADDR', '')
+    trusted = settings.RENTRIX_TRUSTED_PROXIES
+    if remote not in trusted:
+        return remote
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    for ip in reversed(forwarded):
+        if ip not in trusted:
+            return ip
+    return forwarded[0] if forwarded else remote
+
+
+def known_session(session_key):
+    """
+    Whether ``session_key`` names a stored session. Cache-backed engines
+    answer from the session cache, without a database query.
+    """
+    store = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    if store.session_key is None:
+        return False
+    if hasattr(store, 'cache_key_prefix'):
+        return caches[settings.SESSION_CACHE_ALIAS].get(store.cache_key_prefix + store.session_key) is not None
+    return store.exists(store.session_key)
+
+
+def session_or_ip(request):
+    """
+    The session cookie identifies a logged-in user without loading the user
+    from the database. A cookie that names no stored session is ignored, so
+    a client cannot get a fresh bucket by sending a new one each time;
+    such clients, and anonymous ones, fall back to their address.
+    """
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key and known_session(session_key):
+        return f'session:{session_key}'
+    return client_ip(request)
+
+
+IDENTITIES = {'ip': client_ip, 'user': session_or_ip}
+
+
+def consume(scope, identity, now=None):
+    """
+    Take one token from ``identity``'s bucket in ``scope``. Returns 0 when
+    allowed, otherwise the seconds until a token is available.
+
+    The read-modify-write is not atomic across processes; a race can let a
+    request or two through, which is acceptable for load shedding.
+    """
+    capacity, period = parse_rate(settings.RENTRIX_RATELIMITS[scope])
+    now = time.time() if now is None else now
+    cache = caches[settings.RENTRIX_RATELIMIT_CACHE]
+    key = f'ratelimit:{scope}:{hashlib.md5(identity.encode()).hexdigest()}'
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens < 1:
+        return (1 - tokens) * period / capacity
+    cache.set(key, (tokens - 1, now), math.ceil(period))
+    return 0
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse('Too many requests. Please slow down.', status=429, content_type='text/plain')
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def ratelimit(scope, key='user', methods=None):
+    """
+    Declare a limit on a view, enforced by RateLimitMiddleware before the
+    session and user are loaded. ``key`` is ``'user'`` (session cookie,
+    else IP), ``'ip'``, or a callable returning the identity (or a falsy
+    value to skip); ``methods`` restricts the limit to those HTTP methods.
+    """
+    identify = IDENTITIES[key] if isinstance(key, str) else key
+
+    def decorator(view):
+        view.ratelimits = (*getattr(view, 'ratelimits', ()), (scope, identify, methods))
+        return view
+    return decorator
+
+
+def check_limits(request, limits):
+    """
+    A 429 response if any of ``limits`` is exhausted for this request.
+    """
+    if not settings.RENTRIX_RATELIMIT_ENABLED:
+        return None
+    for scope, identify, methods in limits:
+        if methods and request.method not in methods:
+            continue
+        identity = identify(request)
+        retry_after = consume(scope, identity) if identity else 0
+        if retry_after:
+            return too_many_requests(retry_after)
+    return None
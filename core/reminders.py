@@ -0,0 +1,92 @@
+"""
+Rent-due reminders: find every tenant with no recorded payment for a period
+in one query and email them in throttled batches over one SMTP connection.
+"""
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.db.models import DecimalField, Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.template.loader import get_template
+
+from .models import BASE_RENT, AddOn, Payment, RentReminder, RoomTenant
+
+
+def current_period(today=None):
+    today = today or date.today()
+    return today.replace(day=1)
+
+
+def due_reminders(period):
+    """
+    Active assignments whose tenant has an email address, moved in by the
+    end of ``period``, has no paid payment for it and was not reminded yet,
+    annotated with their add-on total. A single query.
+    """
+    next_period = date(period.year + period.month // 12, period.month % 12 + 1, 1)
+    addon_total = (
+        AddOn.objects.filter(room_tenant=OuterRef('pk'))
+        .order_by().values('room_tenant').annotate(total=Sum('amount')).values('total')
+    )
+    return (
+        RoomTenant.objects.filter(status='active', move_in_date__lt=next_period)
+        .exclude(tenant__email='')
+        .filter(
+            ~Exists(Payment.objects.filter(tenant=OuterRef('tenant'), payment_month=period, status='paid')),
+            ~Exists(RentReminder.objects.filter(tenant=OuterRef('tenant'), period=period)),
+        )
+        .annotate(addon_total=Coalesce(
+            Subquery(addon_total), Value(Decimal('0.00')), output_field=DecimalField(max_digits=10, decimal_places=2),
+        ))
+        .select_related('tenant', 'room')
+        .order_by('id')
+    )
+
+
+def send_reminders(period, batch_size=None, delay=None, dry_run=False, connection=None):
+    """
+    Email every due reminder for ``period`` and log each one in RentReminder
+    once its batch is accepted by the mail server; re-runs skip logged
+    tenants. Returns a summary dict.
+    """
+    batch_size = batch_size or settings.RENTRIX_REMINDER_BATCH_SIZE
+    delay = settings.RENTRIX_REMINDER_BATCH_DELAY if delay is None else delay
+    subject_template = get_template('core/emails/rent_reminder_subject.txt')
+    body_template = get_template('core/emails/rent_reminder.txt')
+
+    pending, seen = [], set()
+    for assignment in due_reminders(period):
+        if assignment.tenant_id in seen:
+            continue  # one reminder per tenant even with several active rooms
+        seen.add(assignment.tenant_id)
+        tenant = assignment.tenant
+        context = {
+            'name': tenant.get_full_name() or tenant.username,
+            'period': period,
+            'room_number': assignment.room.room_number,
+            'amount': BASE_RENT + assignment.addon_total,
+            'addon_total': assignment.addon_total,
+        }
+        subject = ' '.join(subject_template.render(context).split())
+        pending.append((tenant, context['amount'], (subject, body_template.render(context), None, [tenant.email])))
+
+    summary = {'period': f'{period:%Y-%m}', 'due': len(pending), 'sent': 0, 'batches': 0}
+    if dry_run or not pending:
+        return summary
+
+    connection = connection or get_connection()
+    with connection:  # one connection for every batch
+        for start in range(0, len(pending), batch_size):
+            if start:
+                time.sleep(delay)
+            batch = pending[start:start + batch_size]
+            summary['sent'] += send_mass_mail([message for _, _, message in batch], connection=connection)
+            summary['batches'] += 1
+            RentReminder.objects.bulk_create(
+                [RentReminder(tenant=tenant, period=period, amount=amount) for tenant, amount, _ in batch],
+                ignore_conflicts=True,
+            )
+    return summary
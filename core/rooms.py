@@ -0,0 +1,90 @@
+"""
+Batch room operations for landlords: provisioning rooms from a numbering
+pattern and setting the capacity of a selection of rooms.
+
+Each is one bulk write (``bulk_create`` / ``bulk_update``, batched) followed
+by a single UPDATE ... CASE that recomputes the rooms' status, so setting up
+a 200-room building costs a handful of statements rather than 200 round
+trips.
+"""
+import re
+
+from django.db import transaction
+from django.utils import timezone
+
+from .live import publish_rooms
+from .models import Room
+
+MAX_BATCH = 500
+BATCH_SIZE = 500
+RANGE_RE = re.compile(r'^([A-Za-z]*)(\d+)\s*-\s*\1?(\d+)$')
+
+
+def parse_room_numbers(pattern):
+    """
+    Room numbers from comma-separated numbers and ranges, e.g.
+    ``101-140, 201-240`` or ``A1-A12``. A range keeps the zero padding of its
+    first number (``001-010``). Raises ValueError for reversed, oversized or
+    malformed ranges (any other part with a ``-``, such as ``A1-B12``),
+    repeated numbers and numbers too long for a room.
+    """
+    max_length = Room._meta.get_field('room_number').max_length
+    numbers = []
+    for part in filter(None, (part.strip() for part in pattern.split(','))):
+        match = RANGE_RE.match(part)
+        if match is None and '-' in part:
+            raise ValueError(f'{part}: not a range; write ranges like 101-140 or A1-A12.')
+        if match is None:
+            numbers.append(part)
+        else:
+            prefix, first, last = match.groups()
+            start, end = int(first), int(last)
+            if end < start:
+                raise ValueError(f'{part}: the range ends before it starts.')
+            if end - start >= MAX_BATCH:
+                raise ValueError(f'{part}: at most {MAX_BATCH} rooms can be created at once.')
+            numbers.extend(f'{prefix}{n:0{len(first)}d}' for n in range(start, end + 1))
+        if len(numbers) > MAX_BATCH:
+            raise ValueError(f'At most {MAX_BATCH} rooms can be created at once.')
+    if not numbers:
+        raise ValueError('Enter at least one room number.')
+    too_long = [number for number in numbers if len(number) > max_length]
+    if too_long:
+        raise ValueError(f'{too_long[0]}: room numbers are at most {max_length} characters.')
+    if len(set(numbers)) != len(numbers):
+        raise ValueError('Each room number may appear only once.')
+    return numbers
+
+
+def provision_rooms(property, numbers, capacity):
+    """
+    Create vacant rooms ``numbers`` in ``property`` with ``capacity``.
+    Returns the created rooms.
+    """
+    with transaction.atomic():
+        created = Room.objects.bulk_create(
+            [Room(property=property, room_number=number, capacity=capacity) for number in numbers],
+            batch_size=BATCH_SIZE,
+        )
+        rooms = Room.objects.filter(property=property, room_number__in=numbers)
+        rooms.refresh_status()
+    publish_rooms(rooms)
+    return created
+
+
+def set_capacity(rooms, capacity):
+    """
+    Give every room in ``rooms`` the new capacity and update their status.
+    Returns how many rooms changed.
+    """
+    rooms = list(rooms)
+    now = timezone.now()
+    for room in rooms:
+        room.capacity = capacity
+        room.updated_at = now  # auto_now is not applied by bulk_update
+    with transaction.atomic():
+        Room.objects.bulk_update(rooms, ['capacity', 'updated_at'], batch_size=BATCH_SIZE)
+        updated = Room.objects.filter(id__in=[room.id for room in rooms])
+        updated.refresh_status()
+    publish_rooms(updated)
+    return len(rooms)
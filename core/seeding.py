@@ -0,0 +1,148 @@
+"""
+Synthetic data generation shared by the ``seed_rentrix`` command and the
+test suite. Rows are written with ``bulk_create`` (payments and receipts
+with set-based inserts) so large seeds take seconds instead of minutes.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import BASE_RENT, AddOn, Payment, Property, Receipt, Room, RoomTenant, TenantSecurityProfile
+
+ADDON_AMOUNT = Decimal('100.00')
+
+
+def month_start(start_year, offset):
+    return date(start_year + offset // 12, offset % 12 + 1, 1)
+
+
+def seed_rentrix(rooms, tenants_per_room=2, archived_per_room=0, months=12, addons_per_tenant=0,
+                 start_year=2025, prefix='R', password='rentrix', batch_size=1000, property=None):
+    """
+    Create ``rooms`` rooms in ``property`` (default: a "Main Property" run by
+    every staff user), each with ``tenants_per_room`` active tenants and
+    ``archived_per_room`` inactive ones. Active tenants get
+    ``addons_per_tenant`` add-ons and ``months`` consecutive paid months
+    (with receipts) starting in January of ``start_year``.
+
+    Returns a dict of row counts per model.
+    """
+    password_hash = make_password(password)  # hash once, not per tenant
+    per_room = tenants_per_room + archived_per_room
+    if property is None:
+        property, _ = Property.objects.get_or_create(name='Main Property')
+        property.landlords.add(*User.objects.filter(is_staff=True))
+
+    room_objs = Room.objects.bulk_create([
+        Room(
+            property=property,
+            room_number=f'{prefix}{i:04d}',
+            capacity=max(per_room, 1),
+            current_occupants=tenants_per_room,
+            status='full' if tenants_per_room >= max(per_room, 1) else 'vacant',
+        )
+        for i in range(rooms)
+    ], batch_size=batch_size)
+
+    users = User.objects.bulk_create([
+        User(
+            username=f'tenant_{room.room_number}_{slot}',
+            first_name=f'Tenant{slot}',
+            last_name=room.room_number,
+            email=f'{room.room_number.lower()}_{slot}@example.com',
+            password=password_hash,
+        )
+        for room in room_objs
+        for slot in range(per_room)
+    ], batch_size=batch_size)
+    # bulk_create skips the post_save signal that normally adds this profile.
+    TenantSecurityProfile.objects.bulk_create([
+        TenantSecurityProfile(user=user, force_password_change=False) for user in users
+    ], batch_size=batch_size)
+
+    assignments = RoomTenant.objects.bulk_create([
+        RoomTenant(
+            room=room_objs[index // per_room],
+            tenant=user,
+            status='active' if index % per_room < tenants_per_room else 'inactive',
+            move_in_date=date(start_year, 1, 1),
+        )
+        for index, user in enumerate(users)
+    ], batch_size=batch_size)
+    active = [assignment for assignment in assignments if assignment.status == 'active']
+
+    AddOn.objects.bulk_create([
+        AddOn(room_tenant=assignment, amount=ADDON_AMOUNT, description=f'Appliance {n + 1}')
+        for assignment in active
+        for n in range(addons_per_tenant)
+    ], batch_size=batch_size)
+
+    amount = BASE_RENT + ADDON_AMOUNT * addons_per_tenant
+    payment_count = _insert_payments(active, months, start_year, amount) if active else 0
+
+    return {
+        'rooms': len(room_objs),
+        'tenants': len(users),
+        'assignments': len(assignments),
+        'addons': len(active) * addons_per_tenant,
+        'payments': payment_count,
+        'receipts': payment_count,
+    }
+
+
+def _insert_payments(active, months, start_year, amount):
+    """
+    Insert ``months`` paid months for every assignment in ``active`` and a
+    receipt for each, as two set-based INSERT ... SELECT statements.
+
+    Payments are the bulk of a large seed (ten years x thousands of
+    tenants); building them as model instances for ``bulk_create`` would
+    dominate the run time.
+    """
+    now = timezone.now()
+    first_id, last_id = active[0].id, active[-1].id
+    last_payment_id = Payment.objects.aggregate(last=Max('id'))['last'] or 0
+    payment_table = Payment._meta.db_table
+    receipt_table = Receipt._meta.db_table
+
+    with connection.cursor() as cursor:
+        for begin in range(0, months, 120):
+            offsets = range(begin, min(begin + 120, months))
+            values = ', '.join(['(%s, %s, %s)'] * len(offsets))
+            params = [amount, now, now]
+            for offset in offsets:
+                start = month_start(start_year, offset)
+                params += [start, f'{start:%Y%m}', start.year]
+            params += [first_id, last_id]
+            cursor.execute(
+                f"""
+                INSERT INTO {payment_table}
+                    (tenant_id, room_id, amount, payment_month, payment_date, status,
+                     receipt_number, created_at, updated_at, year)
+                SELECT rt.tenant_id, rt.room_id, %s, m.column1, m.column1, 'paid',
+                       'RCPT-' || rt.tenant_id || '-' || m.column2, %s, %s, m.column3
+                FROM {RoomTenant._meta.db_table} rt CROSS JOIN (VALUES {values}) AS m
+                WHERE rt.id BETWEEN %s AND %s AND rt.status = 'active'
+                """,
+                params,
+            )
+        cursor.execute(
+            f"""
+            INSERT INTO {receipt_table}
+                (payment_id, receipt_number, tenant_name, room_number, amount,
+                 payment_month, payment_date, landlord_signature, generated_date, pdf_path, updated_at)
+            SELECT p.id, p.receipt_number, u.first_name || ' ' || u.last_name, r.room_number,
+                   p.amount, p.payment_month, p.payment_date, '', %s, '', %s
+            FROM {payment_table} p
+            JOIN {User._meta.db_table} u ON u.id = p.tenant_id
+            JOIN {Room._meta.db_table} r ON r.id = p.room_id
+            WHERE p.id > %s
+            """,
+            [now, now, last_payment_id],
+        )
+        return cursor.rowcount
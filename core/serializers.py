@@ -0,0 +1,263 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from .live import publish_payments, publish_rooms
+from .models import AddOn, Payment, Property, Receipt, Room, RoomTenant
+
+# Path from each writable related model to the landlords of its property.
+LANDLORD_PATHS = {
+    Property: 'landlords',
+    Room: 'property__landlords',
+    RoomTenant: 'room__property__landlords',
+    Payment: 'room__property__landlords',
+}
+
+
+def tenants_for(landlord):
+    """
+    Tenants ``landlord`` may write rows for: those not actively assigned to
+    a room in a property someone else manages.
+    """
+    elsewhere = RoomTenant.objects.filter(status='active').exclude(room__property__landlords=landlord)
+    return User.objects.filter(is_staff=False).exclude(room_assignments__in=elsewhere)
+
+
+class SparseFieldsetMixin:
+    """
+    Limit the serialized fields to those listed in ``?fields=a,b,c``.
+    ``id`` is always kept so clients can address the rows they receive.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request is not None else None
+        if requested:
+            keep = {name.strip() for name in requested.split(',') if name.strip()} | {'id'}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+
+class _PrefetchedRows:
+    """
+    Stand-in for a related field's queryset that answers ``get(pk=...)``
+    from rows fetched up front in a single query.
+    """
+
+    def __init__(self, model, rows):
+        self.model = model
+        self.rows = rows
+
+    def get(self, pk):
+        try:
+            return self.rows[int(pk)]
+        except KeyError:
+            raise self.model.DoesNotExist
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    ``many=True`` serializer that writes the whole list with one
+    ``bulk_create`` or ``bulk_update`` instead of a query per row.
+
+    Foreign keys are resolved with one query per field, and per-row
+    uniqueness checks are left to the database constraints (the whole batch
+    is rejected on conflict) so validation does not cost a query per row.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._prefetch_related(data)
+        return super().to_internal_value(data)
+
+    def _prefetch_related(self, data):
+        for name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                ids = set()
+                for row in data:
+                    try:
+                        ids.add(int(row[name]))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                queryset = field.get_queryset()
+                field.queryset = _PrefetchedRows(queryset.model, queryset.in_bulk(ids))
+            field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+        self.child.validators = []
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = [self.child.build_instance(attrs) for attrs in validated_data]
+        try:
+            with transaction.atomic():
+                created = model.objects.bulk_create(objs)
+        except IntegrityError as exc:
+            raise serializers.ValidationError({'non_field_errors': [str(exc)]})
+        self.child.after_bulk_write(created)
+        return created
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        fields = {'updated_at'} if any(f.name == 'updated_at' for f in model._meta.fields) else set()
+        now = timezone.now()
+        self.child.before_bulk_update(instances)
+        for instance, attrs in zip(instances, validated_data):
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+                fields.add(name)
+            self.child.prepare_update(instance, attrs, fields)
+            if 'updated_at' in fields:
+                instance.updated_at = now  # auto_now is not applied by bulk_update
+        if fields - {'updated_at'}:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_update(instances, sorted(fields), batch_size=500)
+            except IntegrityError as exc:
+                raise serializers.ValidationError({'non_field_errors': [str(exc)]})
+        self.child.after_bulk_write(instances)
+        return instances
+
+
+class BulkModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Model serializer with hooks used by ``BulkListSerializer`` to replace
+    the per-instance ``save()`` logic that bulk operations skip.
+    """
+
+    class Meta:
+        list_serializer_class = BulkListSerializer
+
+    def get_fields(self):
+        """
+        Limit writable foreign keys to the requesting landlord's properties,
+        so a row cannot be created in or moved to someone else's. The bulk
+        path resolves ids through the same querysets.
+        """
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None:
+            return fields
+        for field in fields.values():
+            if field.read_only or not isinstance(field, serializers.PrimaryKeyRelatedField):
+                continue
+            model = field.queryset.model
+            if model is User:
+                field.queryset = tenants_for(request.user)
+            elif model in LANDLORD_PATHS:
+                field.queryset = field.queryset.filter(**{LANDLORD_PATHS[model]: request.user})
+        return fields
+
+    def build_instance(self, attrs):
+        return self.Meta.model(**attrs)
+
+    def before_bulk_update(self, instances):
+        pass
+
+    def prepare_update(self, instance, attrs, fields):
+        pass
+
+    def after_bulk_write(self, instances):
+        pass
+
+
+class RoomSerializer(BulkModelSerializer):
+    class Meta(BulkModelSerializer.Meta):
+        model = Room
+        fields = ['id', 'property', 'room_number', 'capacity', 'current_occupants', 'status', 'created_at', 'updated_at']
+        read_only_fields = ['current_occupants', 'status', 'created_at', 'updated_at']
+
+    def create(self, validated_data):
+        room = super().create(validated_data)
+        room.update_status()
+        return room
+
+    def update(self, instance, validated_data):
+        room = super().update(instance, validated_data)
+        room.update_status()
+        return room
+
+    def prepare_update(self, instance, attrs, fields):
+        if 'capacity' in attrs:
+            instance.status = 'full' if instance.current_occupants >= instance.capacity else 'vacant'
+            fields.add('status')
+
+    def after_bulk_write(self, instances):
+        publish_rooms(instances)
+
+
+class RoomTenantSerializer(BulkModelSerializer):
+    room_number = serializers.CharField(source='room.room_number', read_only=True)
+    tenant_username = serializers.CharField(source='tenant.username', read_only=True)
+    tenant_name = serializers.CharField(source='tenant.get_full_name', read_only=True)
+
+    class Meta(BulkModelSerializer.Meta):
+        model = RoomTenant
+        fields = [
+            'id', 'room', 'room_number', 'tenant', 'tenant_username', 'tenant_name',
+            'move_in_date', 'status', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+    def before_bulk_update(self, instances):
+        self._previous_rooms = {assignment.room_id for assignment in instances}
+
+    def after_bulk_write(self, instances):
+        # Occupancy is normally kept in sync by RoomTenant post_save signals,
+        # which bulk operations do not send.
+        room_ids = {assignment.room_id for assignment in instances} | getattr(self, '_previous_rooms', set())
+        rooms = Room.objects.filter(id__in=room_ids)
+        rooms.refresh_occupancy()
+        publish_rooms(rooms)
+
+
+class PaymentSerializer(BulkModelSerializer):
+    room_number = serializers.CharField(source='room.room_number', read_only=True)
+    tenant_username = serializers.CharField(source='tenant.username', read_only=True)
+    receipt_id = serializers.IntegerField(source='receipt.id', read_only=True, default=None)
+
+    class Meta(BulkModelSerializer.Meta):
+        model = Payment
+        fields = [
+            'id', 'tenant', 'tenant_username', 'room', 'room_number', 'amount', 'payment_month',
+            'payment_date', 'status', 'receipt_number', 'receipt_id', 'year', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['year', 'created_at', 'updated_at']
+        extra_kwargs = {'receipt_number': {'required': False}}
+
+    def build_instance(self, attrs):
+        payment = super().build_instance(attrs)
+        # Mirror Payment.save(), which bulk_create bypasses. The timestamped
+        # number save() uses would collide for one tenant's months in a batch.
+        if not payment.receipt_number:
+            payment.receipt_number = f"RCPT-{payment.tenant_id}-{payment.payment_month:%Y%m}"
+        payment.year = payment.payment_month.year
+        return payment
+
+    def prepare_update(self, instance, attrs, fields):
+        if 'payment_month' in attrs:
+            instance.year = instance.payment_month.year
+            fields.add('year')
+
+    def after_bulk_write(self, instances):
+        publish_payments(instances)
+
+
+class AddOnSerializer(BulkModelSerializer):
+    class Meta(BulkModelSerializer.Meta):
+        model = AddOn
+        fields = ['id', 'room_tenant', 'description', 'amount', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class ReceiptSerializer(BulkModelSerializer):
+    class Meta(BulkModelSerializer.Meta):
+        model = Receipt
+        fields = [
+            'id', 'payment', 'receipt_number', 'tenant_name', 'room_number', 'amount',
+            'payment_month', 'payment_date', 'generated_date', 'pdf_path',
+        ]
+        read_only_fields = ['generated_date', 'pdf_path']
@@ -1,22 +1,62 @@
+from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import RoomTenant, Room
+from .live import publish_payments, publish_rooms
+from .models import Payment, RoomTenant, Room, Tombstone
+from .sync import SYNCED_MODELS
 
 
-def _recompute_room_occupancy_and_status(room: Room) -> None:
-    active_occupants = RoomTenant.objects.filter(room=room, status='active').count()
-    room.current_occupants = active_occupants
-    room.update_status()
+def _refresh_occupancy(room_id) -> None:
+    rooms = Room.objects.filter(id=room_id)
+    rooms.refresh_occupancy()
+    publish_rooms(rooms)
+
+
+def _queue_occupancy_refresh(room_id) -> None:
+    # Two UPDATEs once the assignment is committed; no worker is involved.
+    transaction.on_commit(lambda: _refresh_occupancy(room_id))
 
 
 @receiver(post_save, sender=RoomTenant)
 def handle_roomtenant_saved(sender, instance: RoomTenant, created, **kwargs):
-    _recompute_room_occupancy_and_status(instance.room)
+    _queue_occupancy_refresh(instance.room_id)
 
 
 @receiver(post_delete, sender=RoomTenant)
 def handle_roomtenant_deleted(sender, instance: RoomTenant, **kwargs):
-    _recompute_room_occupancy_and_status(instance.room)
+    _queue_occupancy_refresh(instance.room_id)
+
+
+@receiver(post_save, sender=Room)
+def handle_room_saved(sender, instance: Room, **kwargs):
+    publish_rooms([instance])
+
+
+@receiver(post_save, sender=User)
+def handle_user_saved(sender, instance: User, created, update_fields=None, **kwargs):
+    # Tenant names are cached in the tracking grid and synced with the
+    # assignments; touching those invalidates both. Logins are skipped.
+    if created or (update_fields is not None and set(update_fields) <= {'last_login', 'password'}):
+        return
+    RoomTenant.objects.filter(tenant=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Payment)
+def handle_payment_saved(sender, instance: Payment, **kwargs):
+    publish_payments([instance])
+
+
+@receiver(post_delete, sender=Payment)
+def handle_payment_deleted(sender, instance: Payment, **kwargs):
+    publish_payments([instance], deleted=True)
+
+
+def handle_synced_model_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
 
 
+for _model, _ in SYNCED_MODELS.values():
+    post_delete.connect(handle_synced_model_deleted, sender=_model, dispatch_uid=f'tombstone_{_model._meta.model_name}')
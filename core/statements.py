@@ -0,0 +1,161 @@
+"""
+Annual tenant statements: every payment of a year (with its receipt) and the
+tenant's add-ons, rendered to one multi-page PDF and kept in media storage.
+
+``generate_statements`` renders many tenants across a process pool. Each
+worker process imports WeasyPrint and renders a throwaway page once when it
+starts, so the font and Pango setup is paid per process rather than per
+statement. Workers write the PDFs to storage and return their names; the
+parent records them in one statement per tenant and year, keeping database
+writes out of the concurrent part.
+"""
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .images import signature_data_uri
+from .models import AddOn, Payment, Statement
+from .properties import signature_profile
+
+
+def year_payments(year):
+    return Payment.objects.filter(
+        payment_month__gte=date(year, 1, 1), payment_month__lt=date(year + 1, 1, 1), status='paid',
+    )
+
+
+def statement_tenants(year):
+    """
+    Ids of the tenants with a paid payment in ``year``.
+    """
+    return list(year_payments(year).order_by('tenant_id').values_list('tenant_id', flat=True).distinct())
+
+
+def statement_context(tenant, year):
+    payments = list(
+        year_payments(year).filter(tenant=tenant)
+        .select_related('room', 'receipt').order_by('payment_month', 'id')
+    )
+    addons = list(
+        AddOn.objects.filter(room_tenant__tenant=tenant, created_at__date__lt=date(year + 1, 1, 1))
+        .select_related('room_tenant__room').order_by('created_at')
+    )
+    signature = None
+    if payments:
+        profile = signature_profile(payments[-1].room.property_id).first()
+        signature = profile.signature if profile else None
+    return {
+        'tenant': tenant,
+        'year': year,
+        'payments': payments,
+        'addons': addons,
+        'total_paid': sum((p.amount for p in payments), Decimal('0.00')),
+        'generated': timezone.now(),
+        'signature_src': signature_data_uri(signature.name) if signature else None,
+    }
+
+
+def render_statement_html(tenant, year):
+    return render_to_string('core/statement_template.html', statement_context(tenant, year))
+
+
+def render_statement_pdf(tenant, year):
+    from weasyprint import HTML
+
+    return HTML(string=render_statement_html(tenant, year), base_url=settings.MEDIA_ROOT).write_pdf()
+
+
+def store_statement_pdf(tenant, year, pdf):
+    return default_storage.save(
+        f'statements/{year}/{tenant.username}-{secrets.token_hex(8)}.pdf', ContentFile(pdf),
+    )
+
+
+def render_and_store(tenant_id, year):
+    """
+    Render one statement into storage; returns ``(tenant_id, name)``. Runs in
+    the worker processes.
+    """
+    tenant = User.objects.get(id=tenant_id)
+    return tenant_id, store_statement_pdf(tenant, year, render_statement_pdf(tenant, year))
+
+
+def warm_worker():
+    """
+    Pool initializer: give the process its own database connections and load
+    WeasyPrint before the first real statement.
+    """
+    import django
+
+    django.setup()
+    connections.close_all()
+    from weasyprint import HTML
+
+    HTML(string='<p>Statement</p>').write_pdf()
+
+
+def record_statements(year, names):
+    """
+    Save ``{tenant_id: pdf name}`` as the tenants' statements for ``year``
+    (one upsert) and delete the files they replace.
+    """
+    replaced = dict(
+        Statement.objects.filter(year=year, tenant_id__in=names).values_list('tenant_id', 'pdf_path')
+    )
+    now = timezone.now()
+    Statement.objects.bulk_create(
+        [Statement(tenant_id=tenant_id, year=year, pdf_path=name, generated_at=now) for tenant_id, name in names.items()],
+        update_conflicts=True, unique_fields=['tenant', 'year'], update_fields=['pdf_path', 'generated_at'],
+    )
+    for tenant_id, old in replaced.items():
+        if old and old != names[tenant_id]:
+            default_storage.delete(old)
+
+
+def generate_statements(year, tenant_ids=None, workers=None, on_done=None):
+    """
+    Render and store the ``year`` statements of ``tenant_ids`` (default:
+    everyone who paid that year) on ``workers`` processes (default
+    RENTRIX_STATEMENT_WORKERS, or the CPU count when that is unset; 0
+    renders in this process). ``on_done(tenant_id, name, error)`` is called as each one
+    finishes. Returns ``({tenant_id: pdf name}, {tenant_id: error})``; the
+    statements that rendered are recorded even if others failed.
+    """
+    if tenant_ids is None:
+        tenant_ids = statement_tenants(year)
+    if workers is None:
+        workers = settings.RENTRIX_STATEMENT_WORKERS
+    if workers is None:
+        workers = os.cpu_count() or 1
+    names, failed = {}, {}
+
+    def finish(tenant_id, result):
+        try:
+            names[tenant_id] = result()[1]
+        except Exception as exc:
+            failed[tenant_id] = f'{type(exc).__name__}: {exc}'
+        if on_done:
+            on_done(tenant_id, names.get(tenant_id), failed.get(tenant_id))
+
+    if not workers:
+        for tenant_id in tenant_ids:
+            finish(tenant_id, lambda: render_and_store(tenant_id, year))
+    elif tenant_ids:
+        # Forked workers must not share the parent's open connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(workers, len(tenant_ids)), initializer=warm_worker) as pool:
+            futures = {pool.submit(render_and_store, tenant_id, year): tenant_id for tenant_id in tenant_ids}
+            for future in as_completed(futures):
+                finish(futures[future], future.result)
+    record_statements(year, names)
+    return names, failed
@@ -0,0 +1,124 @@
+"""
+Everything the tenant pages show (their assignment and room, add-on total,
+this month's balance, payments with receipts and annual statements), built
+from three queries (two, capped to the newest payments, for the dashboard)
+and cached per tenant in the shared cache.
+
+Cache keys embed ``tenant_version``, a one-query fingerprint of the tenant's
+own rows, so any change produces a new key and stale summaries age out. The
+tenant pages use the same version as their ETag; a view that has already
+computed it reuses it, so a cached summary costs no further queries.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import BASE_RENT, AddOn, Payment, Receipt, RoomTenant, Statement
+
+RECENT_PAYMENTS = 12
+
+
+def per_tenant(model, tenant_field, aggregate):
+    return Subquery(
+        model.objects.filter(**{tenant_field: OuterRef('pk')}).order_by()
+        .values(tenant_field).annotate(value=aggregate).values('value')
+    )
+
+
+def tenant_version(user):
+    """
+    Changes whenever anything on the tenant's pages does: the latest update
+    and row count of each of their tables (read in one query), and the
+    current month, which the balance depends on.
+    """
+    row = User.objects.filter(pk=user.pk).values_list(
+        per_tenant(Payment, 'tenant', Max('updated_at')),
+        per_tenant(Payment, 'tenant', Count('id')),
+        per_tenant(Receipt, 'payment__tenant', Max('updated_at')),
+        per_tenant(RoomTenant, 'tenant', Max('updated_at')),
+        per_tenant(RoomTenant, 'tenant', Count('id')),
+        per_tenant(RoomTenant, 'tenant', Max('room__updated_at')),
+        per_tenant(AddOn, 'room_tenant__tenant', Max('updated_at')),
+        per_tenant(AddOn, 'room_tenant__tenant', Count('id')),
+        per_tenant(Statement, 'tenant', Max('generated_at')),
+    ).get()
+    parts = (settings.RENTRIX_PWA_VERSION, user.pk, user.get_full_name(), f'{timezone.localdate():%Y-%m}', *row)
+    return hashlib.md5(repr(parts).encode()).hexdigest()[:20]
+
+
+def current_balance(assignment, monthly_total, period):
+    """
+    What the tenant owes for the current month: the monthly total once they
+    have moved in, less what is recorded as paid for it.
+    """
+    due = monthly_total if assignment and assignment.move_in_date <= period else Decimal('0.00')
+    paid = (assignment.paid_this_month if assignment else None) or Decimal('0.00')
+    return {'period': period, 'due': due, 'paid': paid, 'balance': max(due - paid, Decimal('0.00'))}
+
+
+def outer_tenant_payments(**filters):
+    return Payment.objects.filter(tenant=OuterRef('tenant'), **filters).order_by().values('tenant')
+
+
+def build_tenant_summary(user, recent=False):
+    """
+    With ``recent``, only what the dashboard shows: the newest
+    RECENT_PAYMENTS payments and no statements.
+    """
+    period = timezone.localdate().replace(day=1)
+    assignment = (
+        RoomTenant.objects.filter(tenant=user, status='active').select_related('room')
+        .annotate(
+            addon_total=Sum('addons__amount'),
+            paid_this_month=Subquery(
+                outer_tenant_payments(payment_month=period, status='paid').annotate(value=Sum('amount')).values('value')
+            ),
+            payment_count=Subquery(outer_tenant_payments().annotate(value=Count('id')).values('value')),
+        )
+        .first()
+    )
+    addon_total = (assignment.addon_total if assignment else None) or Decimal('0.00')
+    monthly_total = BASE_RENT + addon_total if assignment else Decimal('0.00')
+    payments = (
+        Payment.objects.filter(tenant=user).order_by('-payment_month', '-payment_date', '-id')
+        .values(
+            'receipt_number', 'amount', 'payment_month', 'payment_date', 'status',
+            room_number=F('room__room_number'), receipt_id=F('receipt__id'), receipt_pdf_path=F('receipt__pdf_path'),
+        )
+    )
+    payments = list(payments[:RECENT_PAYMENTS] if recent else payments)
+    statements = None if recent else list(
+        Statement.objects.filter(tenant=user).order_by('-year').values('year', 'pdf_path')
+    )
+    return {
+        'assignment': assignment,
+        'room': assignment.room if assignment else None,
+        'addon_total': addon_total,
+        'monthly_total': monthly_total,
+        'current': current_balance(assignment, monthly_total, period),
+        'payments': payments,
+        'payment_count': (assignment.payment_count if assignment else None) or 0,
+        'recent_payments': payments[:RECENT_PAYMENTS],
+        'statements': statements,
+    }
+
+
+def tenant_summary(request, recent=False):
+    """
+    The signed-in tenant's summary (see ``build_tenant_summary``), from the
+    shared cache when their data has not changed since it was built. The
+    version the ETag check stored on the request is reused, so a cold build
+    costs only its own queries.
+    """
+    user = request.user
+    version = getattr(request, 'tenant_version', None) or tenant_version(user)
+    return cache.get_or_set(
+        f'tenant_summary:{user.pk}:{version}{":recent" if recent else ""}',
+        lambda: build_tenant_summary(user, recent),
+        settings.RENTRIX_TENANT_SUMMARY_CACHE_SECONDS,
+    )
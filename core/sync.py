@@ -0,0 +1,143 @@
+"""
+Delta-sync feed: rows changed since a watermark plus tombstones for rows
+deleted since then, for offline-capable clients.
+
+A response carries at most RENTRIX_SYNC_PAGE_SIZE rows. When more are
+pending it sets ``has_more`` and a ``cursor`` to resume from; every page of
+one sync shares the same window, so the watermark is only stored once the
+last page has been applied.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AddOn, Payment, Receipt, Room, RoomTenant, Tombstone
+from .serializers import (
+    AddOnSerializer,
+    PaymentSerializer,
+    ReceiptSerializer,
+    RoomSerializer,
+    RoomTenantSerializer,
+)
+
+# Feed name -> (model, serializer).
+SYNCED_MODELS = {
+    'rooms': (Room, RoomSerializer),
+    'assignments': (RoomTenant, RoomTenantSerializer),
+    'payments': (Payment, PaymentSerializer),
+    'addons': (AddOn, AddOnSerializer),
+    'receipts': (Receipt, ReceiptSerializer),
+}
+# Feed name -> path to the owning property's landlords.
+LANDLORD_PATHS = {
+    'rooms': 'property__landlords',
+    'assignments': 'room__property__landlords',
+    'payments': 'room__property__landlords',
+    'addons': 'room_tenant__room__property__landlords',
+    'receipts': 'payment__room__property__landlords',
+}
+SELECT_RELATED = {
+    'assignments': ('room', 'tenant'),
+    'payments': ('room', 'tenant', 'receipt'),
+}
+
+
+class InvalidWatermark(ValueError):
+    pass
+
+
+def parse_watermark(value):
+    if not value:
+        return None
+    since = parse_datetime(value)
+    if since is None or timezone.is_naive(since):
+        raise InvalidWatermark(f'Invalid watermark: {value!r}')
+    return since
+
+
+def encode_cursor(state):
+    return signing.dumps(state, salt='core.sync', compress=True)
+
+
+def parse_cursor(value):
+    """
+    The position a previous page stopped at, from its ``cursor``.
+    """
+    try:
+        state = signing.loads(value, salt='core.sync')
+        watermark = parse_watermark(state['watermark'])
+        lower = parse_watermark(state['lower'])
+        feed, after = int(state['feed']), int(state['after'])
+    except (signing.BadSignature, InvalidWatermark, KeyError, TypeError, ValueError):
+        raise InvalidWatermark(f'Invalid cursor: {value!r}')
+    return {'watermark': watermark, 'lower': lower, 'reset': bool(state.get('reset')), 'feed': feed, 'after': after}
+
+
+def changes_since(since, context=None, page_size=None, cursor=None, landlord=None):
+    """
+    Return the feed payload for everything changed after ``since`` (None for
+    a full snapshot), or for the rest of a paged sync when ``cursor`` (from
+    ``parse_cursor``) is given. The returned watermark is taken before
+    querying, and the window overlaps the previous one by
+    RENTRIX_SYNC_OVERLAP seconds so rows committed by slow transactions are
+    not skipped; clients apply rows idempotently by id.
+
+    Feeds are paged in order, each by id, until ``page_size`` rows are
+    collected; tombstones come with the last page. With ``landlord``, only
+    rows of their properties are included.
+    """
+    if cursor is None:
+        watermark = timezone.now()
+        reset = since is None or since < watermark - timedelta(days=settings.RENTRIX_TOMBSTONE_RETENTION_DAYS)
+        lower = None if reset else since - timedelta(seconds=settings.RENTRIX_SYNC_OVERLAP)
+        start, after = 0, 0
+    else:
+        watermark, lower, reset = cursor['watermark'], cursor['lower'], cursor['reset']
+        start, after = cursor['feed'], cursor['after']
+    page_size = min(page_size or settings.RENTRIX_SYNC_PAGE_SIZE, settings.RENTRIX_SYNC_PAGE_SIZE)
+
+    changes = {name: [] for name in SYNCED_MODELS}
+    names = {model._meta.model_name: name for name, (model, _) in SYNCED_MODELS.items()}
+    deleted = {name: [] for name in SYNCED_MODELS}
+    remaining, resume = page_size, None
+    for index, (name, (model, serializer_class)) in enumerate(SYNCED_MODELS.items()):
+        if index < start:
+            continue
+        first_id = after if index == start else 0
+        queryset = model.objects.filter(updated_at__lte=watermark, id__gt=first_id)
+        if lower is not None:
+            queryset = queryset.filter(updated_at__gt=lower)
+        if landlord is not None:
+            queryset = queryset.filter(**{LANDLORD_PATHS[name]: landlord})
+        rows = list(queryset.select_related(*SELECT_RELATED.get(name, ())).order_by('id')[:remaining + 1])
+        if len(rows) > remaining:
+            rows = rows[:remaining]
+            resume = (index, rows[-1].id if rows else first_id)
+        changes[name] = serializer_class(rows, many=True, context=context or {}).data
+        remaining -= len(rows)
+        if resume is not None:
+            break
+
+    if lower is not None and resume is None:
+        tombstones = Tombstone.objects.filter(deleted_at__gt=lower, deleted_at__lte=watermark)
+        for model_name, object_id in tombstones.values_list('model', 'object_id'):
+            if model_name in names:
+                deleted[names[model_name]].append(object_id)
+
+    return {
+        'watermark': watermark.isoformat(),
+        'reset': reset,
+        'changes': changes,
+        'deleted': deleted,
+        'has_more': resume is not None,
+        'cursor': encode_cursor({
+            'watermark': watermark.isoformat(),
+            'lower': lower.isoformat() if lower else None,
+            'reset': reset,
+            'feed': resume[0],
+            'after': resume[1],
+        }) if resume else None,
+    }
@@ -0,0 +1,35 @@
+"""
+Background tasks run by ``manage.py run_workers``.
+"""
+from datetime import date
+
+from django.conf import settings
+
+from .jobs import task
+from .models import Receipt
+from .pdf import render_receipt_pdf, store_receipt_pdf
+from .properties import signature_profile
+from .reminders import current_period, send_reminders
+
+
+@task(max_attempts=5)
+def render_receipt(receipt_id):
+    """
+    Pre-render a receipt PDF into media storage so downloads skip WeasyPrint.
+    """
+    receipt = Receipt.objects.filter(id=receipt_id).select_related('payment__room').first()
+    if receipt is None:
+        return
+    profile = signature_profile(receipt.payment.room.property_id).first()
+    receipt.landlord_signature = profile.signature if profile else None
+    pdf = render_receipt_pdf(receipt, base_url=settings.MEDIA_ROOT)
+    store_receipt_pdf(receipt, pdf)
+
+
+@task(max_attempts=2, retry_backoff=300)
+def send_rent_reminders(period=None):
+    """
+    Queue with ``dedupe_key='rent-reminders'`` to run one reminder pass;
+    ``period`` is an ISO date of the month's first day.
+    """
+    send_reminders(date.fromisoformat(period) if period else current_period())
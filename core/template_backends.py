@@ -0,0 +1,40 @@
+from time import perf_counter
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .instrumentation import current_metrics
+
+
+class TimedTemplate(Template):
+    """
+    Template wrapper that adds its render time to the current request's
+    metrics. Queries evaluated lazily inside the template are counted in
+    both the template and the DB totals.
+    """
+
+    def render(self, context=None, request=None):
+        metrics = current_metrics()
+        if metrics is None:
+            return super().render(context, request)
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Drop-in replacement for the DTL backend that reports render time to
+    ``RequestTimingMiddleware``.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
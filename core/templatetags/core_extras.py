@@ -1,8 +1,23 @@
 from django import template
+from django.conf import settings
+from django.template import engines
+from django.utils.safestring import mark_safe
 
 register = template.Library()
 
 @register.filter
 def get_item(dictionary, key):
     """Get an item from a dictionary using the key"""
-    return dictionary.get(key) 
\ No newline at end of file
+    return dictionary.get(key) 
+
+@register.simple_tag(takes_context=True)
+def render_rows(context, template_name):
+    """
+    Render a row fragment with the RENTRIX_ROWS_ENGINE backend: the Jinja2
+    port in jinja2/, or the DTL version in templates/ with this context.
+    """
+    if settings.RENTRIX_ROWS_ENGINE == 'django':
+        return context.template.engine.get_template(template_name).render(context)
+    template = engines[settings.RENTRIX_ROWS_ENGINE].get_template(template_name)
+    # The Jinja2 backend autoescapes the fragment itself but returns a str.
+    return mark_safe(template.render(context.flatten(), context.get('request')))
@@ -1,3 +1,1495 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models.query import QuerySet
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from . import maintenance, statements
+from .async_views import pdf_executor
+from .jinja2 import url as jinja2_url
+from .images import signature_data_uri, signature_derivative
+from .jobs import Worker, run_pending, task
+from .live import event_stream
+from .middleware import AsyncCapableMiddleware
+from .metrics import REQUEST_ERRORS, REQUEST_LATENCY, MmapedDict, collect
+from .ratelimit import client_ip, consume, parse_rate
+from .models import (
+    BASE_RENT, AddOn, Job, LandlordProfile, LiveEvent, OccupancySnapshot, Payment, Property, Receipt, Room, RoomTenant, Statement,
+)
+from .occupancy import snapshot_occupancy
+from .reminders import due_reminders, send_reminders
+from .rooms import parse_room_numbers
+from .seeding import seed_rentrix
+from .summary import RECENT_PAYMENTS, tenant_summary
+from .tracking import YEARS_AHEAD, YEARS_BACK, data_fingerprint, parse_year, payment_grid, payment_years
+from .statements import record_statements, render_statement_html, statement_context, statement_tenants
+from .urls import urlpatterns
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sessions'},
+}
+
+try:
+    import weasyprint  # noqa: F401
+    HAS_WEASYPRINT = True
+except (ImportError, OSError):
+    # WeasyPrint is installed but Pango/Cairo system libraries are missing.
+    HAS_WEASYPRINT = False
+
+_module_overrides = []
+
+
+def setUpModule():
+    # Keep the tests out of the real var/cache and var/metrics.
+    metrics_dir = tempfile.mkdtemp(prefix='rentrix-metrics-')
+    override = override_settings(CACHES=LOCMEM_CACHES, RENTRIX_METRICS_DIR=metrics_dir)
+    override.enable()
+    _module_overrides.append((override, metrics_dir))
+
+
+def tearDownModule():
+    override, metrics_dir = _module_overrides.pop()
+    override.disable()
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every URL in core.urls must issue a fixed number of queries, no matter
+    how many rooms, tenants and payments exist.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        LandlordProfile.objects.create(user=cls.landlord)
+        seed_rentrix(rooms=2, archived_per_room=1, months=2, addons_per_tenant=2)
+        cls.room = Room.objects.order_by('id').first()
+        cls.assignment = RoomTenant.objects.filter(room=cls.room, status='active').order_by('id').first()
+        cls.archived = RoomTenant.objects.filter(room=cls.room, status='inactive').first()
+        cls.tenant = cls.assignment.tenant
+        cls.addon = cls.assignment.addons.first()
+        cls.payment = Payment.objects.filter(tenant=cls.tenant).order_by('id').first()
+        cls.receipt = cls.payment.receipt
+
+    def setUp(self):
+        # Budgets are for a cold cache; test_warm_tenant_pages covers a warm one.
+        cache.clear()
+
+    def cases(self):
+        """
+        url name -> (user, url kwargs, query budget)
+        """
+        room, assignment = self.room.id, self.assignment.id
+        landlord, tenant = self.landlord, self.tenant
+        return {
+            'home': (landlord, {}, 2),
+            'dashboard': (landlord, {}, 2),
+            'switch_property': (landlord, {}, 6),
+            'landlord_dashboard': (landlord, {}, 7),
+            'tenant_dashboard': (tenant, {}, 5),
+            'room_list': (landlord, {}, 4),
+            'room_add': (landlord, {}, 3),
+            'room_bulk_add': (landlord, {}, 2),
+            'room_bulk_capacity': (landlord, {}, 8),
+            'room_detail': (landlord, {'room_id': room}, 5),
+            'room_edit': (landlord, {'room_id': room}, 4),
+            'room_delete': (landlord, {'room_id': room}, 4),
+            'search_api': (landlord, {}, 5),
+            'tenant_autocomplete': (landlord, {}, 3),
+            'room_autocomplete': (landlord, {}, 4),
+            'dashboard_counters': (landlord, {}, 6),
+            'live_events': (landlord, {}, 3),
+            'roomtenant_add': (landlord, {'room_id': room}, 6),
+            'roomtenant_edit': (landlord, {'room_id': room, 'assignment_id': assignment}, 9),
+            'roomtenant_archive': (landlord, {'room_id': room, 'assignment_id': assignment}, 5),
+            'addon_add': (landlord, {'room_id': room, 'assignment_id': assignment}, 6),
+            'addon_delete': (landlord, {'room_id': room, 'assignment_id': assignment, 'addon_id': self.addon.id}, 6),
+            'tenant_list': (landlord, {}, 4),
+            'archived_tenants': (landlord, {}, 4),
+            'roomtenant_restore': (landlord, {'assignment_id': self.archived.id}, 5),
+            'payment_list': (landlord, {}, 4),
+            'payment_edit': (landlord, {'payment_id': self.payment.id}, 4),
+            'payment_tracking': (landlord, {}, 6),
+            'add_payment': (landlord, {'tenant_id': tenant.id}, 5),
+            'payment_history': (tenant, {}, 6),
+            'download_receipt': (tenant, {'receipt_id': self.receipt.id}, 6),
+            'manage_signature': (landlord, {}, 3),
+            'tenant_payment_history': (landlord, {'tenant_id': tenant.id}, 5),
+            'tenant_create': (landlord, {}, 2),
+            'force_password_change': (tenant, {}, 4),
+            'tenant_room_list': (tenant, {}, 4),
+            'tenant_room_detail': (tenant, {'room_id': room}, 5),
+            'tenant_payment_tracker': (tenant, {}, 6),
+            'tenant_payments_data': (tenant, {}, 6),
+            'web_manifest': (None, {}, 0),
+            'service_worker': (None, {}, 0),
+            'metrics': (None, {}, 0),
+        }
+
+    def query_counts(self):
+        counts = {}
+        for name, (user, kwargs, _) in self.cases().items():
+            if name == 'download_receipt' and not HAS_WEASYPRINT:
+                continue
+            if user is None:
+                self.client.logout()
+            else:
+                self.client.force_login(user)
+            url = reverse(name, kwargs=kwargs)
+            room_ids = list(Room.objects.values_list('id', flat=True))
+            with CaptureQueriesContext(connection) as ctx:
+                if name == 'switch_property':
+                    response = self.client.post(url, {'property_id': self.room.property_id})
+                elif name == 'room_bulk_capacity':
+                    response = self.client.post(url, {'rooms': room_ids, 'capacity': 4})
+                else:
+                    response = self.client.get(url, {'q': 'R0'} if name == 'search_api' else {})
+            self.assertLess(response.status_code, 400, f'{name} returned {response.status_code}')
+            counts[name] = len(ctx.captured_queries)
+        return counts
+
+    def test_every_url_has_a_budget(self):
+        names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(names, set(self.cases()))
+
+    def test_queries_within_budget(self):
+        counts = self.query_counts()
+        for name, count in counts.items():
+            with self.subTest(view=name):
+                self.assertLessEqual(count, self.cases()[name][2])
+
+    def test_warm_tenant_pages(self):
+        # The user, their security profile and the version; the summary is cached.
+        self.client.force_login(self.tenant)
+        for name in ('tenant_dashboard', 'payment_history', 'tenant_payment_tracker', 'tenant_payments_data'):
+            self.client.get(reverse(name))
+            with self.subTest(view=name), self.assertNumQueries(3):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+
+    def test_queries_independent_of_data_size(self):
+        small = self.query_counts()
+        seed_rentrix(rooms=6, archived_per_room=1, months=14, addons_per_tenant=2, prefix='S')
+        Payment.objects.filter(tenant=self.tenant).update(status='paid')
+        for month in range(3, 15):
+            payment_month = date(2025 + month // 12, month % 12 + 1, 1)
+            payment = Payment.objects.create(
+                tenant=self.tenant, room=self.room, amount=Decimal('1550.00'),
+                payment_month=payment_month, status='paid', receipt_number=f'EXTRA-{month}',
+            )
+            Receipt.objects.create(
+                payment=payment, receipt_number=payment.receipt_number, tenant_name='t',
+                room_number=self.room.room_number, amount=payment.amount,
+                payment_month=payment_month, payment_date=payment.payment_date,
+            )
+        AddOn.objects.create(room_tenant=self.assignment, amount=Decimal('50.00'), description='Lamp')
+        large = self.query_counts()
+        for name in small:
+            with self.subTest(view=name):
+                self.assertEqual(small[name], large[name], f'{name} query count grows with data')
+
+
+@override_settings(RENTRIX_SLOW_REQUEST_MS=0, RENTRIX_SLOW_REQUEST_TOP_QUERIES=2)
+class RequestTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=1)
+
+    def test_slow_request_is_logged_as_json(self):
+        self.client.force_login(self.landlord)
+        with self.assertLogs('core.requests', 'WARNING') as logs:
+            response = self.client.get(reverse('room_list'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(
+            {key: record[key] for key in ('event', 'method', 'path', 'view', 'status')},
+            {'event': 'slow_request', 'method': 'GET', 'path': reverse('room_list'), 'view': 'room_list', 'status': 200},
+        )
+        self.assertGreater(record['queries'], 0)
+        self.assertEqual(len(record['top_queries']), 2)
+        self.assertTrue(all({'ms', 'sql'} <= set(query) for query in record['top_queries']))
+        self.assertIn(f'desc="{record["queries"]} queries"', response['Server-Timing'])
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics_dir = tempfile.mkdtemp(prefix='rentrix-metrics-')
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        override = override_settings(RENTRIX_METRICS_DIR=metrics_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_collect_sums_process_files(self):
+        for pid, (errors, seconds) in enumerate([(2, 0.2), (3, 4.0)]):
+            store = MmapedDict(os.path.join(settings.RENTRIX_METRICS_DIR, f'metrics_{pid}.db'))
+            store.increment(REQUEST_ERRORS._key('_total', {'view': 'room_list'}), errors)
+            store.increment(REQUEST_LATENCY._key('_sum', {'view': 'room_list'}), seconds)
+            store.increment(REQUEST_LATENCY._key('_count', {'view': 'room_list'}), 1)
+        lines = collect().splitlines()
+        self.assertIn('rentrix_request_errors_total{view="room_list"} 5', lines)
+        self.assertIn('rentrix_request_duration_seconds_sum{view="room_list"} 4.2', lines)
+        self.assertIn('rentrix_request_duration_seconds_count{view="room_list"} 2', lines)
+
+    def test_endpoint_is_forbidden_to_other_addresses(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.9').status_code, 403)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE rentrix_request_errors counter', response.content.decode())
+
+    @override_settings(RENTRIX_TRUSTED_PROXIES=['127.0.0.1'])
+    def test_endpoint_is_forbidden_to_proxied_clients(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.9')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=1)
+        cls.tenant = User.objects.filter(is_staff=False).first()
+
+    def setUp(self):
+        profile_dir = tempfile.mkdtemp(prefix='rentrix-profiles-')
+        self.addCleanup(shutil.rmtree, profile_dir)
+        override = override_settings(RENTRIX_PROFILE_DIR=profile_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_staff_can_fetch_sql_log(self):
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse('room_list'), {'_profile': 'sql'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertTrue(any('core_room' in query['sql'] for query in response.json()))
+        base = response['X-Rentrix-Profile']
+        self.assertTrue(os.path.exists(os.path.join(settings.RENTRIX_PROFILE_DIR, f'{base}.folded')))
+
+    def test_collapsed_stacks(self):
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse('payment_tracking'), HTTP_X_RENTRIX_PROFILE='collapsed')
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        for line in response.content.decode().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(int(count) > 0)
+
+    def test_ignored_for_tenants(self):
+        self.client.force_login(self.tenant)
+        response = self.client.get(reverse('tenant_dashboard'), {'_profile': 'sql'})
+        self.assertNotIn('X-Rentrix-Profile', response)
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=2, archived_per_room=1)
+        cls.tenant = User.objects.filter(is_staff=False).first()
+
+    async def test_search_api_through_async_stack(self):
+        await self.async_client.aforce_login(self.landlord)
+        response = await self.async_client.get(reverse('search_api'), {'q': 'R0001'})
+        self.assertEqual([result['title'] for result in response.json() if result['type'] == 'Room'], ['Room R0001'])
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    async def test_base_middleware_passes_through(self):
+        self.assertEqual(AsyncCapableMiddleware(lambda request: 'sync')(None), 'sync')
+
+        async def view(request):
+            return 'async'
+
+        self.assertEqual(await AsyncCapableMiddleware(view)(None), 'async')
+
+    def test_pdf_executor_is_shared_across_threads(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            executors = set(pool.map(lambda _: pdf_executor(), range(16)))
+        self.assertEqual(len(executors), 1)
+
+    def test_dashboard_counters(self):
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse('dashboard_counters'))
+        self.assertEqual(response.json(), {
+            'total_rooms': 2, 'vacant_rooms': 2, 'total_tenants': 4, 'total_payments': 48,
+        })
+
+    async def test_counters_require_staff(self):
+        await self.async_client.aforce_login(self.tenant)
+        response = await self.async_client.get(reverse('dashboard_counters'))
+        self.assertEqual(response.status_code, 302)
+
+
+class APITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=3, archived_per_room=1, months=3, addons_per_tenant=1)
+        cls.tenant = User.objects.filter(is_staff=False).first()
+
+    def setUp(self):
+        self.client.force_login(self.landlord)
+
+    def test_requires_staff(self):
+        self.client.force_login(self.tenant)
+        self.assertEqual(self.client.get('/api/v1/payments/').status_code, 403)
+
+    def test_list_queries_do_not_grow(self):
+        counts = []
+        for prefix in ('X', 'Y'):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/api/v1/payments/', {'page_size': 50})
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(ctx.captured_queries))
+            seed_rentrix(rooms=3, months=3, prefix=prefix)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_cursor_pagination_and_sparse_fields(self):
+        response = self.client.get('/api/v1/payments/', {'page_size': 4, 'fields': 'amount,room_number'})
+        body = response.json()
+        self.assertEqual(set(body['results'][0]), {'id', 'amount', 'room_number'})
+        seen = [row['id'] for row in body['results']]
+        next_page = self.client.get(body['next']).json()
+        self.assertGreater(next_page['results'][0]['id'], seen[-1])
+
+    def test_bulk_create_and_update(self):
+        assignment = RoomTenant.objects.filter(status='active').first()
+        rows = [
+            {'tenant': assignment.tenant_id, 'room': assignment.room_id, 'amount': '1450.00',
+             'payment_month': f'2026-{month:02d}-01', 'payment_date': '2026-06-01', 'status': 'paid'}
+            for month in range(1, 7)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/v1/payments/bulk/', rows, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        ids = response.json()['ids']
+        self.assertEqual(len(ids), 6)
+        self.assertLess(len(ctx.captured_queries), 10)
+        self.assertEqual(Payment.objects.filter(id__in=ids, year=2026).count(), 6)
+
+        updates = [{'id': pk, 'status': 'unpaid'} for pk in ids]
+        response = self.client.patch('/api/v1/payments/bulk/', updates, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Payment.objects.filter(id__in=ids, status='unpaid').count(), 6)
+
+    def test_bulk_assignment_updates_occupancy(self):
+        assignment = RoomTenant.objects.filter(status='active').first()
+        room = assignment.room
+        response = self.client.patch(
+            '/api/v1/assignments/bulk/', [{'id': assignment.id, 'status': 'inactive'}], content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        room.refresh_from_db()
+        self.assertEqual(room.current_occupants, RoomTenant.objects.filter(room=room, status='active').count())
+
+    def test_filters_reject_malformed_values(self):
+        for url, params in (
+            ('/api/v1/payments/', {'room': 'abc'}),
+            ('/api/v1/payments/', {'year': 'x'}),
+            ('/api/v1/payments/', {'tenant': '1.5', 'room': 'abc'}),
+            ('/api/v1/payments/', {'status': 'lost'}),
+            ('/api/v1/rooms/', {'property': 'zz'}),
+            ('/api/v1/assignments/', {'room': '99999999999999999999'}),
+            ('/api/v1/addons/', {'room_tenant': 'x'}),
+            ('/api/v1/receipts/', {'payment': '-'}),
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, (url, params))
+            self.assertEqual(set(response.json()), set(params))
+
+    def test_filters_match_clean_values(self):
+        room = Room.objects.first()
+        response = self.client.get('/api/v1/payments/', {'room': str(room.id), 'status': 'paid'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(response.json()['results']), Payment.objects.filter(room=room, status='paid').count(),
+        )
+
+    def test_bulk_rejects_unknown_foreign_keys(self):
+        rows = [{'tenant': 999999, 'room': 1, 'amount': '1', 'payment_month': '2026-01-01'}]
+        response = self.client.post('/api/v1/payments/bulk/', rows, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class DeltaSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=2, months=2, addons_per_tenant=1)
+
+    def setUp(self):
+        self.client.force_login(self.landlord)
+
+    def test_full_snapshot_without_watermark(self):
+        body = self.client.get('/api/v1/changes/').json()
+        self.assertTrue(body['reset'])
+        self.assertEqual(len(body['changes']['payments']), Payment.objects.count())
+        self.assertEqual(len(body['changes']['receipts']), Receipt.objects.count())
+
+    @override_settings(RENTRIX_SYNC_OVERLAP=0)
+    def test_returns_only_deltas_and_tombstones(self):
+        watermark = self.client.get('/api/v1/changes/').json()['watermark']
+        room = Room.objects.order_by('id').first()
+        room.capacity = 10
+        room.save()
+        addon = AddOn.objects.order_by('id').first()
+        addon_id = addon.id
+        addon.delete()
+
+        body = self.client.get('/api/v1/changes/', {'since': watermark}).json()
+        self.assertFalse(body['reset'])
+        self.assertEqual([row['id'] for row in body['changes']['rooms']], [room.id])
+        self.assertEqual(body['changes']['payments'], [])
+        self.assertEqual(body['deleted']['addons'], [addon_id])
+
+    def test_pages_a_full_snapshot(self):
+        seen, pages, params = {}, 0, {'page_size': 5}
+        while True:
+            body = self.client.get('/api/v1/changes/', params).json()
+            pages += 1
+            for name, rows in body['changes'].items():
+                seen.setdefault(name, []).extend(row['id'] for row in rows)
+            self.assertLessEqual(sum(len(rows) for rows in body['changes'].values()), 5)
+            if not body['has_more']:
+                break
+            self.assertTrue(body['reset'])
+            params = {'page_size': 5, 'cursor': body['cursor']}
+        self.assertIsNone(body['cursor'])
+        self.assertEqual(seen['payments'], list(Payment.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(len(seen['receipts']), Receipt.objects.count())
+        self.assertEqual(pages, -(-sum(len(ids) for ids in seen.values()) // 5))
+
+    def test_only_the_landlords_properties(self):
+        annex = Property.objects.create(name='Annex')
+        seed_rentrix(rooms=1, months=1, prefix='A', property=annex)
+        body = self.client.get('/api/v1/changes/').json()
+        self.assertEqual(
+            {row['property'] for row in body['changes']['rooms']}, {Property.objects.get(name='Main Property').id},
+        )
+        self.assertFalse([row for row in body['changes']['payments'] if row['room_number'].startswith('A')])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/changes/', {'cursor': 'forged'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+    def test_gzip(self):
+        response = self.client.get('/api/v1/changes/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_invalid_watermark(self):
+        self.assertEqual(self.client.get('/api/v1/changes/', {'since': 'yesterday'}).status_code, 400)
+
+
+@override_settings(RENTRIX_LIVE_STREAM_SECONDS=0, RENTRIX_LIVE_POLL_SECONDS=0)
+class LiveEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=1, months=0)
+        cls.assignment = RoomTenant.objects.select_related('room').order_by('id').first()
+
+    def test_signals_publish_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(
+                tenant=self.assignment.tenant, room=self.assignment.room, amount=Decimal('1350.00'),
+                payment_month=date(2025, 3, 1), status='paid',
+            )
+            self.assignment.status = 'inactive'
+            self.assignment.save()
+        events = {event.kind: event.payload for event in LiveEvent.objects.all()}
+        self.assertEqual(events['payment'], {
+            'id': payment.id, 'tenant': self.assignment.tenant_id, 'room': self.assignment.room_id,
+            'year': 2025, 'month': 3, 'status': 'paid',
+        })
+        self.assertEqual(events['room']['current_occupants'], 1)
+        self.assertEqual(set(LiveEvent.objects.values_list('property', flat=True)), {self.assignment.room.property_id})
+
+    async def test_stream_resumes_after_last_event_id(self):
+        property_id = self.assignment.room.property_id
+        first = await LiveEvent.objects.acreate(kind='room', object_id=1, property_id=property_id, payload={'id': 1})
+        second = await LiveEvent.objects.acreate(kind='payment', object_id=2, property_id=property_id, payload={'id': 2})
+        other = await Property.objects.acreate(name='Annex')
+        await LiveEvent.objects.acreate(kind='room', object_id=3, property=other, payload={'id': 3})
+        await self.async_client.aforce_login(self.landlord)
+        response = await self.async_client.get(reverse('live_events'), headers={'Last-Event-ID': str(first.id)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertEqual(body, f'retry: 3000\n\nid: {second.id}\nevent: payment\ndata: {{"id":2}}\n\n')
+
+    async def test_stream_forwards_new_events_of_its_property(self):
+        property_id = self.assignment.room.property_id
+        other = await Property.objects.acreate(name='Annex')
+        before = await LiveEvent.objects.acreate(kind='room', object_id=1, property_id=property_id, payload={'id': 1})
+        with self.settings(RENTRIX_LIVE_STREAM_SECONDS=30):
+            stream = event_stream(property_id)
+            self.assertEqual(await anext(stream), 'retry: 3000\n\n')
+            pending = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)  # the stream has read its starting point and is polling
+            await LiveEvent.objects.acreate(kind='room', object_id=2, property=other, payload={'id': 2})
+            new = await LiveEvent.objects.acreate(kind='payment', object_id=3, property_id=property_id, payload={'id': 3})
+            frame = await asyncio.wait_for(pending, 5)
+            await stream.aclose()
+        self.assertEqual(frame, f'id: {new.id}\nevent: payment\ndata: {{"id":3}}\n\n')
+
+        resumed = [frame async for frame in event_stream(property_id, last_id=before.id - 1)]
+        self.assertEqual(resumed[1:], [
+            f'id: {before.id}\nevent: room\ndata: {{"id":1}}\n\n',
+            f'id: {new.id}\nevent: payment\ndata: {{"id":3}}\n\n',
+        ])
+
+    def test_rejects_bad_cursor(self):
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse('live_events'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+flaky_calls = []
+
+
+@task(name='tests.flaky', max_attempts=2, retry_backoff=0)
+def flaky(fail_times):
+    flaky_calls.append(fail_times)
+    if len(flaky_calls) <= fail_times:
+        raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_rentrix(rooms=2, months=0)
+        cls.room = Room.objects.order_by('id').first()
+
+    def setUp(self):
+        flaky_calls.clear()
+
+    def test_occupancy_refreshes_on_commit_without_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for assignment in RoomTenant.objects.filter(room=self.room):
+                assignment.status = 'inactive'
+                assignment.save()
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.current_occupants, self.room.status), (0, 'vacant'))
+        self.assertFalse(Job.objects.exists())
+
+    def test_dedupe_key_collapses_queued_jobs(self):
+        for _ in range(3):
+            flaky.enqueue(fail_times=0, dedupe_key='flaky')
+        self.assertEqual(Job.objects.filter(dedupe_key='flaky').count(), 1)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_higher_priority_runs_first(self):
+        low = flaky.enqueue(fail_times=0, priority=-5)
+        high = flaky.enqueue(fail_times=1, priority=5)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            run_pending()
+        self.assertEqual(flaky_calls[0], 1)
+        low.refresh_from_db()
+        high.refresh_from_db()
+        self.assertEqual((low.status, high.status), (Job.DONE, Job.DONE))
+
+    def test_retries_then_fails(self):
+        job = flaky.enqueue(fail_times=5)
+        with self.assertLogs('core.jobs', 'WARNING') as logs:
+            run_pending()
+        self.assertEqual(len(logs.records), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn('RuntimeError: boom', job.last_error)
+
+    def test_failure_survives_a_locked_table(self):
+        job = flaky.enqueue(fail_times=5)
+        update = QuerySet.update
+        locked = []
+
+        def locked_once(queryset, **fields):
+            if queryset.model is Job and 'last_error' in fields and not locked:
+                locked.append(fields)
+                raise OperationalError('database table is locked: core_job')
+            return update(queryset, **fields)
+
+        with mock.patch.object(QuerySet, 'update', locked_once), self.assertLogs('core.jobs', 'WARNING'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((len(locked), job.status, job.attempts), (1, Job.FAILED, 2))
+
+    def test_running_worker_requeues_expired_locks(self):
+        worker = Worker(recovery_interval=60)
+        self.assertEqual(worker.recover_if_due(), 0)
+        job = flaky.enqueue(fail_times=0)
+        expired = timezone.now() - timedelta(seconds=settings.RENTRIX_JOB_LOCK_TIMEOUT + 1)
+        Job.objects.filter(id=job.id).update(status=Job.RUNNING, locked_by='gone:1:t', locked_at=expired)
+        self.assertIsNone(worker.recover_if_due())
+        with mock.patch('core.jobs.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(worker.recover_if_due(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.locked_at), (Job.QUEUED, '', None))
+
+
+class RunWorkersCommandTests(TransactionTestCase):
+    def test_burst_drains_queue_across_threads(self):
+        flaky_calls.clear()
+        for _ in range(6):
+            flaky.enqueue(fail_times=0)
+        out = StringIO()
+        call_command('run_workers', '--threads=3', '--burst', stdout=out)
+        self.assertIn('Processed 6 job(s).', out.getvalue())
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 6)
+
+
+class BenchmarkViewsCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=1, tenants_per_room=1, months=1)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='rentrix-media-')
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_renders_every_time_and_leaves_data_alone(self):
+        receipt = Receipt.objects.order_by('-id').first()
+        stored = default_storage.save('receipts/stored.pdf', ContentFile(b'%PDF-stored'))
+        Receipt.objects.filter(id=receipt.id).update(pdf_path=stored)
+        out = StringIO()
+        with mock.patch('core.async_views.render_receipt_pdf', return_value=b'%PDF-fresh') as render:
+            call_command('benchmark_views', '--iterations=2', '--warmup=1', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['endpoints']), {
+            'payment_tracking', 'search_api', 'tenant_list', 'payment_list', 'download_receipt', 'landlord_dashboard',
+        })
+        self.assertEqual({result['status'] for result in report['endpoints'].values()}, {200})
+        self.assertEqual((render.call_count, report['endpoints']['download_receipt']['bytes']), (3, 10))
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.pdf_path, stored)
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'receipts')), ['stored.pdf'])
+
+
+class MaintenanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=2, months=2)
+        cls.room = Room.objects.order_by('id').first()
+
+    def test_reconcile_occupancy_repairs_only_drifted_rooms(self):
+        Room.objects.filter(id=self.room.id).update(current_occupants=0, status='vacant')
+        self.assertEqual(maintenance.reconcile_occupancy(), 1)
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.current_occupants, self.room.status), (2, 'full'))
+        self.assertEqual(maintenance.reconcile_occupancy(), 0)
+
+    def test_clear_expired_sessions(self):
+        Session.objects.create(session_key='expired', session_data='', expire_date=timezone.now() - timedelta(days=1))
+        self.assertEqual(maintenance.clear_expired_sessions(), 1)
+
+    def test_warmed_grid_serves_page_and_follows_writes(self):
+        self.assertEqual(maintenance.warm_payment_tracking(), 4 * len({timezone.now().year, 2025}))
+        self.client.force_login(self.landlord)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('payment_tracking'))
+        self.assertEqual(response.context['available_years'], list(range(2025, timezone.now().year + 1)))
+        assignment = RoomTenant.objects.filter(room=self.room).order_by('id').first()
+        Payment.objects.create(
+            tenant=assignment.tenant, room=self.room, amount=Decimal('1350.00'),
+            payment_month=date(2025, 3, 1), status='paid',
+        )
+        row = next(row for row in self.client.get(reverse('payment_tracking')).context['rows']
+                   if row['tenant_id'] == assignment.tenant_id)
+        self.assertEqual(row['months'][:4], ['paid', 'paid', 'paid', 'unpaid'])
+
+    def test_grid_follows_renames_and_moves_in_its_property_only(self):
+        property_id = self.room.property_id
+        annex = Property.objects.create(name='Annex')
+        grid = payment_grid(2025, property_id)
+        fingerprint = data_fingerprint(property_id)
+        seed_rentrix(rooms=1, months=1, prefix='A', property=annex)
+        self.assertEqual(data_fingerprint(property_id), fingerprint)
+
+        tenant = RoomTenant.objects.filter(room=self.room).order_by('id').first().tenant
+        tenant.first_name = 'Renamed'
+        tenant.save()
+        self.room.room_number = 'R9999'
+        self.room.save()
+        rows = [row for row in payment_grid(2025, property_id) if row['tenant_id'] == tenant.id]
+        self.assertEqual((rows[0]['name'].split()[0], rows[0]['room_number']), ('Renamed', 'R9999'))
+
+        self.room.property = annex
+        self.room.save()
+        self.assertEqual(len(payment_grid(2025, property_id)), len(grid) - 2)
+
+    def test_run_scheduler_once_reports_each_job(self):
+        out = StringIO()
+        with self.assertLogs('core.maintenance', 'INFO'):
+            call_command('run_scheduler', '--once', '--job=reconcile_occupancy', '--job=optimize_database', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ['optimize_database', 'reconcile_occupancy'])
+        self.assertTrue(all(line.endswith('rows') for line in lines))
+
+
+class RentReminderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_rentrix(rooms=2, months=2, addons_per_tenant=1)
+
+    def test_due_reminders_is_one_query(self):
+        with self.assertNumQueries(1):
+            due = list(due_reminders(date(2025, 3, 1)))
+        self.assertEqual(len(due), 4)
+        self.assertEqual(due[0].addon_total, Decimal('100.00'))
+        self.assertEqual(list(due_reminders(date(2025, 2, 1))), [])
+
+    def test_batches_and_does_not_send_twice(self):
+        summary = send_reminders(date(2025, 3, 1), batch_size=3, delay=0)
+        self.assertEqual(summary, {'period': '2025-03', 'due': 4, 'sent': 4, 'batches': 2})
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(mail.outbox[0].subject, 'Rent reminder: March 2025 for Room R0000')
+        self.assertIn('Amount due: ₱1,450.00', mail.outbox[0].body)
+
+        summary = send_reminders(date(2025, 3, 1), delay=0)
+        self.assertEqual((summary['due'], len(mail.outbox)), (0, 4))
+
+
+    def test_names_are_not_html_escaped(self):
+        assignment = RoomTenant.objects.select_related('tenant', 'room').order_by('id').first()
+        User.objects.filter(id=assignment.tenant_id).update(first_name='Ann', last_name="O'Brien & Co")
+        Room.objects.filter(id=assignment.room_id).update(room_number='R&D')
+        send_reminders(date(2025, 3, 1), delay=0)
+        message = next(m for m in mail.outbox if m.to == [assignment.tenant.email])
+        self.assertEqual(message.subject, 'Rent reminder: March 2025 for Room R&D')
+        self.assertIn("Hi Ann O'Brien & Co,", message.body)
+
+class SignatureImageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='rentrix-media-')
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(self.landlord)
+
+    def upload(self, image, fmt='JPEG', **save_kwargs):
+        buffer = BytesIO()
+        image.save(buffer, format=fmt, **save_kwargs)
+        return self.client.post(reverse('manage_signature'), {
+            'signature': SimpleUploadedFile(f'scan.{fmt.lower()}', buffer.getvalue()),
+        })
+
+    def test_upload_is_downscaled_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0131] = 'Scanner 9000'
+        self.upload(Image.new('RGB', (4000, 1000), 'white'), exif=exif)
+        name = LandlordProfile.objects.get(user=self.landlord).signature.name
+        self.assertRegex(name, r'^signatures/signature-[0-9a-f]{12}\.png$')
+        with default_storage.open(name) as fh, Image.open(fh) as stored:
+            self.assertEqual((stored.format, stored.size), ('PNG', (1200, 300)))
+            self.assertFalse(stored.getexif())
+
+        derived = signature_derivative(name, 400)
+        with default_storage.open(derived) as fh, Image.open(fh) as small:
+            self.assertEqual(small.size, (400, 100))
+        self.assertTrue(signature_data_uri(name).startswith('data:image/png;base64,'))
+
+        self.upload(Image.new('RGBA', (300, 100)), fmt='PNG')
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(derived))
+
+    def test_rejects_non_images(self):
+        response = self.client.post(reverse('manage_signature'), {
+            'signature': SimpleUploadedFile('notes.png', b'not an image'),
+        }, follow=True)
+        self.assertContains(response, 'Upload a valid image file')
+        self.assertFalse(LandlordProfile.objects.get(user=self.landlord).signature)
+
+
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=2, months=1)
+        cls.receipt = Receipt.objects.select_related('payment__tenant').order_by('id').first()
+        cls.tenant = cls.receipt.payment.tenant
+        cls.other = User.objects.filter(is_staff=False).exclude(id=cls.tenant.id).first()
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='rentrix-media-')
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.name = default_storage.save('receipts/r1.pdf', ContentFile(b'%PDF-0123456789'))
+        Receipt.objects.filter(id=self.receipt.id).update(pdf_path=self.name)
+        self.url = f'{settings.MEDIA_URL}{self.name}'
+
+    def test_permissions(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.tenant)
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-0123456789')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.client.force_login(self.landlord)
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}../manage.py').status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    def test_landlords_only_see_their_properties(self):
+        outsider = User.objects.create_user(username='outsider', password='x', is_staff=True)
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        signature = default_storage.save('signatures/s1.png', ContentFile(b'png'))
+        LandlordProfile.objects.create(user=self.landlord, signature=signature)
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}{signature}').status_code, 404)
+        self.client.force_login(self.landlord)
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}{signature}').status_code, 200)
+        Property.objects.get(name='Main Property').landlords.add(outsider)
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}{signature}').status_code, 200)
+        self.client.force_login(self.tenant)
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}{signature}').status_code, 404)
+
+    def test_conditional_range_and_head(self):
+        self.client.force_login(self.landlord)
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=5-8'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 5-8/15')
+        self.assertEqual(b''.join(response.streaming_content), b'0123')
+        response = self.client.get(self.url, headers={'Range': 'bytes=-3'})
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-4', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=99-'}).status_code, 416)
+
+        response = self.client.head(self.url)
+        self.assertEqual((response.status_code, response['Content-Length'], response.content), (200, '15', b''))
+
+    @override_settings(RENTRIX_MEDIA_OFFLOAD='x-accel-redirect')
+    def test_offload(self):
+        self.client.force_login(self.tenant)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(RENTRIX_RATELIMITS={'search': '2/m', 'login': '2/m', 'login-account': '3/m'})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        Property.objects.create(name='Main Property').landlords.add(cls.landlord)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills(self):
+        self.assertEqual(parse_rate('30/10s'), (30, 10.0))
+        self.assertEqual([consume('search', 'a', now=0) for _ in range(3)], [0, 0, 30.0])
+        self.assertEqual(consume('search', 'a', now=30), 0)
+        self.assertEqual(consume('search', 'b', now=30), 0)
+
+    def test_search_is_limited_per_session(self):
+        self.client.force_login(self.landlord)
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('search_api'), {'q': 'R0'}).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('search_api'), {'q': 'R0'})
+        self.assertEqual((response.status_code, response['Retry-After']), (429, '30'))
+
+    def test_login_posts_are_limited_before_hashing(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('account_login')).status_code, 200)
+        for _ in range(2):
+            response = self.client.post(reverse('account_login'), {'login': 'landlord', 'password': 'wrong'})
+            self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('account_login'), {'login': 'landlord', 'password': 'x'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_rotating_session_cookies_share_the_address_bucket(self):
+        for n in range(2):
+            self.client.cookies[settings.SESSION_COOKIE_NAME] = f'made-up-session-{n:04d}'
+            self.assertNotEqual(self.client.get(reverse('search_api'), {'q': 'R0'}).status_code, 429)
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'made-up-session-0002'
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('search_api'), {'q': 'R0'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_client_ip_behind_trusted_proxy(self):
+        factory = RequestFactory()
+        request = factory.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.7, 10.0.0.1')
+        self.assertEqual(client_ip(request), '10.0.0.2')
+        with override_settings(RENTRIX_TRUSTED_PROXIES=['10.0.0.1', '10.0.0.2']):
+            self.assertEqual(client_ip(request), '203.0.113.7')
+            direct = factory.get('/', REMOTE_ADDR='198.51.100.9', HTTP_X_FORWARDED_FOR='1.2.3.4')
+            self.assertEqual(client_ip(direct), '198.51.100.9')
+            self.assertEqual(client_ip(factory.get('/', REMOTE_ADDR='10.0.0.2')), '10.0.0.2')
+
+
+class MultiPropertyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=2, months=1)
+        cls.main = Property.objects.get(name='Main Property')
+        cls.annex = Property.objects.create(name='Annex')
+        seed_rentrix(rooms=1, months=1, prefix='A', property=cls.annex)
+        cls.annex_room = cls.annex.rooms.get()
+        cls.annex_receipt = Receipt.objects.filter(payment__room=cls.annex_room).first()
+        # Room numbers are only unique within a property.
+        Room.objects.create(property=cls.annex, room_number='R0000')
+
+    def setUp(self):
+        self.client.force_login(self.landlord)
+
+    def test_views_only_show_current_property(self):
+        response = self.client.get(reverse('room_list'))
+        self.assertEqual({room.property_id for room in response.context['rooms']}, {self.main.id})
+        self.assertEqual(len(response.context['rooms']), 2)
+        self.assertEqual(self.client.get(reverse('room_detail', args=[self.annex_room.id])).status_code, 404)
+        self.assertEqual(len(self.client.get(reverse('payment_tracking')).context['rows']), 4)
+        self.assertEqual(self.client.get(reverse('dashboard_counters')).json()['total_rooms'], 2)
+        response = self.client.get(reverse('download_receipt', args=[self.annex_receipt.id]))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+    def test_switch_requires_membership(self):
+        response = self.client.post(reverse('switch_property'), {'property_id': self.annex.id})
+        self.assertEqual(response.status_code, 404)
+        self.annex.landlords.add(self.landlord)
+        self.client.post(reverse('switch_property'), {'property_id': self.annex.id})
+        response = self.client.get(reverse('room_list'))
+        self.assertEqual([room.room_number for room in response.context['rooms']], ['A0000', 'R0000'])
+        self.assertEqual(len(response.context['request'].properties), 2)
+
+    def test_api_rejects_cross_property_writes(self):
+        room = self.main.rooms.first()
+        annex_tenant = self.annex_room.tenants.first().tenant
+        response = self.client.post(
+            '/api/v1/rooms/', {'property': self.annex.id, 'room_number': 'X1', 'capacity': 2},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(
+            f'/api/v1/rooms/{room.id}/', {'property': self.annex.id}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            '/api/v1/assignments/', {'room': self.annex_room.id, 'tenant': annex_tenant.id, 'move_in_date': '2026-01-01'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        rows = [{'tenant': annex_tenant.id, 'room': room.id, 'amount': '1', 'payment_month': '2026-01-01'}]
+        response = self.client.post('/api/v1/payments/bulk/', rows, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        rows = [{'room_tenant': self.annex_room.tenants.first().id, 'description': 'Wifi', 'amount': '5'}]
+        response = self.client.post('/api/v1/addons/bulk/', rows, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        room.refresh_from_db()
+        self.assertEqual(room.property_id, self.main.id)
+
+    def test_landlord_without_property_gets_their_own(self):
+        newcomer = User.objects.create_user(username='newcomer', password='x', is_staff=True)
+        self.client.force_login(newcomer)
+        for _ in range(2):
+            response = self.client.get(reverse('room_list'))
+            self.assertEqual(response.status_code, 200)
+            self.assertQuerySetEqual(response.context['rooms'], [])
+        property = Property.objects.get(landlords=newcomer)
+        self.assertEqual((property.name, list(property.landlords.all())), ("newcomer's property", [newcomer]))
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='x', email='admin@example.com')
+        seed_rentrix(rooms=2, months=2)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:core_{model}_changelist')
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_changelists_do_not_grow_with_rows(self):
+        small = {model: self.changelist_queries(model) for model in ('payment', 'roomtenant', 'receipt')}
+        seed_rentrix(rooms=10, months=3, prefix='S')
+        large = {model: self.changelist_queries(model) for model in ('payment', 'roomtenant', 'receipt')}
+        self.assertEqual(small, large)
+
+    def test_search_uses_ranges_and_exact_matches(self):
+        payment = Payment.objects.select_related('tenant', 'room').first()
+        for model, term, expected in (
+            ('payment', payment.receipt_number.lower(), payment),
+            ('payment', payment.tenant.username[:3], payment),
+            ('receipt', payment.receipt_number, payment.receipt),
+            ('roomtenant', payment.room.room_number, RoomTenant.objects.filter(room=payment.room).first()),
+            ('room', payment.room.room_number.lower()[:2], payment.room),
+        ):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse(f'admin:core_{model}_changelist'), {'q': term})
+            self.assertIn(expected, response.context['cl'].result_list, (model, term))
+            self.assertFalse([q['sql'] for q in ctx.captured_queries if ' LIKE ' in q['sql']], (model, term))
+
+    def test_bulk_actions(self):
+        Payment.objects.update(status='unpaid')
+        url = reverse('admin:core_payment_changelist')
+        ids = list(Payment.objects.values_list('id', flat=True)[:3])
+        self.client.post(url, {'action': 'mark_paid', '_selected_action': ids})
+        self.assertEqual(Payment.objects.filter(status='paid').count(), 3)
+
+        Receipt.objects.filter(payment_id__in=ids).update(pdf_path='receipts/missing.pdf')
+        with override_settings(RENTRIX_JOBS_EAGER=False):
+            self.client.post(url, {'action': 'regenerate_payment_receipts', '_selected_action': ids})
+        self.assertEqual(Receipt.objects.filter(payment_id__in=ids, pdf_path='').count(), 3)
+        self.assertEqual(Job.objects.filter(task='core.tasks.render_receipt').count(), 3)
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=2, tenants_per_room=1, archived_per_room=1, months=1)
+        cls.room = Room.objects.get(room_number='R0000')
+        Room.objects.filter(room_number='R0001').update(status='full')
+        cls.maria = User.objects.create_user(username='msantos', first_name='Maria', last_name='Santos', password='x')
+        cls.assigned = RoomTenant.objects.get(room=cls.room, status='active').tenant
+
+    def setUp(self):
+        self.client.force_login(self.landlord)
+
+    def results(self, name, q):
+        return [r['text'] for r in self.client.get(reverse(name), {'q': q}).json()['results']]
+
+    def test_tenant_prefix_lookup(self):
+        self.assertEqual(self.results('tenant_autocomplete', 'mar'), ['Maria Santos (msantos)'])
+        self.assertEqual(self.results('tenant_autocomplete', 'Santos'), ['Maria Santos (msantos)'])
+        self.assertEqual(self.results('tenant_autocomplete', 'ntos'), [])
+        # Archived tenants are offered again; active ones and staff are not.
+        self.assertEqual(
+            self.results('tenant_autocomplete', 'tenant_'),
+            ['Tenant1 R0000 (tenant_R0000_1)', 'Tenant1 R0001 (tenant_R0001_1)'],
+        )
+        self.assertEqual(self.results('tenant_autocomplete', 'landlord'), [])
+
+    def test_room_lookup_lists_vacant_rooms(self):
+        self.assertEqual(self.results('room_autocomplete', ''), ['Room R0000'])
+        self.assertEqual(self.results('room_autocomplete', 'r00'), ['Room R0000'])
+        self.assertEqual(self.results('room_autocomplete', 'X'), [])
+
+    def test_form_embeds_only_selected_options(self):
+        response = self.client.get(reverse('roomtenant_add', args=[self.room.id]))
+        self.assertNotContains(response, 'msantos')
+        self.assertContains(response, 'data-autocomplete-url="/api/autocomplete/tenants/"')
+        self.assertContains(response, f'<option value="{self.room.id}" selected>Room R0000</option>', html=True)
+
+        url = reverse('roomtenant_add', args=[self.room.id])
+        data = {'room': self.room.id, 'move_in_date': '2025-02-01'}
+        response = self.client.post(url, {**data, 'tenant': self.assigned.id})
+        self.assertIn('tenant', response.context['form'].errors)
+        response = self.client.post(url, {**data, 'tenant': self.maria.id})
+        self.assertRedirects(response, reverse('room_detail', args=[self.room.id]))
+        self.assertTrue(RoomTenant.objects.filter(tenant=self.maria, status='active').exists())
+
+
+def fake_render_and_store(tenant_id, year):
+    return tenant_id, f'statements/{year}/{tenant_id}-{os.getpid()}.pdf'
+
+
+def fake_warm_worker():
+    pass
+
+
+class StatementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=1, tenants_per_room=1, months=14, addons_per_tenant=1)
+        cls.tenant = User.objects.get(username='tenant_R0000_0')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='rentrix-media-')
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_statement_covers_one_year(self):
+        self.assertEqual(statement_tenants(2026), [self.tenant.id])
+        context = statement_context(self.tenant, 2025)
+        self.assertEqual(len(context['payments']), 12)
+        self.assertEqual(context['total_paid'], sum(p.amount for p in context['payments']))
+        html = render_statement_html(self.tenant, 2026)
+        self.assertIn('February 2026', html)
+        self.assertNotIn('December 2025', html)
+        self.assertIn('Appliance 1', html)
+
+    def test_worker_pool_renders_in_other_processes(self):
+        second = User.objects.create_user(username='second', password='x')
+        done = []
+        with (
+            mock.patch.object(statements, 'render_and_store', fake_render_and_store),
+            mock.patch.object(statements, 'warm_worker', fake_warm_worker),
+            override_settings(RENTRIX_STATEMENT_WORKERS=2),
+        ):
+            names, failed = statements.generate_statements(
+                2025, [self.tenant.id, second.id], on_done=lambda *args: done.append(args),
+            )
+        self.assertEqual((set(names), failed), ({self.tenant.id, second.id}, {}))
+        self.assertNotIn(f'-{os.getpid()}.pdf', ''.join(names.values()))
+        self.assertEqual(len(done), 2)
+        self.assertEqual(
+            dict(Statement.objects.filter(year=2025).values_list('tenant_id', 'pdf_path')), names,
+        )
+
+    def test_zero_workers_setting_renders_in_process(self):
+        with (
+            mock.patch.object(statements, 'render_and_store', fake_render_and_store),
+            override_settings(RENTRIX_STATEMENT_WORKERS=0),
+        ):
+            names, _ = statements.generate_statements(2025, [self.tenant.id])
+        self.assertEqual(names, {self.tenant.id: f'statements/2025/{self.tenant.id}-{os.getpid()}.pdf'})
+
+    def test_recorded_statements_are_served_to_their_tenant(self):
+        old = default_storage.save('statements/2025/old.pdf', ContentFile(b'%PDF-old'))
+        record_statements(2025, {self.tenant.id: old})
+        new = default_storage.save('statements/2025/new.pdf', ContentFile(b'%PDF-new'))
+        record_statements(2025, {self.tenant.id: new})
+        self.assertEqual(Statement.objects.get(tenant=self.tenant, year=2025).pdf_path, new)
+        self.assertFalse(default_storage.exists(old))
+
+        self.client.force_login(self.tenant)
+        self.assertContains(self.client.get(reverse('payment_history')), f'{settings.MEDIA_URL}{new}')
+        self.assertEqual(b''.join(self.client.get(f'{settings.MEDIA_URL}{new}').streaming_content), b'%PDF-new')
+        other = User.objects.create_user(username='other', password='x')
+        other.security_profile.force_password_change = False
+        other.security_profile.save()
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}{new}').status_code, 404)
+
+    @skipUnless(HAS_WEASYPRINT, 'WeasyPrint system libraries are not installed')
+    def test_command_renders_statements(self):
+        out = StringIO()
+        call_command('generate_statements', year=2025, workers=0, stdout=out)
+        self.assertIn('2025: 1 statement(s) written, 0 failed', out.getvalue())
+        statement = Statement.objects.get(tenant=self.tenant, year=2025)
+        with default_storage.open(statement.pdf_path, 'rb') as fh:
+            self.assertTrue(fh.read().startswith(b'%PDF'))
+
+
+class OccupancyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=2, tenants_per_room=1, archived_per_room=1, months=1)
+        cls.rooms = list(Room.objects.order_by('id'))
+        other = Property.objects.create(name='Elsewhere')
+        Room.objects.create(property=other, room_number='X1', capacity=2, current_occupants=2)
+
+    def test_snapshot_upserts_one_row_per_room_and_day(self):
+        day = date(2025, 3, 3)
+        self.assertEqual(snapshot_occupancy(day), 3)
+        Room.objects.filter(id=self.rooms[0].id).update(current_occupants=2)
+        self.assertEqual(maintenance.record_occupancy(), 3)
+        snapshot_occupancy(day)
+        self.assertEqual(OccupancySnapshot.objects.filter(date=day).count(), 3)
+        self.assertEqual(OccupancySnapshot.objects.get(room=self.rooms[0], date=day).occupants, 2)
+
+    def test_downsampled_series(self):
+        # 2025-03-01 is a Saturday: days 1-2 fall in the week of Feb 24.
+        OccupancySnapshot.objects.bulk_create([
+            OccupancySnapshot(room=room, date=date(2025, 3, 1) + timedelta(days=n), occupants=n % 3, capacity=2)
+            for n in range(45) for room in self.rooms
+        ])
+        self.client.force_login(self.landlord)
+        url = reverse('api_occupancy')
+        months = self.client.get(url).json()['series']
+        self.assertEqual([(p['period'], p['days']) for p in months], [('2025-03-01', 31), ('2025-04-01', 14)])
+        march = sum(n % 3 for n in range(31)) * 2
+        self.assertEqual(months[0]['occupants'], round(march / 31, 2))
+        self.assertEqual(months[0]['capacity'], 4)
+        self.assertEqual(months[0]['rate'], round(march / (31 * 4), 4))
+
+        weeks = self.client.get(url, {'interval': 'week', 'end': '2025-03-09'}).json()['series']
+        self.assertEqual([(p['period'], p['days']) for p in weeks], [('2025-02-24', 2), ('2025-03-03', 7)])
+        days = self.client.get(url, {'interval': 'day', 'start': '2025-04-14', 'room': self.rooms[0].id}).json()
+        self.assertEqual(days['series'], [{'period': '2025-04-14', 'days': 1, 'occupants': 2, 'capacity': 2, 'rate': 1.0}])
+        self.assertEqual(self.client.get(url, {'interval': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2025-13-01'}).status_code, 400)
+
+
+class RowTemplateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=3, archived_per_room=1, months=3, addons_per_tenant=1)
+
+    def setUp(self):
+        self.client.force_login(self.landlord)
+
+    def render(self, name, engine):
+        with override_settings(RENTRIX_ROWS_ENGINE=engine):
+            html = self.client.get(reverse(name)).content.decode()
+        # Masked CSRF tokens and the live stream's start time differ per render.
+        html = re.sub(r'name="csrfmiddlewaretoken" value="[^"]+"', 'name="csrfmiddlewaretoken"', html)
+        html = re.sub(r'since=\d+', 'since=', html)
+        return re.sub(r'\s+', ' ', html)
+
+    def test_jinja2_rows_match_django_rows(self):
+        for name, row in (('payment_tracking', 'Tenant1'), ('tenant_list', 'r0002_2@example.com'), ('payment_list', 'R0002')):
+            with self.subTest(name):
+                jinja2_html = self.render(name, 'jinja2')
+                self.assertEqual(jinja2_html, self.render(name, 'django'))
+                self.assertIn(row, jinja2_html)
+
+    def test_url_helper_matches_reverse(self):
+        self.assertEqual(jinja2_url('roomtenant_edit', 12, 345), reverse('roomtenant_edit', args=[12, 345]))
+        self.assertEqual(jinja2_url('tenant_list'), reverse('tenant_list'))
+        self.assertEqual(jinja2_url('add_payment', '7'), reverse('add_payment', args=['7']))
+
+
+class PwaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=1, tenants_per_room=1, months=2)
+        cls.tenant = User.objects.get(username='tenant_R0000_0')
+        cls.payment = Payment.objects.filter(tenant=cls.tenant).order_by('payment_month').first()
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='rentrix-media-')
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_manifest_and_service_worker(self):
+        manifest = self.client.get(reverse('web_manifest'))
+        self.assertEqual(manifest['Content-Type'], 'application/manifest+json')
+        self.assertEqual(manifest.json()['start_url'], reverse('tenant_dashboard'))
+        worker = self.client.get(reverse('service_worker'))
+        self.assertEqual(worker['Content-Type'], 'text/javascript')
+        self.assertContains(worker, reverse('tenant_payments_data'))
+        self.assertEqual(self.client.get(reverse('service_worker'), headers={'If-None-Match': worker['ETag']}).status_code, 304)
+
+        self.client.force_login(self.tenant)
+        self.assertContains(self.client.get(reverse('tenant_dashboard')), reverse('service_worker'))
+
+    def test_tenant_pages_revalidate_with_etags(self):
+        self.client.force_login(self.tenant)
+        for name in ('tenant_dashboard', 'tenant_payment_tracker', 'payment_history', 'tenant_payments_data'):
+            url = reverse(name)
+            response = self.client.get(url)
+            self.assertIn('no-cache', response['Cache-Control'])
+            # User and password-change check (the session is cached), then the version query.
+            with self.assertNumQueries(3):
+                self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+        etag = self.client.get(reverse('tenant_dashboard'))['ETag']
+        self.payment.status = 'unpaid'
+        self.payment.save()
+        response = self.client.get(reverse('tenant_dashboard'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_payments_data_and_receipt_validators(self):
+        name = default_storage.save('receipts/r1.pdf', ContentFile(b'%PDF-1'))
+        Receipt.objects.filter(payment=self.payment).update(pdf_path=name, updated_at=timezone.now())
+        self.client.force_login(self.tenant)
+        data = self.client.get(reverse('tenant_payments_data')).json()
+        self.assertEqual((data['tenant'], data['room']), (self.tenant.id, 'R0000'))
+        row = dict(zip(data['fields'], data['payments'][-1]))
+        self.assertEqual(row['month'], self.payment.payment_month.strftime('%Y-%m'))
+        self.assertEqual(row['receipt'], self.payment.receipt.id)
+
+        url = reverse('download_receipt', args=[row['receipt']])
+        response = self.client.get(url)
+        self.assertEqual((response.content, response['ETag']), (b'%PDF-1', row['receipt_etag']))
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': row['receipt_etag']}).status_code, 304)
+
+        self.client.force_login(self.landlord)
+        self.assertEqual(self.client.get(reverse('tenant_payments_data')).status_code, 403)
+
+
+class TenantSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_rentrix(rooms=1, tenants_per_room=1, months=3, addons_per_tenant=2)
+        cls.tenant = User.objects.get(username='tenant_R0000_0')
+        cls.assignment = RoomTenant.objects.get(tenant=cls.tenant)
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.user = self.tenant
+        return request
+
+    def test_summary_is_built_once_per_version(self):
+        with self.assertNumQueries(4):
+            summary = tenant_summary(self.request())
+        self.assertEqual(len(summary['payments']), 3)
+        self.assertEqual(summary['room'].room_number, 'R0000')
+        with self.assertNumQueries(1):
+            self.assertEqual(tenant_summary(self.request()), summary)
+
+        AddOn.objects.create(room_tenant=self.assignment, amount=Decimal('50.00'), description='Fan')
+        summary = tenant_summary(self.request())
+        addons = sum(addon.amount for addon in self.assignment.addons.all())
+        self.assertEqual(summary['addon_total'], addons)
+        self.assertEqual(summary['monthly_total'], BASE_RENT + addons)
+
+    def test_dashboard_summary_is_capped(self):
+        Payment.objects.bulk_create([
+            Payment(
+                tenant=self.tenant, room=self.assignment.room, amount=Decimal('1.00'), status='paid',
+                payment_month=date(2020 + n // 12, n % 12 + 1, 1), receipt_number=f'OLD-{n}',
+            )
+            for n in range(20)
+        ])
+        with self.assertNumQueries(3):
+            summary = tenant_summary(self.request(), recent=True)
+        self.assertEqual((len(summary['payments']), summary['payment_count']), (RECENT_PAYMENTS, 23))
+        self.assertIsNone(summary['statements'])
+        self.assertEqual(len(tenant_summary(self.request())['payments']), 23)
+
+    def test_current_balance(self):
+        period = timezone.localdate().replace(day=1)
+        monthly = tenant_summary(self.request())['monthly_total']
+        Payment.objects.create(
+            tenant=self.tenant, room=self.assignment.room, amount=monthly - 100, payment_month=period, status='paid',
+        )
+        current = tenant_summary(self.request())['current']
+        self.assertEqual((current['period'], current['due'], current['balance']), (period, monthly, Decimal('100.00')))
+
+
+class SessionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=1, months=2)
+        cls.property = Property.objects.get()
+
+    def test_pages_neither_read_nor_write_the_session_table(self):
+        self.client.force_login(self.landlord)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('payment_tracking'), {'year': 2031})
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if 'django_session' in q['sql']], [])
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        current_year = timezone.now().year
+        self.assertEqual(response.context['available_years'], sorted({2025, current_year, 2031}))
+        self.assertEqual(self.client.get(reverse('payment_tracking')).context['available_years'][-1], current_year)
+
+        response = self.client.post(reverse('switch_property'), {'property_id': self.property.id})
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+
+class PaymentYearsTests(TestCase):
+    def test_far_years_are_clamped_and_listed_once(self):
+        current_year = timezone.now().year
+        self.assertEqual(parse_year('9999'), current_year + YEARS_AHEAD)
+        self.assertEqual(parse_year('-3'), current_year - YEARS_BACK)
+        self.assertEqual((parse_year('x'), parse_year(None)), (2025, 2025))
+        state = {'first_payment': date(current_year - 1, 3, 1), 'last_payment': date(current_year, 2, 1)}
+        self.assertEqual(
+            payment_years(state, current_year + YEARS_AHEAD),
+            [current_year - 1, current_year, current_year + YEARS_AHEAD],
+        )
+        self.assertEqual(payment_years(state, current_year - 1), [current_year - 1, current_year])
+
+
+class RoomBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = User.objects.create_user(username='landlord', password='x', is_staff=True)
+        seed_rentrix(rooms=2, tenants_per_room=1, months=1)
+        cls.property = Property.objects.get()
+
+    def setUp(self):
+        self.client.force_login(self.landlord)
+
+    def test_parse_room_numbers(self):
+        self.assertEqual(parse_room_numbers('101-103, A1-A2,007-009, B12'), [
+            '101', '102', '103', 'A1', 'A2', '007', '008', '009', 'B12',
+        ])
+        for pattern in ('140-101', '1-1000', '101, 101', ' , ', '12345678901', 'A1-B12', 'B-12', '101-'):
+            with self.subTest(pattern=pattern), self.assertRaises(ValueError):
+                parse_room_numbers(pattern)
+
+    def test_bulk_add_creates_rooms_in_fixed_queries(self):
+        url = reverse('room_bulk_add')
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(url, {'pattern': '101-102', 'capacity': 2})
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(url, {'pattern': '201-240', 'capacity': 3})
+        self.assertRedirects(response, reverse('room_list'))
+        self.assertEqual(len(many), len(few))
+        rooms = Room.objects.filter(property=self.property, room_number__startswith='2')
+        self.assertEqual(rooms.count(), 40)
+        self.assertEqual(set(rooms.values_list('capacity', 'current_occupants', 'status')), {(3, 0, 'vacant')})
+
+        response = self.client.post(url, {'pattern': '239-241', 'capacity': 3})
+        self.assertContains(response, 'already exist in this property: 239, 240')
+        self.assertFalse(Room.objects.filter(room_number='241').exists())
+
+    def test_bulk_capacity_recomputes_status(self):
+        occupied = Room.objects.get(room_number='R0000')
+        empty = Room.objects.create(property=self.property, room_number='E1', capacity=1, current_occupants=0)
+        with CaptureQueriesContext(connection) as one:
+            self.client.post(reverse('room_bulk_capacity'), {'rooms': [empty.id], 'capacity': 2})
+        with CaptureQueriesContext(connection) as two:
+            response = self.client.post(reverse('room_bulk_capacity'), {'rooms': [occupied.id, empty.id], 'capacity': 1})
+        self.assertRedirects(response, reverse('room_list'))
+        self.assertEqual(len(two), len(one))
+        self.assertEqual(
+            dict(Room.objects.filter(id__in=[occupied.id, empty.id]).values_list('room_number', 'status')),
+            {'R0000': 'full', 'E1': 'vacant'},
+        )
+        self.assertEqual(set(Room.objects.filter(id__in=[occupied.id, empty.id]).values_list('capacity', flat=True)), {1})
+
+    def test_bulk_capacity_keeps_room_for_current_occupants(self):
+        occupied = Room.objects.get(room_number='R0000')
+        Room.objects.filter(id=occupied.id).update(capacity=3, current_occupants=2)
+        response = self.client.post(reverse('room_bulk_capacity'), {'rooms': [occupied.id], 'capacity': 1}, follow=True)
+        self.assertContains(response, 'These rooms have more occupants than 1: R0000')
+        occupied.refresh_from_db()
+        self.assertEqual(occupied.capacity, 3)
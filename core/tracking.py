@@ -0,0 +1,138 @@
+"""
+Payment tracking grid: one row per active assignment of a property with
+each month's payment state, built from three queries and cached in the
+shared cache.
+
+Cache keys embed a fingerprint of the property's rows the grid reads (the
+newest ``updated_at`` and the row count of each table, so deletions
+count too), so any write from any process produces a new key and stale
+grids simply age out. Renaming a tenant touches their
+assignments (see core.signals), so names are covered too.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import AddOn, Payment, Property, Room, RoomTenant
+
+MONTHS = range(1, 13)
+YEARS_BACK = 50
+YEARS_AHEAD = 10
+
+
+def per_property(model, property_field, aggregate):
+    return Subquery(
+        model.objects.filter(**{property_field: OuterRef('pk')}).order_by()
+        .values(property_field).annotate(value=aggregate).values('value')
+    )
+
+
+def tracking_state(property_id):
+    """
+    One query: a fingerprint of the newest update and row count of the
+    property's rooms, assignments, add-ons and payments, and its first and
+    last payment month. Counts catch deletions and rows moved to another
+    property, which the source never sees as an update.
+    """
+    row = Property.objects.filter(pk=property_id).values_list(
+        per_property(Room, 'property', Max('updated_at')),
+        per_property(Room, 'property', Count('id')),
+        per_property(RoomTenant, 'room__property', Max('updated_at')),
+        per_property(RoomTenant, 'room__property', Count('id')),
+        per_property(AddOn, 'room_tenant__room__property', Max('updated_at')),
+        per_property(AddOn, 'room_tenant__room__property', Count('id')),
+        per_property(Payment, 'room__property', Max('updated_at')),
+        per_property(Payment, 'room__property', Count('id')),
+        per_property(Payment, 'room__property', Min('payment_month')),
+        per_property(Payment, 'room__property', Max('payment_month')),
+    ).first() or (None,) * 10
+    return {
+        'fingerprint': hashlib.md5(repr(row).encode()).hexdigest()[:16],
+        'first_payment': row[-2],
+        'last_payment': row[-1],
+    }
+
+
+def data_fingerprint(property_id):
+    return tracking_state(property_id)['fingerprint']
+
+
+def build_payment_grid(year, property_id):
+    """
+    Rows of ``{'tenant_id', 'name', 'room_number', 'addons', 'months'}`` where
+    ``months`` holds 'paid', 'unpaid' or 'invalid' (before move-in) for
+    January to December of ``year``.
+    """
+    assignments = (
+        RoomTenant.objects.filter(room__property=property_id, status='active')
+        .select_related('tenant', 'room')
+        .prefetch_related('addons')
+        .order_by('room__room_number')
+    )
+    paid = set(
+        Payment.objects.filter(room__property=property_id, payment_month__year=year)
+        .values_list('tenant_id', 'payment_month__month')
+    )
+    rows = []
+    for assignment in assignments:
+        tenant, move_in = assignment.tenant, assignment.move_in_date
+        months = []
+        for month in MONTHS:
+            if move_in.year > year or (move_in.year == year and move_in.month > month):
+                months.append('invalid')
+            else:
+                months.append('paid' if (tenant.id, month) in paid else 'unpaid')
+        rows.append({
+            'tenant_id': tenant.id,
+            'name': tenant.get_full_name() or tenant.username,
+            'room_number': assignment.room.room_number,
+            'addons': [
+                {'description': addon.description, 'amount': addon.amount} for addon in assignment.addons.all()
+            ],
+            'months': months,
+        })
+    return rows
+
+
+def payment_grid(year, property_id, fingerprint=None):
+    fingerprint = fingerprint or data_fingerprint(property_id)
+    return cache.get_or_set(
+        f'payment_tracking:{property_id}:{year}:{fingerprint}',
+        lambda: build_payment_grid(year, property_id),
+        settings.RENTRIX_TRACKING_CACHE_SECONDS,
+    )
+
+
+def parse_year(value, default=2025):
+    """
+    The ``?year=`` of the tracking page: ``default`` when missing or not a
+    number, otherwise clamped to YEARS_BACK years before and YEARS_AHEAD
+    after this one.
+    """
+    try:
+        year = int(value)
+    except (TypeError, ValueError):
+        return default
+    current_year = timezone.now().year
+    return min(max(year, current_year - YEARS_BACK), current_year + YEARS_AHEAD)
+
+
+def payment_years(state, selected_year):
+    """
+    Years offered by the tracking grid: from the first month with a payment
+    through the last one or this year, whichever is later, plus
+    ``selected_year`` when it falls outside them. ``state`` is the
+    property's ``tracking_state``.
+    """
+    first_payment, last_payment = state['first_payment'], state['last_payment']
+    current_year = timezone.now().year
+    first = min(first_payment.year if first_payment else current_year, current_year)
+    last = max(last_payment.year if last_payment else current_year, current_year)
+    years = list(range(first, last + 1))
+    if selected_year not in years:
+        years.append(selected_year)
+        years.sort()
+    return years
@@ -1,17 +1,24 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard_redirect, name='dashboard'),
-    path('landlord/dashboard/', views.landlord_dashboard, name='landlord_dashboard'),
+    path('property/switch/', views.switch_property, name='switch_property'),
+    path('landlord/dashboard/', async_views.landlord_dashboard, name='landlord_dashboard'),
     path('tenant/dashboard/', views.tenant_dashboard, name='tenant_dashboard'),
     path('rooms/', views.room_list, name='room_list'),
     path('rooms/add/', views.room_add, name='room_add'),
+    path('rooms/add/bulk/', views.room_bulk_add, name='room_bulk_add'),
+    path('rooms/capacity/', views.room_bulk_capacity, name='room_bulk_capacity'),
     path('rooms/<int:room_id>/', views.room_detail, name='room_detail'),
     path('rooms/<int:room_id>/edit/', views.room_edit, name='room_edit'),
     path('rooms/<int:room_id>/delete/', views.room_delete, name='room_delete'),
-    path('api/search/', views.search_api, name='search_api'),
+    path('api/search/', async_views.search_api, name='search_api'),
+    path('api/autocomplete/tenants/', async_views.tenant_autocomplete, name='tenant_autocomplete'),
+    path('api/autocomplete/rooms/', async_views.room_autocomplete, name='room_autocomplete'),
+    path('api/counters/', async_views.dashboard_counters, name='dashboard_counters'),
+    path('live/events/', async_views.live_events, name='live_events'),
     path('rooms/<int:room_id>/tenants/add/', views.roomtenant_add, name='roomtenant_add'),
     path('rooms/<int:room_id>/tenants/<int:assignment_id>/edit/', views.roomtenant_edit, name='roomtenant_edit'),
     path('rooms/<int:room_id>/tenants/<int:assignment_id>/archive/', views.roomtenant_archive, name='roomtenant_archive'),
@@ -25,7 +32,7 @@ urlpatterns = [
     path('payments/tracking/', views.payment_tracking, name='payment_tracking'),
     path('payments/add/<int:tenant_id>/', views.add_payment, name='add_payment'),
     path('payments/history/', views.payment_history, name='payment_history'),
-    path('receipts/<int:receipt_id>/download/', views.download_receipt, name='download_receipt'),
+    path('receipts/<int:receipt_id>/download/', async_views.download_receipt, name='download_receipt'),
     path('landlord/signature/', views.manage_signature, name='manage_signature'),
     path('tenants/<int:tenant_id>/payments/', views.tenant_payment_history, name='tenant_payment_history'),
     path('tenants/create/', views.tenant_create, name='tenant_create'),
@@ -33,4 +40,8 @@ urlpatterns = [
     path('tenant/rooms/', views.tenant_room_list, name='tenant_room_list'),
     path('tenant/rooms/<int:room_id>/', views.tenant_room_detail, name='tenant_room_detail'),
     path('tenant/payments/tracker/', views.tenant_payment_tracker, name='tenant_payment_tracker'),
+    path('api/tenant/payments/', views.tenant_payments_data, name='tenant_payments_data'),
+    path('manifest.webmanifest', views.web_manifest, name='web_manifest'),
+    path('sw.js', views.service_worker, name='service_worker'),
+    path('metrics', views.metrics, name='metrics'),
 ] 
\ No newline at end of file
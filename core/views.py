@@ -1,16 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.views.decorators.http import require_POST, require_safe
 from django.contrib import messages
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse, Http404
-from django.template.loader import render_to_string
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, Http404
+from django.urls import reverse
+from django.core.exceptions import ValidationError
 from django.conf import settings  # <-- Added this import for PDF fix
-from weasyprint import HTML
 from decimal import Decimal
-from .models import Room, RoomTenant, Payment, Receipt, LandlordProfile, AddOn
+from .models import BASE_RENT, Room, RoomTenant, Payment, Receipt, LandlordProfile, AddOn
 from .models import TenantSecurityProfile
+from .images import delete_signature, normalize_signature
+from .properties import current_property, select_property, tenant_properties
+from .tasks import render_receipt
+from .tracking import parse_year, payment_grid, payment_years, tracking_state
+from .rooms import provision_rooms, set_capacity
+from .media import can_access, media_response
+from .summary import tenant_summary
+from .pwa import manifest, revalidated_response, service_worker_context, tenant_payments, tenant_revalidated
+from .ratelimit import client_ip, ratelimit
+from allauth.account.views import login as allauth_login
+from .metrics import collect as collect_metrics
 from .forms import (
     RoomForm,
+    RoomBatchForm,
+    RoomCapacityForm,
     RoomTenantForm,
     PaymentForm,
     AddOnForm,
@@ -21,8 +36,8 @@ from django.contrib.auth.models import User
 from django.contrib.auth.forms import PasswordChangeForm
 from datetime import datetime
 import calendar
+import json
 from django.db.models import Q
-from urllib.parse import quote
 
 def is_landlord(user):
     return user.is_staff
@@ -34,33 +49,13 @@ def home(request):
     return redirect('tenant_dashboard')
 
 @login_required
-@user_passes_test(is_landlord)
-def landlord_dashboard(request):
-    total_rooms = Room.objects.count()
-    total_tenants = RoomTenant.objects.filter(status='active').count()
-    total_payments = Payment.objects.filter(status='paid').count()
-    recent_payments = Payment.objects.filter(status='paid').order_by('-payment_date')[:5]
-    
-    context = {
-        'total_rooms': total_rooms,
-        'total_tenants': total_tenants,
-        'total_payments': total_payments,
-        'recent_payments': recent_payments,
-    }
-    return render(request, 'core/landlord_dashboard.html', context)
-
-@login_required
+@tenant_revalidated
 def tenant_dashboard(request):
-    try:
-        room_assignment = RoomTenant.objects.get(tenant=request.user, status='active')
-        payments = Payment.objects.filter(tenant=request.user).order_by('-payment_date')
-    except RoomTenant.DoesNotExist:
-        room_assignment = None
-        payments = None
-    
+    summary = tenant_summary(request, recent=True)
     context = {
-        'room_assignment': room_assignment,
-        'payments': payments,
+        'summary': summary,
+        'room_assignment': summary['assignment'],
+        'payments': summary['recent_payments'],
         'tenant_name': request.user.get_full_name(),
     }
     return render(request, 'core/tenant_dashboard.html', context)
@@ -68,7 +63,7 @@ def tenant_dashboard(request):
 @login_required
 @user_passes_test(is_landlord)
 def room_list(request):
-    rooms = Room.objects.all().order_by('room_number')
+    rooms = Room.objects.filter(property=current_property(request)).order_by('room_number')
     q = request.GET.get('q', '').strip()
     status = request.GET.get('status', '').strip()
 
@@ -87,8 +82,9 @@ def room_list(request):
 @login_required
 @user_passes_test(is_landlord)
 def room_add(request):
+    room = Room(property=current_property(request))
     if request.method == 'POST':
-        form = RoomForm(request.POST)
+        form = RoomForm(request.POST, instance=room)
         if form.is_valid():
             room = form.save(commit=False)
             # ensure defaults
@@ -99,20 +95,50 @@ def room_add(request):
             messages.success(request, 'Room created successfully!')
             return redirect('room_detail', room_id=room.id)
     else:
-        form = RoomForm()
+        form = RoomForm(instance=room)
     return render(request, 'core/room_form.html', {'form': form, 'room': None})
 
+@login_required
+@user_passes_test(is_landlord)
+def room_bulk_add(request):
+    property = current_property(request)
+    if request.method == 'POST':
+        form = RoomBatchForm(request.POST, property=property)
+        if form.is_valid():
+            rooms = provision_rooms(property, form.cleaned_data['pattern'], form.cleaned_data['capacity'])
+            messages.success(request, f'{len(rooms)} room(s) created successfully!')
+            return redirect('room_list')
+    else:
+        form = RoomBatchForm(property=property)
+    return render(request, 'core/room_batch_form.html', {'form': form})
+
+@login_required
+@user_passes_test(is_landlord)
+@require_POST
+def room_bulk_capacity(request):
+    form = RoomCapacityForm(request.POST, property=current_property(request))
+    if form.is_valid():
+        capacity = form.cleaned_data['capacity']
+        updated = set_capacity(form.cleaned_data['rooms'], capacity)
+        messages.success(request, f'Capacity set to {capacity} for {updated} room(s).')
+    else:
+        messages.error(
+            request,
+            ' '.join(form.non_field_errors()) or 'Select at least one room and enter a capacity of 1 or more.',
+        )
+    return redirect('room_list')
+
 @login_required
 @user_passes_test(is_landlord)
 def room_detail(request, room_id):
-    room = get_object_or_404(Room, id=room_id)
-    tenants = RoomTenant.objects.filter(room=room, status='active')
+    room = get_object_or_404(Room, id=room_id, property=current_property(request))
+    tenants = RoomTenant.objects.filter(room=room, status='active').select_related('tenant')
     return render(request, 'core/room_detail.html', {'room': room, 'tenants': tenants})
 
 @login_required
 @user_passes_test(is_landlord)
 def room_edit(request, room_id):
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room, id=room_id, property=current_property(request))
     if request.method == 'POST':
         form = RoomForm(request.POST, instance=room)
         if form.is_valid():
@@ -128,7 +154,7 @@ def room_edit(request, room_id):
 @login_required
 @user_passes_test(is_landlord)
 def room_delete(request, room_id):
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room, id=room_id, property=current_property(request))
     if request.method == 'POST':
         room_number = room.room_number
         room.delete()
@@ -140,9 +166,9 @@ def room_delete(request, room_id):
 @login_required
 @user_passes_test(is_landlord)
 def roomtenant_add(request, room_id):
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room, id=room_id, property=current_property(request))
     if request.method == 'POST':
-        form = RoomTenantForm(request.POST)
+        form = RoomTenantForm(request.POST, property=room.property_id)
         if form.is_valid():
             assignment = form.save()
             # update room occupancy
@@ -151,15 +177,15 @@ def roomtenant_add(request, room_id):
             messages.success(request, f'Tenant added to Room {assignment.room.room_number}!')
             return redirect('room_detail', room_id=assignment.room.id)
     else:
-        form = RoomTenantForm(initial={'room': room})
+        form = RoomTenantForm(initial={'room': room}, property=room.property_id)
     return render(request, 'core/roomtenant_form_fixed.html', {'form': form, 'room': room})
 
 @login_required
 @user_passes_test(is_landlord)
 def roomtenant_edit(request, room_id, assignment_id):
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room, id=room_id, property=current_property(request))
     try:
-        assignment = get_object_or_404(RoomTenant, id=assignment_id, room=room, status='active')
+        assignment = get_object_or_404(RoomTenant.objects.select_related('tenant'), id=assignment_id, room=room, status='active')
     except Http404:
         messages.error(request, 'Cannot edit an archived tenant.')
         return redirect('tenant_list')
@@ -169,7 +195,7 @@ def roomtenant_edit(request, room_id, assignment_id):
     addons = AddOn.objects.filter(room_tenant=assignment).order_by('-created_at')
     
     # Initialize forms
-    form = RoomTenantForm(instance=assignment)
+    form = RoomTenantForm(instance=assignment, property=room.property_id)
     addon_form = AddOnForm()
     
     # Handle POST requests
@@ -186,7 +212,7 @@ def roomtenant_edit(request, room_id, assignment_id):
         
         # Handle assignment update
         elif 'save_assignment' in request.POST:
-            form = RoomTenantForm(request.POST, instance=assignment)
+            form = RoomTenantForm(request.POST, instance=assignment, property=room.property_id)
             if form.is_valid():
                 updated_assignment = form.save()
                 new_room = updated_assignment.room
@@ -219,9 +245,9 @@ def roomtenant_edit(request, room_id, assignment_id):
 @login_required
 @user_passes_test(is_landlord)
 def roomtenant_archive(request, room_id, assignment_id):
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room, id=room_id, property=current_property(request))
     try:
-        assignment = get_object_or_404(RoomTenant, id=assignment_id, room=room, status='active')
+        assignment = get_object_or_404(RoomTenant.objects.select_related('tenant'), id=assignment_id, room=room, status='active')
     except Http404:
         messages.error(request, 'Tenant is already archived.')
         return redirect('tenant_list')
@@ -237,7 +263,10 @@ def roomtenant_archive(request, room_id, assignment_id):
 @login_required
 @user_passes_test(is_landlord)
 def tenant_list(request):
-    assignments = RoomTenant.objects.select_related('tenant', 'room').order_by('room__room_number', 'tenant__first_name')
+    assignments = (
+        RoomTenant.objects.filter(room__property=current_property(request))
+        .select_related('tenant', 'room').order_by('room__room_number', 'tenant__first_name')
+    )
     q = request.GET.get('q', '').strip()
     status = request.GET.get('status', '').strip()
 
@@ -262,24 +291,30 @@ def tenant_list(request):
 @login_required
 @user_passes_test(is_landlord)
 def archived_tenants(request):
-    assignments = RoomTenant.objects.select_related('tenant', 'room').filter(status='inactive').order_by('tenant__first_name')
+    assignments = (
+        RoomTenant.objects.filter(room__property=current_property(request), status='inactive')
+        .select_related('tenant', 'room').order_by('tenant__first_name')
+    )
     return render(request, 'core/archived_tenants.html', {'tenants': assignments})
 
 @login_required
 @user_passes_test(is_landlord)
 def roomtenant_restore(request, assignment_id):
-    assignment = get_object_or_404(RoomTenant, id=assignment_id, status='inactive')
-    rooms = Room.objects.all().order_by('room_number')
+    property = current_property(request)
+    assignment = get_object_or_404(
+        RoomTenant.objects.select_related('tenant', 'room'), id=assignment_id, room__property=property, status='inactive',
+    )
+    rooms = Room.objects.filter(property=property).order_by('room_number')
     if request.method == 'POST':
         room_id = request.POST.get('room_id')
-        target_room = get_object_or_404(Room, id=room_id)
+        target_room = get_object_or_404(Room, id=room_id, property=property)
         # Move assignment to new room and activate
         assignment.room = target_room
         assignment.status = 'active'
         assignment.save()
         # Recompute occupancy for both rooms
         try:
-            previous_room = Room.objects.get(id=request.POST.get('previous_room_id'))
+            previous_room = Room.objects.get(id=request.POST.get('previous_room_id'), property=property)
             previous_room.current_occupants = RoomTenant.objects.filter(room=previous_room, status='active').count()
             previous_room.update_status()
         except Exception:
@@ -293,13 +328,18 @@ def roomtenant_restore(request, assignment_id):
 @login_required
 @user_passes_test(is_landlord)
 def payment_list(request):
-    payments = Payment.objects.all().select_related('tenant', 'room').order_by('-payment_date')
+    payments = (
+        Payment.objects.filter(room__property=current_property(request))
+        .select_related('tenant', 'room').order_by('-payment_date')
+    )
     return render(request, 'core/payment_list.html', {'payments': payments})
 
 @login_required
 @user_passes_test(is_landlord)
 def payment_edit(request, payment_id):
-    payment = get_object_or_404(Payment, id=payment_id)
+    payment = get_object_or_404(
+        Payment.objects.select_related('tenant'), id=payment_id, room__property=current_property(request),
+    )
     if request.method == 'POST':
         form = PaymentForm(request.POST, instance=payment)
         if form.is_valid():
@@ -313,11 +353,14 @@ def payment_edit(request, payment_id):
 @login_required
 @user_passes_test(is_landlord)
 def add_payment(request, tenant_id):
-    tenant = get_object_or_404(User, id=tenant_id)
-    room_assignment = get_object_or_404(RoomTenant, tenant=tenant, status='active')
+    room_assignment = get_object_or_404(
+        RoomTenant.objects.select_related('room', 'tenant'),
+        tenant_id=tenant_id, room__property=current_property(request), status='active',
+    )
+    tenant = room_assignment.tenant
     
-    # Calculate base amount (1350) + add-ons
-    base_amount = Decimal('1350.00')
+    # Calculate base amount + add-ons
+    base_amount = BASE_RENT
     addons = AddOn.objects.filter(room_tenant=room_assignment)
     addon_total = sum(addon.amount for addon in addons) if addons else Decimal('0.00')
     total_amount = base_amount + addon_total
@@ -350,6 +393,7 @@ def add_payment(request, tenant_id):
                 payment_date=payment.payment_date,
                 landlord_signature='signatures/signature.png'
             )
+            render_receipt.enqueue(receipt_id=receipt.id, dedupe_key=f'receipt:{receipt.id}')
             
             messages.success(request, f'Payment of ₱{total_amount:,.2f} recorded successfully!')
             return redirect('payment_tracking')
@@ -375,9 +419,13 @@ def add_payment(request, tenant_id):
     })
 
 @login_required
+@tenant_revalidated
 def payment_history(request):
-    payments = Payment.objects.filter(tenant=request.user).order_by('-payment_date')
-    return render(request, 'core/payment_history.html', {'payments': payments})
+    summary = tenant_summary(request)
+    return render(request, 'core/payment_history.html', {
+        'payments': summary['payments'],
+        'statements': summary['statements'],
+    })
 
 @login_required
 @user_passes_test(is_landlord)
@@ -386,40 +434,29 @@ def manage_signature(request):
     
     if request.method == 'POST':
         if 'signature' in request.FILES:
-            profile.signature = request.FILES['signature']
-            profile.save()
+            try:
+                upload = normalize_signature(request.FILES['signature'])
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+                return redirect('manage_signature')
+            previous = profile.signature.name
+            profile.signature.save(upload.name, upload)
+            if previous and previous != profile.signature.name:
+                delete_signature(previous)
             messages.success(request, 'Signature updated successfully!')
             return redirect('manage_signature')
     
     return render(request, 'core/manage_signature.html', {'profile': profile})
 
 @login_required
-def download_receipt(request, receipt_id):
-    receipt = get_object_or_404(Receipt, id=receipt_id)
-    
-    # Check if user is authorized to view this receipt
-    if not request.user.is_staff and receipt.payment.tenant != request.user:
-        messages.error(request, 'You are not authorized to view this receipt.')
-        return redirect('home')
-    
-    # Get landlord profile for signature
+@user_passes_test(is_landlord)
+@require_POST
+def switch_property(request):
     try:
-        landlord_profile = LandlordProfile.objects.get(user__is_staff=True)
-        receipt.landlord_signature = landlord_profile.signature
-    except LandlordProfile.DoesNotExist:
-        receipt.landlord_signature = None
-    
-    # Generate PDF
-    html_string = render_to_string('core/receipt_template.html', {'receipt': receipt})
-    
-    # --- RENTRIX FIX: Added base_url for Docker/Render PDF generation ---
-    pdf = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
-    
-    # Create response
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="receipt_{receipt.receipt_number}.pdf"'
-    
-    return response
+        select_property(request, int(request.POST.get('property_id', '')))
+    except ValueError:
+        raise Http404
+    return redirect('landlord_dashboard')
 
 @login_required
 def dashboard_redirect(request):
@@ -430,63 +467,34 @@ def dashboard_redirect(request):
 @login_required
 @user_passes_test(is_landlord)
 def tenant_payment_history(request, tenant_id):
-    tenant = get_object_or_404(User, id=tenant_id)
-    payments = Payment.objects.filter(tenant=tenant).order_by('-payment_date')
+    property = current_property(request)
+    tenant = get_object_or_404(User.objects.filter(room_assignments__room__property=property).distinct(), id=tenant_id)
+    payments = (
+        Payment.objects.filter(tenant=tenant, room__property=property)
+        .select_related('room', 'receipt').order_by('-payment_date')
+    )
     return render(request, 'core/tenant_payment_history.html', {'tenant': tenant, 'payments': payments})
 
 @login_required
 @user_passes_test(is_landlord)
 def payment_tracking(request):
     # Get the selected year from query parameters, default to 2025
-    selected_year = int(request.GET.get('year', 2025))
-    
-    # Get all active tenants with their room assignments and add-ons
-    active_tenants = RoomTenant.objects.filter(status='active').select_related('tenant', 'room').prefetch_related('addons').order_by('room__room_number')
+    selected_year = parse_year(request.GET.get('year'), 2025)
+
+    # Active tenants with add-ons and each month's payment state (cached)
+    property_id = current_property(request).id
+    state = tracking_state(property_id)
+    rows = payment_grid(selected_year, property_id, state['fingerprint'])
     
     # Get all months in the selected year
     months = list(calendar.month_name)[1:]  # Get list of month names
     
-    # Get all payments for the selected year
-    payments = Payment.objects.filter(
-        payment_month__year=selected_year,
-        tenant__in=[tenant.tenant for tenant in active_tenants]
-    ).select_related('tenant', 'room')
-    
-    # Create a dictionary to store payment status for each tenant and month
-    payment_status = {}
-    for tenant in active_tenants:
-        payment_status[tenant.tenant.id] = {}
-        for month in range(1, 13):
-            payment_status[tenant.tenant.id][month] = None
-    
-    # Ensure current_year and available_years are defined
-    current_year = timezone.now().year
-    available_years = request.session.get('persisted_years', list(range(2025, current_year + 1)))
-
-    # Ensure payments for the selected year and month are displayed
-    for payment in payments:
-        month = payment.payment_month.month
-        payment_status[payment.tenant.id][month] = 'paid'
-
-    # Include future years in available years
-    if selected_year > current_year:
-        if selected_year not in available_years:
-            available_years.append(selected_year)
-            available_years.sort()
-            request.session['persisted_years'] = available_years
-
-    # Validate payment input for specific months in the selected year
-    for tenant in active_tenants:
-        for month in range(1, 13):
-            if tenant.move_in_date.year > selected_year or (
-                tenant.move_in_date.year == selected_year and tenant.move_in_date.month > month
-            ):
-                payment_status[tenant.tenant.id][month] = 'invalid'
+    # Years with payments, plus this one and any year browsed to
+    available_years = payment_years(state, selected_year)
     
     context = {
-        'active_tenants': active_tenants,
+        'rows': rows,
         'months': months,
-        'payment_status': payment_status,
         'selected_year': selected_year,
         'available_years': available_years,
     }
@@ -497,9 +505,9 @@ def payment_tracking(request):
 @login_required
 @user_passes_test(is_landlord)
 def addon_add(request, room_id, assignment_id):
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room, id=room_id, property=current_property(request))
     try:
-        assignment = get_object_or_404(RoomTenant, id=assignment_id, room=room, status='active')
+        assignment = get_object_or_404(RoomTenant.objects.select_related('tenant'), id=assignment_id, room=room, status='active')
     except Http404:
         messages.error(request, 'Cannot add add-ons to an archived tenant.')
         return redirect('tenant_list')
@@ -526,9 +534,9 @@ def addon_add(request, room_id, assignment_id):
 @login_required
 @user_passes_test(is_landlord)
 def addon_delete(request, room_id, assignment_id, addon_id):
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room, id=room_id, property=current_property(request))
     try:
-        assignment = get_object_or_404(RoomTenant, id=assignment_id, room=room, status='active')
+        assignment = get_object_or_404(RoomTenant.objects.select_related('tenant'), id=assignment_id, room=room, status='active')
     except Http404:
         messages.error(request, 'Cannot remove add-ons from an archived tenant.')
         return redirect('tenant_list')
@@ -603,43 +611,12 @@ def force_password_change(request):
 
     return render(request, 'account/force_password_change.html', {'form': form})
 
-@login_required
-def search_api(request):
-    query = request.GET.get('q', '').strip()
-    results = []
-    if len(query) >= 2:
-        matched_rooms = Room.objects.filter(Q(room_number__icontains=query))[:5]
-        for room in matched_rooms:
-            results.append({
-                'type': 'Room',
-                'title': f"Room {room.room_number}",
-                'icon': 'fa-door-open',
-                'url': f"/rooms/{room.id}/",
-            })
-
-        matched_assignments = RoomTenant.objects.select_related('tenant', 'room').filter(
-            Q(tenant__first_name__icontains=query) |
-            Q(tenant__last_name__icontains=query) |
-            Q(tenant__username__icontains=query) |
-            Q(tenant__email__icontains=query)
-        )[:5]
-        for a in matched_assignments:
-            results.append({
-                'type': 'Tenant',
-                'title': a.tenant.get_full_name() or a.tenant.username,
-                'icon': 'fa-user',
-                'url': f"/tenants/?q={quote(query)}",
-            })
-
-    return JsonResponse(results, safe=False)
-
-
 @login_required
 def tenant_room_list(request):
     """
     Tenant-facing read-only list of rooms matching landlord design.
     """
-    rooms = Room.objects.all().order_by('room_number')
+    rooms = Room.objects.filter(property__in=tenant_properties(request.user)).order_by('room_number')
     return render(request, 'core/tenant_room_list.html', {
         'rooms': rooms,
     })
@@ -650,7 +627,7 @@ def tenant_room_detail(request, room_id):
     """
     Tenant-facing read-only room detail matching landlord view.
     """
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room, id=room_id, property__in=tenant_properties(request.user))
     tenants = RoomTenant.objects.filter(room=room, status='active').select_related('tenant', 'room').order_by('tenant__first_name')
     return render(request, 'core/tenant_room_detail.html', {
         'room': room,
@@ -659,13 +636,71 @@ def tenant_room_detail(request, room_id):
 
 
 @login_required
+@tenant_revalidated
 def tenant_payment_tracker(request):
     """
     Tenant-facing payment tracker with receipt downloads for paid months.
     """
-    payments = (
-        Payment.objects.filter(tenant=request.user)
-        .select_related('receipt')
-        .order_by('-payment_month')
-    )
-    return render(request, 'core/payment_tracker.html', {'payments': payments})
+    return render(request, 'core/payment_tracker.html', {'payments': tenant_summary(request)['payments']})
+
+
+@login_required
+@tenant_revalidated
+def tenant_payments_data(request):
+    """
+    The tenant's payments as compact JSON, kept by the service worker.
+    """
+    if request.user.is_staff:
+        return JsonResponse({'detail': 'Only tenants have payment data.'}, status=403)
+    return JsonResponse(tenant_payments(request.user, tenant_summary(request)))
+
+
+@require_safe
+def web_manifest(request):
+    return revalidated_response(request, json.dumps(manifest()), 'application/manifest+json')
+
+
+@require_safe
+def service_worker(request):
+    """
+    Served from the site root so it may control the tenant pages and receipts.
+    """
+    script = render_to_string('core/service_worker.js', {'config': json.dumps(service_worker_context())})
+    return revalidated_response(request, script, 'text/javascript')
+
+
+def metrics(request):
+    """
+    Prometheus text exposition aggregated across all worker processes.
+    Only served to the addresses in RENTRIX_METRICS_ALLOWED_IPS, as resolved
+    through RENTRIX_TRUSTED_PROXIES; others get a 403.
+    """
+    if client_ip(request) not in settings.RENTRIX_METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(collect_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@login_required
+@require_safe
+def serve_media(request, path):
+    """
+    Uploaded media behind the site login: landlords see their properties'
+    files, tenants only their own. Unknown and forbidden files both 404.
+    """
+    if not can_access(request.user, path):
+        raise Http404
+    return media_response(request, path)
+
+
+def login_identifier(request):
+    return request.POST.get('login', '').strip().lower()
+
+
+@ratelimit('login', key='ip', methods={'POST'})
+@ratelimit('login-account', key=login_identifier, methods={'POST'})
+def account_login(request, *args, **kwargs):
+    """
+    allauth's login, limited before any password is hashed: per address,
+    and per account name against attempts spread over many addresses.
+    """
+    return allauth_login(request, *args, **kwargs)
@@ -0,0 +1,25 @@
+"""
+Gunicorn settings for serving rentrix.asgi with uvicorn workers.
+
+    gunicorn rentrix.asgi:application -c gunicorn.conf.py
+
+Each worker runs an event loop, so async views (search, dashboard,
+counters) are served concurrently; sync views run in Django's thread pool.
+"""
+import glob
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:10000')
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'uvicorn.workers.UvicornWorker'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    # Per-process metric files from a previous run would be summed into the
+    # new totals; start every deploy from zero.
+    metrics_dir = os.getenv('RENTRIX_METRICS_DIR', os.path.join(os.path.dirname(__file__), 'var', 'metrics'))
+    for filename in glob.glob(os.path.join(metrics_dir, 'metrics_*.db')):
+        os.remove(filename)
@@ -49,29 +49,37 @@ INSTALLED_APPS = [
     'allauth.account',
     'allauth.socialaccount',
     'rest_framework',
+    'rest_framework.authtoken',
     'debug_toolbar',
     'core.apps.CoreConfig',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'core.middleware.ForcePasswordChangeMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
     'allauth.account.middleware.AccountMiddleware',
 ]
 
+if DEBUG:
+    # The toolbar middleware is sync-only; keeping it out of production lets
+    # async views run without a thread hop under ASGI.
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'rentrix.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -83,8 +91,22 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        # Row-heavy fragments (jinja2/core/rows/) included by DTL pages
+        # through the ``render_rows`` tag.
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'core.jinja2.environment',
+        },
+    },
 ]
 
+# Engine for the row fragments of the payment tracking, tenant and payment
+# lists: 'jinja2', or 'django' for the DTL versions in templates/core/rows/
+RENTRIX_ROWS_ENGINE = os.getenv('RENTRIX_ROWS_ENGINE', 'jinja2')
+
 WSGI_APPLICATION = 'rentrix.wsgi.application'
 
 
@@ -141,6 +163,18 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media is served by core.views.serve_media after a permission check. Set
+# RENTRIX_MEDIA_OFFLOAD to 'x-accel-redirect' (nginx, with an internal
+# location at RENTRIX_MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or
+# 'x-sendfile' (Apache/lighttpd) to let the front-end server send the bytes.
+RENTRIX_MEDIA_OFFLOAD = os.getenv('RENTRIX_MEDIA_OFFLOAD', '')
+RENTRIX_MEDIA_ACCEL_PREFIX = os.getenv('RENTRIX_MEDIA_ACCEL_PREFIX', '/protected-media/')
+RENTRIX_MEDIA_MAX_AGE = int(os.getenv('RENTRIX_MEDIA_MAX_AGE', '3600'))
+
+# Bump to make tenants' service workers drop their cached shell and to
+# invalidate the ETags of the tenant pages after a template change.
+RENTRIX_PWA_VERSION = os.getenv('RENTRIX_PWA_VERSION', '1')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -174,10 +208,145 @@ ACCOUNT_ADAPTER = 'core.adapters.RentrixAccountAdapter'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'account_login'
 
-# Email settings (for development)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Email settings (console backend for development; set EMAIL_BACKEND and the
+# SMTP settings in the environment to deliver mail)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS') == 'True'
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'RENTTRIX <no-reply@localhost>')
+
+# Rent reminders (core.reminders): messages per SMTP batch and pause between batches
+RENTRIX_REMINDER_BATCH_SIZE = int(os.getenv('RENTRIX_REMINDER_BATCH_SIZE', '50'))
+RENTRIX_REMINDER_BATCH_DELAY = float(os.getenv('RENTRIX_REMINDER_BATCH_DELAY', '1'))
+
+# Django REST Framework (core.api)
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.TokenAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAdminUser'],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'] + (
+        ['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []
+    ),
+}
+RENTRIX_API_BULK_LIMIT = 5000
+
+# Token-bucket limits (core.ratelimit): 'N/period' per scope. 'search' is
+# per session, 'login' per address, 'login-account' per submitted username.
+RENTRIX_RATELIMIT_ENABLED = os.getenv('RENTRIX_RATELIMIT_ENABLED', 'True') == 'True'
+# Addresses of reverse proxies in front of the app (comma-separated). Only
+# requests arriving from one of them have X-Forwarded-For read for the
+# client address; otherwise it is ignored, as any client can send it.
+RENTRIX_TRUSTED_PROXIES = [ip.strip() for ip in os.getenv('RENTRIX_TRUSTED_PROXIES', '').split(',') if ip.strip()]
+RENTRIX_RATELIMIT_CACHE = 'default'
+RENTRIX_RATELIMITS = {
+    'search': os.getenv('RENTRIX_RATELIMIT_SEARCH', '20/10s'),
+    'autocomplete': os.getenv('RENTRIX_RATELIMIT_AUTOCOMPLETE', '30/10s'),
+    'login': os.getenv('RENTRIX_RATELIMIT_LOGIN', '10/m'),
+    'login-account': os.getenv('RENTRIX_RATELIMIT_LOGIN_ACCOUNT', '5/5m'),
+}
+
+# Delta sync (core.sync): how far back deletes are remembered, how many
+# seconds each window re-sends to cover transactions that commit late, and
+# the most rows one response carries (clients may ask for fewer).
+RENTRIX_TOMBSTONE_RETENTION_DAYS = 30
+RENTRIX_SYNC_OVERLAP = 5
+RENTRIX_SYNC_PAGE_SIZE = int(os.getenv('RENTRIX_SYNC_PAGE_SIZE', '1000'))
 
 # Debug Toolbar
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Request instrumentation (core.middleware.RequestTimingMiddleware)
+RENTRIX_SLOW_REQUEST_MS = int(os.getenv('RENTRIX_SLOW_REQUEST_MS', '500'))
+RENTRIX_SLOW_REQUEST_TOP_QUERIES = 5
+
+# Metrics (core.metrics). Every worker process writes its own file in
+# RENTRIX_METRICS_DIR; empty the directory when the server is restarted.
+RENTRIX_METRICS_ENABLED = os.getenv('RENTRIX_METRICS_ENABLED', 'True') == 'True'
+RENTRIX_METRICS_DIR = os.getenv('RENTRIX_METRICS_DIR', os.path.join(BASE_DIR, 'var', 'metrics'))
+RENTRIX_METRICS_ALLOWED_IPS = os.getenv('RENTRIX_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# Staff-only request profiling (core.middleware.ProfilingMiddleware)
+RENTRIX_PROFILE_DIR = os.getenv('RENTRIX_PROFILE_DIR', os.path.join(BASE_DIR, 'var', 'profiles'))
+RENTRIX_PROFILE_INTERVAL = float(os.getenv('RENTRIX_PROFILE_INTERVAL', '0.001'))
+
+# Threads available to async views for CPU-heavy work such as receipt PDFs
+RENTRIX_PDF_RENDER_THREADS = int(os.getenv('RENTRIX_PDF_RENDER_THREADS', '2'))
+
+# Processes used by ``manage.py generate_statements``; unset means one per
+# CPU and 0 renders in the command's own process, as ``--workers 0`` does
+RENTRIX_STATEMENT_WORKERS = (
+    int(os.environ['RENTRIX_STATEMENT_WORKERS']) if os.getenv('RENTRIX_STATEMENT_WORKERS') else None
+)
+
+# Width in pixels of the signature derivative embedded in receipts (twice
+# the printed width, for sharp output)
+RENTRIX_SIGNATURE_RECEIPT_WIDTH = int(os.getenv('RENTRIX_SIGNATURE_RECEIPT_WIDTH', '400'))
+
+# Live updates (core.live): stream polling cadence, stream lifetime before
+# the browser reconnects, and how long change events are kept
+RENTRIX_LIVE_POLL_SECONDS = float(os.getenv('RENTRIX_LIVE_POLL_SECONDS', '1'))
+RENTRIX_LIVE_STREAM_SECONDS = int(os.getenv('RENTRIX_LIVE_STREAM_SECONDS', '55'))
+RENTRIX_LIVE_RETRY_MS = 3000
+RENTRIX_LIVE_EVENT_RETENTION_MINUTES = int(os.getenv('RENTRIX_LIVE_EVENT_RETENTION_MINUTES', '60'))
+
+# Background jobs (core.jobs, run by `manage.py run_workers`). With
+# RENTRIX_JOBS_EAGER=True jobs run in-process after commit and no worker is needed.
+RENTRIX_JOBS_EAGER = os.getenv('RENTRIX_JOBS_EAGER') == 'True'
+RENTRIX_WORKER_PROCESSES = int(os.getenv('RENTRIX_WORKER_PROCESSES', '1'))
+RENTRIX_WORKER_THREADS = int(os.getenv('RENTRIX_WORKER_THREADS', '4'))
+RENTRIX_JOB_LOCK_TIMEOUT = int(os.getenv('RENTRIX_JOB_LOCK_TIMEOUT', '600'))
+RENTRIX_JOB_RETENTION_DAYS = int(os.getenv('RENTRIX_JOB_RETENTION_DAYS', '7'))
+
+# Shared across worker processes on one host, so warmed entries serve every worker
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('RENTRIX_CACHE_DIR', os.path.join(BASE_DIR, 'var', 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Sessions get a cache of their own, so a busy day of logins cannot cull
+    # the payment grids and tenant summaries (or the other way round). An
+    # evicted session is simply read back from the database.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('RENTRIX_SESSION_CACHE_DIR', os.path.join(BASE_DIR, 'var', 'sessions')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('RENTRIX_SESSION_CACHE_ENTRIES', '20000'))},
+    },
+}
+# Sessions are read from their cache and written (through to the database)
+# only when they change, so most requests do no session I/O.
+# 'django.contrib.sessions.backends.signed_cookies' keeps them off the server
+# entirely, at the cost of not being able to revoke a session server-side.
+SESSION_ENGINE = os.getenv('RENTRIX_SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+SESSION_CACHE_ALIAS = 'sessions'
+
+RENTRIX_TRACKING_CACHE_SECONDS = int(os.getenv('RENTRIX_TRACKING_CACHE_SECONDS', '3600'))
+RENTRIX_TENANT_SUMMARY_CACHE_SECONDS = int(os.getenv('RENTRIX_TENANT_SUMMARY_CACHE_SECONDS', '3600'))
+
+# Periodic maintenance (`manage.py run_scheduler`): job name -> seconds between
+# runs, overriding the defaults in core.maintenance; 0 disables a job
+RENTRIX_MAINTENANCE_INTERVALS = {}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'loggers': {
+        'core.requests': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'core.jobs': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'core.maintenance': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
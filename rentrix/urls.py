@@ -15,15 +15,18 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from core.views import account_login, serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('accounts/login/', account_login, name='account_login'),
     path('accounts/', include('allauth.urls')),
+    path('api/v1/', include('core.api_urls')),
     path('', include('core.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.+)$", serve_media, name='media'),
+]
 
 if settings.DEBUG:
     import debug_toolbar
@@ -0,0 +1,43 @@
+// Pickers for <select data-autocomplete-url>: the page embeds only the
+// selected option, and the others are fetched as the user types.
+document.querySelectorAll('select[data-autocomplete-url]').forEach((select) => {
+    const input = document.createElement('input');
+    input.type = 'search';
+    input.className = 'form-control mb-2';
+    input.placeholder = 'Type to search...';
+    input.autocomplete = 'off';
+    input.setAttribute('aria-controls', select.id);
+    select.before(input);
+
+    let debounceTimer;
+    let controller;
+    let lastQuery = null;
+
+    const load = (query) => {
+        if (query === lastQuery) return;
+        lastQuery = query;
+        if (controller) controller.abort();
+        controller = new AbortController();
+        const url = `${select.dataset.autocompleteUrl}?q=${encodeURIComponent(query)}`;
+        fetch(url, { signal: controller.signal, headers: { 'Accept': 'application/json' } })
+            .then((res) => (res.ok ? res.json() : { results: [] }))
+            .then(({ results }) => {
+                const selected = select.selectedOptions[0];
+                const keep = selected && selected.value ? selected : null;
+                select.querySelectorAll('option').forEach((option) => {
+                    if (option.value && option !== keep) option.remove();
+                });
+                results.forEach(({ id, text }) => {
+                    if (keep && String(id) === keep.value) return;
+                    select.add(new Option(text, id));
+                });
+            })
+            .catch((err) => { if (err.name !== 'AbortError') lastQuery = null; });
+    };
+
+    input.addEventListener('input', () => {
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(() => load(input.value.trim()), 200);
+    });
+    select.addEventListener('focus', () => load(input.value.trim()));
+});
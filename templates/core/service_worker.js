@@ -0,0 +1,175 @@
+// RENTRIX service worker for tenants.
+//
+// - The shell (CSS, JS, icons, manifest) is served from the cache and
+//   revalidated in the background.
+// - The tenant pages and the payments JSON go to the network first, and
+//   fall back to the last copy when it is slow or unreachable.
+// - Receipts are kept once downloaded and served from the cache.
+//
+// Every network request is conditional (cache: 'no-cache'), so when
+// nothing changed the server only answers with a 304.
+const CONFIG = {{ config|safe }};
+const SHELL_CACHE = `rentrix-shell-${CONFIG.version}`;
+const DATA_CACHE = 'rentrix-data';
+const RECEIPT_CACHE = 'rentrix-receipts';
+const NETWORK_TIMEOUT_MS = 4000;
+const SYNC_INTERVAL_MS = 5 * 60 * 1000;
+const RECEIPT_PATH = new RegExp('^' + CONFIG.receipt_url.replace('/0/', '/\\d+/') + '$');
+
+let lastSync = 0;
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(CONFIG.shell))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys.filter(key => key.startsWith('rentrix-shell-') && key !== SHELL_CACHE)
+                    .map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+    if (url.pathname === CONFIG.logout_url) {
+        // Nothing of this tenant's may outlive their session on the device.
+        event.waitUntil(forget());
+        return;
+    }
+    if (request.method !== 'GET') {
+        return;
+    }
+    if (CONFIG.shell.includes(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, request));
+    } else if (RECEIPT_PATH.test(url.pathname)) {
+        event.respondWith(cacheFirst(RECEIPT_CACHE, request));
+    } else if (CONFIG.pages.includes(url.pathname) || url.pathname === CONFIG.data_url) {
+        event.respondWith(networkFirst(DATA_CACHE, request));
+    }
+});
+
+self.addEventListener('message', event => {
+    if (event.data === 'sync' && Date.now() - lastSync > SYNC_INTERVAL_MS) {
+        lastSync = Date.now();
+        event.waitUntil(sync());
+    }
+});
+
+function conditional(request) {
+    // Navigation requests cannot be fetched with options, so copy the URL.
+    return new Request(request.url, {cache: 'no-cache', credentials: 'same-origin'});
+}
+
+async function revalidate(cache, request) {
+    const response = await fetch(conditional(request));
+    if (response.redirected || response.status === 403) {
+        // Logged out, or no longer a tenant: drop what we kept.
+        await forget();
+        return Response.redirect(response.url, 302);
+    }
+    if (response.ok) {
+        await cache.put(request.url, response.clone());
+    }
+    return response;
+}
+
+async function networkFirst(cacheName, request) {
+    const cache = await caches.open(cacheName);
+    const network = revalidate(cache, request);
+    const cached = await cache.match(request.url);
+    if (!cached) {
+        return network;
+    }
+    const timeout = new Promise(resolve => setTimeout(() => resolve(cached), NETWORK_TIMEOUT_MS));
+    return Promise.race([network.catch(() => cached), timeout]);
+}
+
+async function staleWhileRevalidate(event, cacheName, request) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request.url);
+    const network = fetch(conditional(request)).then(response => {
+        if (response.ok) {
+            return cache.put(request.url, response.clone()).then(() => response);
+        }
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => null));
+        return cached;
+    }
+    return network;
+}
+
+async function cacheFirst(cacheName, request) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request.url);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok && response.headers.get('Content-Type') === 'application/pdf') {
+        await cache.put(request.url, response.clone());
+    }
+    return response;
+}
+
+async function forget() {
+    await Promise.all([caches.delete(DATA_CACHE), caches.delete(RECEIPT_CACHE)]);
+}
+
+// Refresh the offline copies when the tenant's payment data changed, and
+// drop receipts that were re-rendered or no longer belong to them.
+async function sync() {
+    const previous = await caches.match(CONFIG.data_url, {cacheName: DATA_CACHE});
+    let response;
+    try {
+        response = await fetch(CONFIG.data_url, {cache: 'no-cache', credentials: 'same-origin'});
+    } catch (error) {
+        return;  // Offline; keep everything.
+    }
+    if (response.redirected || !response.ok) {
+        await forget();
+        return;
+    }
+    const data = await response.clone().json();
+    const before = previous ? await previous.json() : null;
+    if (before && before.tenant !== data.tenant) {
+        await forget();
+    }
+    const pages = await caches.open(DATA_CACHE);
+    await pages.put(CONFIG.data_url, response);
+    if (before && before.tenant === data.tenant && previous.headers.get('ETag') === response.headers.get('ETag')) {
+        return;
+    }
+    await Promise.all(CONFIG.pages.map(page => revalidate(pages, new Request(page)).catch(() => null)));
+    await pruneReceipts(data);
+}
+
+async function pruneReceipts(data) {
+    const id = data.fields.indexOf('receipt');
+    const etag = data.fields.indexOf('receipt_etag');
+    const etags = new Map(
+        data.payments
+            .filter(row => row[id])
+            .map(row => [CONFIG.receipt_url.replace('/0/', `/${row[id]}/`), row[etag]])
+    );
+    const cache = await caches.open(RECEIPT_CACHE);
+    for (const request of await cache.keys()) {
+        const cached = await cache.match(request);
+        if (etags.get(new URL(request.url).pathname) !== cached.headers.get('ETag')) {
+            await cache.delete(request);
+        }
+    }
+}